@@ -0,0 +1,439 @@
+r"""
+The :class:`ResultCache` class defines a persistent, content-addressed
+cache of the results of BigDFT calculations.
+
+Each result is stored under a key computed from the cleaned input
+parameters of the job, its initial geometry (with rounded positions) and
+the identity of the BigDFT executable, so that an identical calculation
+is never run twice, even if it is defined in another run directory or by
+another workflow:
+
+>>> import tempfile
+>>> from mybigdft import Job, Posinp, Atom
+>>> pos = Posinp([Atom('N', [0, 0, 0]), Atom('N', [0, 0, 1.1])],
+...              'angstroem', 'free')
+>>> cache = ResultCache(tempfile.mkdtemp(), code_version="1.9")
+>>> job1 = Job(posinp=pos, run_dir="tests/N2", name="N2")
+>>> job2 = Job(posinp=pos.translate([0, 0, 1e-9]), run_dir="tests/N2_bis")
+>>> cache.key(job1) == cache.key(job2)
+True
+"""
+
+from __future__ import print_function, absolute_import
+import os
+import json
+import shutil
+import hashlib
+import pickle
+import tempfile
+import numpy as np
+from mybigdft.globals import BIGDFT_PATH
+from mybigdft.iofiles.logfiles import MultipleLogfile, _LogfileSequence
+
+
+__all__ = ["ResultCache", "job_digest"]
+
+
+class ResultCache(object):
+    r"""
+    Persistent on-disk cache of the logfiles of BigDFT calculations.
+
+    The entries are stored in the cache directory as
+    ``<key[:2]>/<key>/``, each one containing the logfile of the
+    calculation and a pickled version of the corresponding
+    :class:`~mybigdft.iofiles.logfiles.Logfile` instance (allowing to
+    get it back without parsing the logfile again).
+
+    The least recently used entries are evicted when the cache exceeds
+    its maximal size or number of entries.
+    """
+
+    LOGFILE_NAME = "log.yaml"
+    PICKLE_NAME = "logfile.pkl"
+
+    def __init__(
+        self,
+        directory,
+        max_size=None,
+        max_entries=None,
+        tolerance=1e-6,
+        code_version=None,
+    ):
+        r"""
+        Parameters
+        ----------
+        directory : str
+            Directory where the cache is stored (created if needed).
+        max_size : int or None
+            Maximal size of the cache (in bytes). There is no limit if
+            `None`.
+        max_entries : int or None
+            Maximal number of entries of the cache. There is no limit
+            if `None`.
+        tolerance : float
+            Precision (in the units of the posinp) to which the atomic
+            positions are rounded in the keys (see :func:`job_digest`).
+        code_version : str or None
+            Identifier of the version of BigDFT used. By default, the
+            identity of the BigDFT executable (its path, size and
+            modification time) is used.
+        """
+        self.directory = os.path.abspath(directory)
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.tolerance = tolerance
+        if code_version is None:
+            code_version = _executable_identity(BIGDFT_PATH)
+        self.code_version = code_version
+
+    @property
+    def directory(self):
+        r"""
+        Returns
+        -------
+        str
+            Absolute path to the directory where the cache is stored.
+        """
+        return self._directory
+
+    @directory.setter
+    def directory(self, directory):
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self._directory = directory
+
+    @property
+    def tolerance(self):
+        r"""
+        Returns
+        -------
+        float
+            Precision to which the atomic positions are rounded in
+            the keys.
+        """
+        return self._tolerance
+
+    @tolerance.setter
+    def tolerance(self, tolerance):
+        tolerance = float(tolerance)
+        if tolerance <= 0:
+            raise ValueError("The tolerance must be positive.")
+        self._tolerance = tolerance
+
+    def key(self, job):
+        r"""
+        Parameters
+        ----------
+        job : Job
+            BigDFT job.
+
+        Returns
+        -------
+        str
+            Key of the job in the cache, namely the SHA-256 digest of a
+            canonical representation of its input parameters, initial
+            geometry and of the BigDFT version.
+        """
+        return job_digest(job, self.tolerance, self.code_version)
+
+    def _entry_dir(self, key):
+        r"""
+        Parameters
+        ----------
+        key : str
+            Key of an entry.
+
+        Returns
+        -------
+        str
+            Directory of the entry.
+        """
+        return os.path.join(self.directory, key[:2], key)
+
+    def __contains__(self, job):
+        return os.path.exists(self._entry_dir(self.key(job)))
+
+    def load(self, job):
+        r"""
+        Get the cached logfile of a job, if any. The logfile is copied
+        in the run directory of the job, and the returned Logfile refers
+        to that copy (if it has to read the logfile again).
+
+        Parameters
+        ----------
+        job : Job
+            BigDFT job.
+
+        Returns
+        -------
+        Logfile or None
+            Logfile of the job, `None` if it is not in the cache.
+        """
+        entry_dir = self._entry_dir(self.key(job))
+        try:
+            with open(os.path.join(entry_dir, self.PICKLE_NAME), "rb") as f:
+                logfile = pickle.load(f)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            # Missing entry, or entry being evicted
+            return None
+        logfile_path = os.path.join(job.run_dir, job.logfile_name)
+        try:
+            shutil.copyfile(os.path.join(entry_dir, self.LOGFILE_NAME), logfile_path)
+            # Mark the entry as recently used
+            os.utime(entry_dir, None)
+        except (IOError, OSError):
+            return None
+        _relocate(logfile, logfile_path)
+        return logfile
+
+    def store(self, job):
+        r"""
+        Store the logfile of a job that was run.
+
+        Parameters
+        ----------
+        job : Job
+            BigDFT job (already run).
+        """
+        logfile_path = os.path.join(job.run_dir, job.logfile_name)
+        if not os.path.exists(logfile_path):
+            return
+        entry_dir = self._entry_dir(self.key(job))
+        if os.path.exists(entry_dir):
+            os.utime(entry_dir, None)
+            return
+        # Write the entry in a temporary directory before moving it to
+        # its final location, so that entries are never partially
+        # written (even if other processes share the cache)
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=self.directory)
+        try:
+            shutil.copyfile(logfile_path, os.path.join(tmp_dir, self.LOGFILE_NAME))
+            with open(os.path.join(tmp_dir, self.PICKLE_NAME), "wb") as f:
+                pickle.dump(job.logfile, f, protocol=pickle.HIGHEST_PROTOCOL)
+            if not os.path.exists(os.path.dirname(entry_dir)):
+                os.makedirs(os.path.dirname(entry_dir))
+            os.rename(tmp_dir, entry_dir)
+        except (IOError, OSError):
+            # Another process stored the same entry in the meantime
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.evict()
+
+    def entries(self):
+        r"""
+        Returns
+        -------
+        list
+            Directory, last time of use and size (in bytes) of each
+            entry of the cache, from the least to the most recently
+            used.
+        """
+        entries = []
+        for prefix in os.listdir(self.directory):
+            prefix_dir = os.path.join(self.directory, prefix)
+            if prefix.startswith(".") or not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                entry_dir = os.path.join(prefix_dir, key)
+                try:
+                    last_used = os.stat(entry_dir).st_mtime
+                    size = sum(
+                        os.path.getsize(os.path.join(entry_dir, filename))
+                        for filename in os.listdir(entry_dir)
+                    )
+                except OSError:
+                    continue
+                entries.append((entry_dir, last_used, size))
+        return sorted(entries, key=lambda entry: entry[1])
+
+    def evict(self):
+        r"""
+        Remove the least recently used entries until the cache does not
+        exceed its maximal size and number of entries.
+        """
+        if self.max_size is None and self.max_entries is None:
+            return
+        entries = self.entries()
+        total_size = sum(entry[2] for entry in entries)
+        n_entries = len(entries)
+        for entry_dir, _, size in entries:
+            too_big = self.max_size is not None and total_size > self.max_size
+            too_many = self.max_entries is not None and n_entries > self.max_entries
+            if not (too_big or too_many):
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+            n_entries -= 1
+
+    def clear(self):
+        r"""
+        Remove all the entries of the cache.
+        """
+        for entry_dir, _, _ in self.entries():
+            shutil.rmtree(entry_dir, ignore_errors=True)
+
+
+def job_digest(job, tolerance=1e-6, code_version=None):
+    r"""
+    Parameters
+    ----------
+    job : Job
+        BigDFT job.
+    tolerance : float
+        Precision (in the units of the posinp) to which the atomic
+        positions are rounded.
+    code_version : str or None
+        Identifier of the version of BigDFT used.
+
+    Returns
+    -------
+    str
+        SHA-256 digest of a canonical representation of the input
+        parameters of the job (the input wavefunctions aside), of its
+        initial geometry, of its pseudopotentials and of the BigDFT
+        version.
+
+    Notes
+    -----
+    The digest is exact up to the rounding of the positions: two
+    geometries differing by much less than the tolerance may still get
+    different digests if some of their positions are rounded to
+    different values. It also depends on the order of the atoms (unlike
+    the comparison of two posinps), since the results of the job, such
+    as the forces, are given in that order.
+    """
+    params = _copy_params(job.inputparams.params)
+    # The input wavefunctions do not change the result
+    params.get("dft", {}).pop("inputpsiid", None)
+    content = {
+        "inputparams": params,
+        "posinp": _canonical_posinp(job.posinp, tolerance),
+        "code_version": code_version,
+    }
+    if job.pseudos:
+        content["pseudos"] = _pseudopotentials_digests(job.posinp)
+    dump = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha256(dump.encode("utf-8")).hexdigest()
+
+
+def _canonical_posinp(posinp, tolerance):
+    r"""
+    Parameters
+    ----------
+    posinp : Posinp or None
+        Initial geometry of a job.
+    tolerance : float
+        Precision to which the atomic positions are rounded.
+
+    Returns
+    -------
+    dict or None
+        Representation of the posinp where the positions are rounded
+        to the tolerance. The order of the atoms is kept.
+    """
+    if posinp is None:
+        return None
+    positions = np.rint(posinp.positions / tolerance).astype(int)
+    return {
+        "units": posinp.units,
+        "boundary_conditions": posinp.boundary_conditions,
+        "cell": posinp.cell,
+        "types": [atom.type for atom in posinp],
+        "positions": positions.tolist(),
+    }
+
+
+def _relocate(logfile, filename):
+    r"""
+    Make a Logfile (and the Logfiles of its documents) refer to another
+    copy of the logfile it was read from.
+
+    Parameters
+    ----------
+    logfile : Logfile or MultipleLogfile
+        Logfile read from a file.
+    filename : str
+        Name of the copy of the logfile.
+    """
+    if isinstance(logfile, MultipleLogfile):
+        logs = logfile.logs
+        if isinstance(logs, _LogfileSequence):
+            logs._filename = filename
+            logs = [logs._first] + list(logs._cache.values())
+        for log in logs:
+            _relocate(log, filename)
+        return
+    if logfile._origin is not None:
+        logfile._origin = (filename, logfile._origin[1])
+    if logfile._source is not None:
+        logfile._source = (filename, logfile._source[1])
+
+
+def _copy_params(params):
+    r"""
+    Parameters
+    ----------
+    params : dict
+        Input parameters.
+
+    Returns
+    -------
+    dict
+        Copy of the input parameters, where the nested dictionaries are
+        copied as well.
+    """
+    return {
+        key: _copy_params(value) if isinstance(value, dict) else value
+        for key, value in params.items()
+    }
+
+
+def _executable_identity(path):
+    r"""
+    Parameters
+    ----------
+    path : str
+        Path to an executable (or its name, if it is in the PATH).
+
+    Returns
+    -------
+    str
+        Identity of the executable, made of its real path, its size and
+        its last modification time (or its path only if it is not
+        found).
+    """
+    if not os.path.isabs(path):
+        for directory in os.environ.get("PATH", "").split(os.pathsep):
+            candidate = os.path.join(directory, path)
+            if os.path.isfile(candidate):
+                path = candidate
+                break
+    path = os.path.realpath(path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return path
+    return "{}:{}:{}".format(path, stat.st_size, int(stat.st_mtime))
+
+
+def _pseudopotentials_digests(posinp):
+    r"""
+    Parameters
+    ----------
+    posinp : Posinp
+        Initial geometry of a job using the pseudopotentials stored in
+        $PSEUDODIR.
+
+    Returns
+    -------
+    dict
+        SHA-256 digest of the pseudopotential file of each atom type.
+    """
+    digests = {}
+    for element in sorted(set(atom.type for atom in posinp)):
+        filename = os.environ.get("PSEUDODIR", "") + "psppar." + element
+        try:
+            with open(filename, "rb") as f:
+                digests[element] = hashlib.sha256(f.read()).hexdigest()
+        except (IOError, OSError):
+            digests[element] = None
+    return digests
@@ -0,0 +1,255 @@
+r"""
+The :func:`propagate_data_dir` function gives the data directory of a
+reference calculation (mainly, its wavefunctions) to another
+calculation, so that it restarts from the reference results. This is
+done for each job of a :class:`~mybigdft.workflows.phonons.Phonons` or
+:class:`~mybigdft.workflows.poltensor.PolTensor` workflow, hence the
+need to avoid full copies of the wavefunctions. The files can be
+propagated with one of the following strategies:
+
+* :data:`REFLINK`: the files are cloned (copy-on-write copies sharing
+  their data blocks with the reference files, using the ``FICLONE``
+  ioctl) where the filesystem supports it, copied otherwise;
+* :data:`HARDLINK`: the files are hard links to the reference files;
+* :data:`SYMLINK`: the files are symbolic links to the reference files;
+* :data:`COPY`: the files are copied.
+
+The files are copied whenever the requested strategy is not possible
+(for instance, a hard link to a file on another filesystem).
+
+.. Warning::
+
+    With the :data:`HARDLINK` and :data:`SYMLINK` strategies, a file
+    that is modified in place in the new data directory is also
+    modified in the reference data directory. They must only be used
+    if the new calculation does not rewrite the reference files.
+
+The data directory is updated in place: the files that are already up
+to date are kept, the others are replaced atomically, and the files that
+are not in the reference data directory are removed.
+"""
+
+from __future__ import absolute_import
+import os
+import stat
+import errno
+import shutil
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+__all__ = ["propagate_data_dir", "COPY", "REFLINK", "HARDLINK", "SYMLINK"]
+
+
+#: Strategy copying the files
+COPY = "copy"
+#: Strategy cloning the files (copy-on-write) if possible
+REFLINK = "reflink"
+#: Strategy creating hard links to the files
+HARDLINK = "hardlink"
+#: Strategy creating symbolic links to the files
+SYMLINK = "symlink"
+#: Available propagation strategies
+STRATEGIES = (COPY, REFLINK, HARDLINK, SYMLINK)
+#: Code of the ioctl cloning a file on Linux
+FICLONE = 0x40049409
+
+
+def propagate_data_dir(source, destination, strategy=REFLINK):
+    r"""
+    Make a directory hold the same files as another one.
+
+    Parameters
+    ----------
+    source : str
+        Reference data directory.
+    destination : str
+        Data directory to update (created if needed).
+    strategy : str
+        Propagation strategy of the files (see :data:`STRATEGIES`).
+
+    Returns
+    -------
+    str
+        Strategy actually used (:data:`COPY` if some files had to be
+        copied instead).
+
+    Raises
+    ------
+    ValueError
+        If the strategy is unknown.
+
+
+    >>> import tempfile
+    >>> source, destination = tempfile.mkdtemp(), tempfile.mkdtemp()
+    >>> with open(os.path.join(source, "wavefunction.bin"), "w") as f:
+    ...     _ = f.write("psi")
+    >>> propagate_data_dir(source, destination, HARDLINK)
+    'hardlink'
+    >>> os.listdir(destination)
+    ['wavefunction.bin']
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(
+            "Unknown strategy '{}' (use one of {}).".format(strategy, STRATEGIES)
+        )
+    source = os.path.abspath(source)
+    used = strategy
+    for dirpath, dirnames, filenames in os.walk(source):
+        target_dir = os.path.join(destination, os.path.relpath(dirpath, source))
+        _make_directory(target_dir)
+        for filename in filenames:
+            src = os.path.join(dirpath, filename)
+            dst = os.path.join(target_dir, filename)
+            if not _is_up_to_date(src, dst, strategy):
+                if not _propagate_file(src, dst, strategy):
+                    used = COPY
+        # Remove what is not in the reference data directory anymore
+        for name in set(os.listdir(target_dir)) - set(dirnames + filenames):
+            _remove(os.path.join(target_dir, name))
+    return used
+
+
+def _make_directory(path):
+    r"""
+    Create a directory, replacing any file with the same name.
+
+    Parameters
+    ----------
+    path : str
+        Path of the directory.
+    """
+    if os.path.islink(path) or (os.path.exists(path) and not os.path.isdir(path)):
+        os.remove(path)
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+
+def _remove(path):
+    r"""
+    Remove a file, a link or a directory.
+
+    Parameters
+    ----------
+    path : str
+        Path to remove.
+    """
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+
+
+def _is_up_to_date(src, dst, strategy):
+    r"""
+    Parameters
+    ----------
+    src : str
+        Reference file.
+    dst : str
+        Propagated file.
+    strategy : str
+        Propagation strategy.
+
+    Returns
+    -------
+    bool
+        `True` if the propagated file does not need to be updated.
+    """
+    try:
+        src_stat = os.stat(src)
+        dst_stat = os.lstat(dst)
+    except OSError:
+        return False
+    if strategy == SYMLINK:
+        return stat.S_ISLNK(dst_stat.st_mode) and os.readlink(dst) == src
+    if not stat.S_ISREG(dst_stat.st_mode):
+        return False
+    same_file = (src_stat.st_dev, src_stat.st_ino) == (
+        dst_stat.st_dev,
+        dst_stat.st_ino,
+    )
+    if strategy == HARDLINK:
+        return same_file
+    # A copy must be independent from the reference file
+    return (
+        not same_file
+        and dst_stat.st_size == src_stat.st_size
+        and dst_stat.st_mtime_ns == src_stat.st_mtime_ns
+    )
+
+
+def _propagate_file(src, dst, strategy):
+    r"""
+    Replace a file by a new version of the reference file. The new
+    version is written in a temporary file first, so that the file is
+    never missing nor partially written.
+
+    Parameters
+    ----------
+    src : str
+        Reference file.
+    dst : str
+        Propagated file.
+    strategy : str
+        Propagation strategy.
+
+    Returns
+    -------
+    bool
+        `True` if the strategy was used, `False` if the file had to be
+        copied instead.
+    """
+    tmp = "{}.{}.tmp".format(dst, os.getpid())
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    try:
+        if strategy == HARDLINK:
+            os.link(src, tmp)
+        elif strategy == SYMLINK:
+            os.symlink(src, tmp)
+        elif strategy == REFLINK:
+            _reflink(src, tmp)
+        else:
+            shutil.copy2(src, tmp)
+        used = True
+    except OSError:
+        if os.path.lexists(tmp):
+            os.remove(tmp)
+        shutil.copy2(src, tmp)
+        used = strategy == COPY
+    if os.path.isdir(dst) and not os.path.islink(dst):
+        shutil.rmtree(dst)
+    os.replace(tmp, dst)
+    return used
+
+
+def _reflink(src, dst):
+    r"""
+    Clone a file.
+
+    Parameters
+    ----------
+    src : str
+        File to clone.
+    dst : str
+        Clone of the file.
+
+    Raises
+    ------
+    OSError
+        If the filesystem cannot clone the file.
+    """
+    if fcntl is None:  # pragma: no cover
+        raise OSError(errno.EOPNOTSUPP, "Cloning files is not supported")
+    with open(src, "rb") as fsrc:
+        try:
+            with open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except (IOError, OSError):
+            os.remove(dst)
+            raise
+    shutil.copystat(src, dst)
@@ -0,0 +1,374 @@
+r"""
+The executors defined here decide how the jobs of a workflow are run:
+
+* :class:`SerialExecutor` runs them one after the other (this is the
+  default behaviour of the workflows),
+* :class:`ParallelExecutor` runs several of them at once in a pool of
+  worker processes (or threads), making sure that the total number of cores used by
+  the running jobs (that is, the sum of :math:`n_{mpi} n_{omp}` over
+  these jobs) does not exceed a given budget.
+
+Any object with a ``run(jobs, **kwargs)`` method running all the given
+jobs can be used as an executor, the keyword arguments being those of
+:meth:`~mybigdft.job.Job.run`. Executors used to run workflows with
+:meth:`~mybigdft.workflows.workflow.AbstractWorkflow.run_async` must
+also define a ``run_async(jobs, **kwargs)`` coroutine.
+"""
+
+from __future__ import print_function, absolute_import
+import os
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+
+__all__ = ["SerialExecutor", "ParallelExecutor"]
+
+
+class SerialExecutor(object):
+    r"""
+    Run the jobs sequentially, in the order they are given.
+    """
+
+    def run(self, jobs, **kwargs):
+        r"""
+        Run all the jobs one after the other.
+
+        Parameters
+        ----------
+        jobs : list
+            Jobs to be run.
+        kwargs
+            Arguments passed to the :meth:`~mybigdft.job.Job.run`
+            method of each job.
+        """
+        for job in jobs:
+            with job as j:
+                j.run(**kwargs)
+
+    async def run_async(self, jobs, **kwargs):
+        r"""
+        Coroutine running all the jobs one after the other.
+
+        Parameters
+        ----------
+        jobs : list
+            Jobs to be run.
+        kwargs
+            Arguments passed to the :meth:`~mybigdft.job.Job.run_async`
+            method of each job.
+        """
+        for job in jobs:
+            await job.run_async(**kwargs)
+
+
+class ParallelExecutor(object):
+    r"""
+    Run the jobs concurrently in a pool of worker processes or threads.
+
+    Each job uses :math:`n_{mpi} n_{omp}` cores, so that the number of
+    jobs running at the same time is the largest one fitting in the
+    budget of cores of the executor.
+
+    The jobs can also be run concurrently by an :mod:`asyncio` event
+    loop (see :meth:`run_async`). The budget of cores is then shared by
+    all the coroutines using the executor.
+
+    Jobs with a :attr:`~mybigdft.job.Job.progress_callback` or a
+    :attr:`~mybigdft.job.Job.watchdog` are always run in threads, so
+    that these functions are called in the current process (and do not
+    have to be sent to worker processes).
+
+    >>> executor = ParallelExecutor(max_cores=64)
+    >>> executor.n_workers(nmpi=2, nomp=4)
+    8
+    >>> executor.n_workers(nmpi=1, nomp=128)
+    Traceback (most recent call last):
+    ...
+    ValueError: A job requires 128 cores, but only 64 are available.
+    """
+
+    def __init__(self, max_cores=None, use_threads=False):
+        r"""
+        Parameters
+        ----------
+        max_cores : int or None
+            Total number of cores the running jobs may use (default to
+            the number of cores of the machine).
+        use_threads : bool
+            If `True`, the jobs are run in threads of the current
+            process instead of worker processes. The jobs being mostly
+            waiting for their BigDFT process to finish, this avoids the
+            cost of sending them to other processes. Jobs with a
+            progress callback or a watchdog are run in threads anyway.
+        """
+        if max_cores is None:
+            max_cores = os.cpu_count()
+        self.max_cores = max_cores
+        self.use_threads = use_threads
+        self._cores_in_use = 0
+        self._cores_released = None
+
+    @property
+    def max_cores(self):
+        r"""
+        Returns
+        -------
+        int
+            Total number of cores the running jobs may use.
+        """
+        return self._max_cores
+
+    @max_cores.setter
+    def max_cores(self, max_cores):
+        max_cores = int(max_cores)
+        if max_cores < 1:
+            raise ValueError("The executor needs at least one core.")
+        self._max_cores = max_cores
+
+    @property
+    def use_threads(self):
+        r"""
+        Returns
+        -------
+        bool
+            If `True`, the jobs are run in threads instead of worker
+            processes.
+        """
+        return self._use_threads
+
+    @use_threads.setter
+    def use_threads(self, use_threads):
+        self._use_threads = bool(use_threads)
+
+    def n_workers(self, nmpi=1, nomp=1):
+        r"""
+        Parameters
+        ----------
+        nmpi : int
+            Number of MPI tasks of each job.
+        nomp : int
+            Number of OpenMP tasks of each job.
+
+        Returns
+        -------
+        int
+            Number of jobs that can run at the same time.
+
+        Raises
+        ------
+        ValueError
+            If a single job requires more cores than available.
+        """
+        return self.max_cores // self._n_cores(nmpi, nomp)
+
+    def _n_cores(self, nmpi, nomp):
+        r"""
+        Parameters
+        ----------
+        nmpi : int
+            Number of MPI tasks of each job.
+        nomp : int
+            Number of OpenMP tasks of each job.
+
+        Returns
+        -------
+        int
+            Number of cores used by each job.
+
+        Raises
+        ------
+        ValueError
+            If a single job requires more cores than available.
+        """
+        n_cores = max(int(nmpi), 1) * max(int(nomp), 1)
+        if n_cores > self.max_cores:
+            raise ValueError(
+                "A job requires {} cores, but only {} are available.".format(
+                    n_cores, self.max_cores
+                )
+            )
+        return n_cores
+
+    def run(self, jobs, nmpi=1, nomp=1, **kwargs):
+        r"""
+        Run all the jobs concurrently.
+
+        When using worker processes, the job instances given as
+        arguments are updated with the state of their finished
+        counterpart (logfile, input parameters, completion status...).
+        The first error raised by a job is raised again once the running
+        jobs are finished, the jobs not yet started being cancelled.
+
+        Parameters
+        ----------
+        jobs : list
+            Jobs to be run.
+        nmpi : int
+            Number of MPI tasks of each job.
+        nomp : int
+            Number of OpenMP tasks of each job.
+        kwargs
+            Other arguments passed to the :meth:`~mybigdft.job.Job.run`
+            method of each job.
+        """
+        if not jobs:
+            return
+        kwargs.update(nmpi=nmpi, nomp=nomp)
+        n_workers = min(self.n_workers(nmpi=nmpi, nomp=nomp), len(jobs))
+        error = None
+        if self._must_use_threads(jobs):
+            pool_class = ThreadPoolExecutor
+        else:
+            pool_class = ProcessPoolExecutor
+        with pool_class(max_workers=n_workers) as pool:
+            futures = {pool.submit(_run_job, job, kwargs): job for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    finished_job = future.result()
+                except Exception as e:
+                    if error is None:
+                        error = e
+                        for other in futures:
+                            other.cancel()
+                else:
+                    job = futures[future]
+                    if finished_job is not job:
+                        _update_job(job, finished_job)
+        if error is not None:
+            raise error
+
+    def _must_use_threads(self, jobs):
+        r"""
+        Parameters
+        ----------
+        jobs : list
+            Jobs to be run.
+
+        Returns
+        -------
+        bool
+            `True` if the jobs must be run in threads, because it was
+            requested or because some jobs call functions while they
+            run (progress callback or watchdog).
+        """
+        return self.use_threads or any(
+            getattr(job, "progress_callback", None) is not None
+            or getattr(job, "watchdog", None) is not None
+            for job in jobs
+        )
+
+    async def run_async(self, jobs, nmpi=1, nomp=1, **kwargs):
+        r"""
+        Coroutine running all the jobs concurrently, as long as the
+        budget of cores allows it.
+
+        If a job fails (or if this coroutine is cancelled), the other
+        jobs are cancelled, which stops their calculation.
+
+        Parameters
+        ----------
+        jobs : list
+            Jobs to be run.
+        nmpi : int
+            Number of MPI tasks of each job.
+        nomp : int
+            Number of OpenMP tasks of each job.
+        kwargs
+            Other arguments passed to the
+            :meth:`~mybigdft.job.Job.run_async` method of each job.
+        """
+        n_cores = self._n_cores(nmpi, nomp)
+        kwargs.update(nmpi=nmpi, nomp=nomp)
+        tasks = [
+            asyncio.ensure_future(self._run_job_async(job, n_cores, kwargs))
+            for job in jobs
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _run_job_async(self, job, n_cores, kwargs):
+        r"""
+        Coroutine running a job once enough cores are available.
+
+        Parameters
+        ----------
+        job : Job
+            Job to be run.
+        n_cores : int
+            Number of cores used by the job.
+        kwargs : dict
+            Arguments passed to the :meth:`~mybigdft.job.Job.run_async`
+            method.
+        """
+        cores_released = self._get_cores_released()
+        async with cores_released:
+            await cores_released.wait_for(
+                lambda: self._cores_in_use + n_cores <= self.max_cores
+            )
+            self._cores_in_use += n_cores
+        try:
+            await job.run_async(**kwargs)
+        finally:
+            async with cores_released:
+                self._cores_in_use -= n_cores
+                cores_released.notify_all()
+
+    def _get_cores_released(self):
+        r"""
+        Returns
+        -------
+        asyncio.Condition
+            Condition notified when some cores are released, bound to
+            the running event loop.
+        """
+        loop = asyncio.get_event_loop()
+        if self._cores_released is None or self._cores_released[0] is not loop:
+            self._cores_released = (loop, asyncio.Condition())
+            self._cores_in_use = 0
+        return self._cores_released[1]
+
+
+def _update_job(job, finished_job):
+    r"""
+    Update a job with the state of its finished counterpart, sent back
+    by a worker process. The input parameters of the job are kept if
+    they did not change, so that their frozen base stays shared with the
+    other jobs (see :meth:`~mybigdft.iofiles.inputparams.InputParams.derive`).
+
+    Parameters
+    ----------
+    job : Job
+        Job that was sent to a worker process.
+    finished_job : Job
+        Copy of the job after it was run.
+    """
+    state = dict(finished_job.__dict__)
+    inputparams = job.__dict__.get("_inputparams")
+    if inputparams is not None and state.get("_inputparams") == inputparams:
+        del state["_inputparams"]
+    job.__dict__.update(state)
+
+
+def _run_job(job, kwargs):
+    r"""
+    Run a job (this is the task sent to the workers).
+
+    Parameters
+    ----------
+    job : Job
+        Job to be run.
+    kwargs : dict
+        Arguments passed to the :meth:`~mybigdft.job.Job.run` method.
+
+    Returns
+    -------
+    Job
+        The job after it was run.
+    """
+    job.run(**kwargs)
+    return job
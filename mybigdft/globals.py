@@ -5,11 +5,24 @@ Define some global parameters such as:
 input parameters that can be used in input files for brevity) initalized
 from a BigDFT source file,
 - the path to the bigdft and the bigdft-tool executables.
+
+The input parameters definitions are only read when first used, and
+they are cached in a binary file (see the MYBIGDFT_CACHE_DIR environment
+variable) so that they are not parsed again by each new process.
 """
 import os
+import pickle
+import hashlib
 import warnings
+from functools import lru_cache
+from collections import MutableMapping
 import yaml
 
+try:
+    from yaml import CFullLoader as FullLoader
+except ImportError:  # pragma: no cover
+    from yaml import FullLoader
+
 
 __all__ = [
     "INPUT_PARAMETERS_DEFINITIONS",
@@ -32,26 +45,204 @@ __all__ = [
 ]
 
 
-# Read the definition of the input parameters from the BigDFT sources
-try:
-    # Path to the BigDFT sources
-    BIGDFT_SOURCES = os.environ["BIGDFT_SOURCES"]
-    # Read the input parameters and available profiles
-    input_parameters_file = os.path.join(
-        BIGDFT_SOURCES, "src/input_variables_definition.yaml"
+#: Version of the format of the cached input parameters definitions
+DEFINITIONS_CACHE_VERSION = 1
+
+
+class _LazyDict(MutableMapping):
+    r"""
+    Dictionary whose content is only built the first time it is used.
+    """
+
+    def __init__(self, builder):
+        r"""
+        Parameters
+        ----------
+        builder : function
+            Function returning the content of the dictionary.
+        """
+        self._builder = builder
+        self._data = None
+
+    @property
+    def data(self):
+        r"""
+        Returns
+        -------
+        dict
+            Content of the dictionary (built if needed).
+        """
+        if self._data is None:
+            self._data = self._builder()
+        return self._data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        del self.data[key]
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return repr(self.data)
+
+
+def _cache_dir():
+    r"""
+    Returns
+    -------
+    str
+        Directory where the parsed input parameters definitions are
+        cached (given by the MYBIGDFT_CACHE_DIR environment variable,
+        default to ~/.cache/mybigdft).
+    """
+    if "MYBIGDFT_CACHE_DIR" in os.environ:
+        return os.environ["MYBIGDFT_CACHE_DIR"]
+    cache_home = os.environ.get(
+        "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
     )
-    with open(input_parameters_file, "r") as f:
-        source = yaml.full_load_all(f)
-        INPUT_PARAMETERS_DEFINITIONS = next(source)
-        PROFILES = next(source)
-    # Add the CheSS input parameters
+    return os.path.join(cache_home, "mybigdft")
+
+
+@lru_cache(maxsize=None)
+def _read_definitions():
+    r"""
+    Read the definition of the input parameters and the profiles from
+    the BigDFT (and CheSS) sources.
+
+    The parsed definitions are cached in a binary file, which is used
+    instead of the sources as long as they did not change.
+
+    Returns
+    -------
+    tuple
+        Definitions of the BigDFT input parameters, profiles and
+        definitions of the CheSS input parameters.
+    """
+    if "BIGDFT_SOURCES" not in os.environ:  # pragma: no cover
+        return {}, {}, {}
     input_parameters_file = os.path.join(
-        BIGDFT_SOURCES, "../chess/src/chess_input_variables_definition.yaml"
+        os.environ["BIGDFT_SOURCES"], "src/input_variables_definition.yaml"
+    )
+    chess_parameters_file = os.path.join(
+        os.environ["BIGDFT_SOURCES"],
+        "../chess/src/chess_input_variables_definition.yaml",
     )
+    # The cache file depends on the version of the sources
+    identity = [DEFINITIONS_CACHE_VERSION, yaml.__version__]
+    for filename in [input_parameters_file, chess_parameters_file]:
+        filename = os.path.realpath(filename)
+        stat = os.stat(filename)
+        identity.append((filename, stat.st_size, stat.st_mtime_ns))
+    digest = hashlib.sha256(repr(identity).encode("utf-8")).hexdigest()
+    cache_file = os.path.join(_cache_dir(), "definitions-{}.pickle".format(digest))
+    try:
+        with open(cache_file, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        # Missing, partially written or otherwise unusable cache file
+        pass
+    # Read the input parameters and available profiles
     with open(input_parameters_file, "r") as f:
-        chess_parameters_definition = yaml.full_load(f)
-    INPUT_PARAMETERS_DEFINITIONS["chess"] = chess_parameters_definition
-    # Path to the BigDFT and BigDFT-tool executables
+        source = yaml.load_all(f, Loader=FullLoader)
+        definitions = next(source)
+        profiles = next(source)
+    # Read the CheSS input parameters
+    with open(chess_parameters_file, "r") as f:
+        chess_definitions = yaml.load(f, Loader=FullLoader)
+    # Write the cache file (atomically, as other processes might read
+    # it at the same time)
+    result = (definitions, profiles, chess_definitions)
+    try:
+        if not os.path.exists(os.path.dirname(cache_file)):
+            os.makedirs(os.path.dirname(cache_file))
+        tmp_file = "{}.{}.tmp".format(cache_file, os.getpid())
+        with open(tmp_file, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except (IOError, OSError):  # pragma: no cover
+        pass
+    return result
+
+
+def _build_definitions():
+    r"""
+    Returns
+    -------
+    dict
+        Definition of the input parameters (including the CheSS ones).
+    """
+    definitions, _, chess_definitions = _read_definitions()
+    if chess_definitions:
+        definitions["chess"] = chess_definitions
+    # Add the posinp key (as it is not in input_parameters_definition.yaml)
+    definitions["posinp"] = {
+        "units": {"default": "atomic"},
+        "cell": {"default": None},
+        "positions": {"default": None},
+        "properties": {"default": {"format": "xyz", "source": "posinp.xyz"}},
+    }
+    return definitions
+
+
+def _build_profiles():
+    r"""
+    Returns
+    -------
+    dict
+        Profiles defined in the BigDFT sources.
+    """
+    return _read_definitions()[1]
+
+
+def _build_default_parameters():
+    r"""
+    Returns
+    -------
+    dict
+        Default value of all the input parameters.
+    """
+    default_parameters = {
+        key: {
+            subkey: subval.get("default")
+            for subkey, subval in val.items()
+            if subkey != "DESCRIPTION"
+        }
+        for key, val in INPUT_PARAMETERS_DEFINITIONS.items()
+        if key != "chess"
+    }
+    default_parameters["chess"] = {
+        key: {
+            subkey: subval.get("default")
+            for subkey, subval in val.items()
+            if subkey != "DESCRIPTION"
+        }
+        for key, val in INPUT_PARAMETERS_DEFINITIONS.get("chess", {}).items()
+    }
+    return default_parameters
+
+
+# The definition of the input parameters, the profiles (defining a set
+# of basic input parameters) and the default value of each input
+# parameter are read from the BigDFT sources when first used
+INPUT_PARAMETERS_DEFINITIONS = _LazyDict(_build_definitions)
+PROFILES = _LazyDict(_build_profiles)
+DEFAULT_PARAMETERS = _LazyDict(_build_default_parameters)
+
+# Path to the BigDFT and BigDFT-tool executables
+try:
+    BIGDFT_SOURCES = os.environ["BIGDFT_SOURCES"]
     BIGDFT_ROOT = os.environ["BIGDFT_ROOT"]
     BIGDFT_PATH = os.path.join(BIGDFT_ROOT, "bigdft")
     BIGDFT_TOOL_PATH = os.path.join(BIGDFT_ROOT, "bigdft-tool")
@@ -64,40 +255,9 @@ except KeyError:  # pragma: no cover
         "as the bigdft executable.",
         RuntimeWarning,
     )
-    INPUT_PARAMETERS_DEFINITIONS = {}
-    chess_parameters_definition = {}
-    PROFILES = {}
     BIGDFT_PATH = "bigdft"
     BIGDFT_TOOL_PATH = "bigdft-tool"
 
-# Add the posinp key (as it is not in input_parameters_definition.yaml)
-INPUT_PARAMETERS_DEFINITIONS["posinp"] = {
-    "units": {"default": "atomic"},
-    "cell": {"default": None},
-    "positions": {"default": None},
-    "properties": {"default": {"format": "xyz", "source": "posinp.xyz"}},
-}
-
-# Define a dictionary containing the default value of all the input
-# parameters
-DEFAULT_PARAMETERS = {
-    key: {
-        subkey: subval.get("default")
-        for subkey, subval in val.items()
-        if subkey != "DESCRIPTION"
-    }
-    for key, val in INPUT_PARAMETERS_DEFINITIONS.items()
-    if key != "chess"
-}
-DEFAULT_PARAMETERS["chess"] = {
-    key: {
-        subkey: subval.get("default")
-        for subkey, subval in val.items()
-        if subkey != "DESCRIPTION"
-    }
-    for key, val in chess_parameters_definition.items()
-}
-
 # Mass of the different types of atoms in atomic mass units
 # TODO: Add more types of atoms
 #       (found in $SRC_DIR/bigdft/src/orbitals/eleconf-inc.f90)
@@ -0,0 +1,469 @@
+r"""
+The :class:`ResultsIndex` class indexes the results of all the BigDFT
+calculations of a project in a local SQLite database, so that they can
+be analyzed across runs and workflows without reading any logfile again.
+
+The run trees are scanned for logfiles (see :meth:`ResultsIndex.scan`),
+which are read in a pool of worker processes. The main results of each
+logfile (energy, forces, dipole, walltime, number of atoms...) are
+stored along with digests of its input parameters and of its initial
+geometry, allowing to find the same calculation in other runs. A new
+scan only reads the logfiles that were added or modified since the
+previous one.
+
+>>> import tempfile
+>>> root = tempfile.mkdtemp()
+>>> run_dir = os.path.join(root, "atom0000", "x+")
+>>> os.makedirs(run_dir)
+>>> os.symlink(os.path.abspath("tests/log.yaml"), os.path.join(run_dir, "log-N2.yaml"))
+>>> index = ResultsIndex(":memory:")
+>>> index.scan([root], workers=1)
+1
+>>> [record.energy for record in index.query(status="complete")]
+[-19.884659235401838]
+>>> index.scan([root], workers=1)  # Nothing changed
+0
+"""
+
+from __future__ import absolute_import
+import os
+import json
+import fnmatch
+import hashlib
+import sqlite3
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import yaml
+from mybigdft.cache import _copy_params, _canonical_posinp
+from mybigdft.iofiles import Logfile
+from mybigdft.iofiles.logfiles import MultipleLogfile
+from mybigdft.iofiles.status import logfile_status, COMPLETE, ACCEPTABLE
+
+
+__all__ = ["ResultsIndex", "IndexRecord"]
+
+
+#: Version of the database schema (databases of other versions are
+#: indexed again from scratch)
+INDEX_VERSION = 1
+#: Attributes of the logfiles read when indexing them
+INDEX_FIELDS = ["energy", "forces", "forcemax", "dipole", "walltime", "n_at"]
+#: Name of the logfiles looked for by default
+LOGFILE_PATTERN = "log*.yaml"
+
+_COLUMNS = [
+    ("path", "TEXT PRIMARY KEY"),
+    ("run_dir", "TEXT NOT NULL"),
+    ("size", "INTEGER NOT NULL"),
+    ("mtime_ns", "INTEGER NOT NULL"),
+    ("status", "TEXT NOT NULL"),
+    ("n_documents", "INTEGER"),
+    ("energy", "REAL"),
+    ("forces", "BLOB"),
+    ("forcemax", "REAL"),
+    ("dipole", "TEXT"),
+    ("walltime", "REAL"),
+    ("n_at", "INTEGER"),
+    ("boundary_conditions", "TEXT"),
+    ("input_digest", "TEXT"),
+    ("posinp_digest", "TEXT"),
+]
+COLUMNS = [name for name, _ in _COLUMNS]
+_INDEXED_COLUMNS = ["run_dir", "status", "energy", "input_digest", "posinp_digest"]
+
+
+class IndexRecord(namedtuple("IndexRecord", COLUMNS)):
+    r"""
+    Results of a logfile, as stored in the index. The results are
+    named after the attributes of a
+    :class:`~mybigdft.iofiles.logfiles.Logfile` (for a geometry
+    optimization, they are the ones of its last step); the whole
+    logfile is read only when using :meth:`load`.
+    """
+
+    __slots__ = ()
+
+    def load(self):
+        r"""
+        Returns
+        -------
+        Logfile or GeoptLogfile or MultipleLogfile
+            Logfile read from the disk.
+        """
+        return Logfile.from_file(self.path)
+
+
+class ResultsIndex(object):
+    r"""
+    Index of the results of the logfiles found in some run trees,
+    stored in a SQLite database.
+    """
+
+    def __init__(self, database, tolerance=1e-6):
+        r"""
+        Parameters
+        ----------
+        database : str
+            Name of the SQLite database file (created if needed), or
+            ``":memory:"`` for an index kept in memory.
+        tolerance : float
+            Tolerance on the atomic positions (in the units of the
+            posinp) below which two geometries have the same digest.
+        """
+        self._database = database
+        self.tolerance = tolerance
+        self._connection = sqlite3.connect(database)
+        self._create_tables()
+
+    @property
+    def database(self):
+        r"""
+        Returns
+        -------
+        str
+            Name of the SQLite database file.
+        """
+        return self._database
+
+    def _create_tables(self):
+        r"""
+        Create the table of the logfiles and its indexes, dropping the
+        ones of another version of the schema.
+        """
+        with self._connection as connection:
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != INDEX_VERSION:
+                connection.execute("DROP TABLE IF EXISTS logfiles")
+                connection.execute("PRAGMA user_version = {}".format(INDEX_VERSION))
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS logfiles ({})".format(
+                    ", ".join(" ".join(column) for column in _COLUMNS)
+                )
+            )
+            for column in _INDEXED_COLUMNS:
+                connection.execute(
+                    "CREATE INDEX IF NOT EXISTS logfiles_{0} "
+                    "ON logfiles ({0})".format(column)
+                )
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM logfiles").fetchone()[0]
+
+    def close(self):
+        r"""
+        Close the database.
+        """
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def scan(self, directories, pattern=LOGFILE_PATTERN, workers=None):
+        r"""
+        Index the logfiles found in some run trees. Only the logfiles
+        that are not indexed yet or whose size or modification time
+        changed are read, in a pool of worker processes. The logfiles
+        that were removed from these trees are removed from the index.
+
+        Parameters
+        ----------
+        directories : list
+            Root directories of the run trees.
+        pattern : str
+            Shell-style pattern of the names of the logfiles.
+        workers : int or None
+            Number of worker processes (default to the number of cores
+            of the machine). The logfiles are read in the current
+            process if there is only one worker.
+
+        Returns
+        -------
+        int
+            Number of logfiles that were read.
+        """
+        found = {}
+        known = {}
+        for directory in directories:
+            directory = os.path.abspath(directory)
+            found.update(_find_logfiles(directory, pattern))
+            for path, size, mtime_ns in self._execute(
+                "SELECT path, size, mtime_ns FROM logfiles",
+                directory=directory,
+            ):
+                known[path] = (size, mtime_ns)
+        changed = [
+            path for path, signature in found.items() if known.get(path) != signature
+        ]
+        removed = [(path,) for path in known if path not in found]
+        rows = self._read(sorted(changed), workers)
+        with self._connection as connection:
+            connection.executemany("DELETE FROM logfiles WHERE path = ?", removed)
+            connection.executemany(
+                "INSERT OR REPLACE INTO logfiles VALUES ({})".format(
+                    ", ".join("?" * len(COLUMNS))
+                ),
+                [row for row in rows if row is not None],
+            )
+        return len(changed)
+
+    def _read(self, filenames, workers):
+        r"""
+        Parameters
+        ----------
+        filenames : list
+            Names of the logfiles to read.
+        workers : int or None
+            Number of worker processes.
+
+        Returns
+        -------
+        list
+            Row of the index of each logfile (`None` if it disappeared
+            in the meantime).
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(filenames))
+        tolerances = [self.tolerance] * len(filenames)
+        if workers <= 1:
+            return list(map(_index_logfile, filenames, tolerances))
+        chunksize = max(1, len(filenames) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(
+                pool.map(_index_logfile, filenames, tolerances, chunksize=chunksize)
+            )
+
+    def query(self, directory=None, order_by=None, **criteria):
+        r"""
+        Parameters
+        ----------
+        directory : str or None
+            Only the logfiles found in this directory (or in its
+            subdirectories) are returned.
+        order_by : str or None
+            Column by which the records are sorted (in descending order
+            if preceded by ``-``).
+        criteria
+            Values of the columns of the records to return (for
+            instance, ``status="complete"`` or ``posinp_digest=...``).
+
+        Returns
+        -------
+        list
+            Records of the logfiles matching the criteria.
+
+        Raises
+        ------
+        ValueError
+            If a column is unknown.
+        """
+        if directory is not None:
+            directory = os.path.abspath(directory)
+        rows = self._execute(
+            "SELECT {} FROM logfiles".format(", ".join(COLUMNS)),
+            directory=directory,
+            order_by=order_by,
+            **criteria
+        )
+        return [_make_record(row) for row in rows]
+
+    def _execute(self, select, directory=None, order_by=None, **criteria):
+        r"""
+        Parameters
+        ----------
+        select : str
+            SELECT statement on the table of the logfiles.
+        directory : str or None
+            Absolute path to the directory of the selected logfiles.
+        order_by : str or None
+            Column by which the rows are sorted (in descending order if
+            preceded by ``-``).
+        criteria
+            Values of the columns of the selected rows.
+
+        Returns
+        -------
+        list
+            Selected rows.
+
+        Raises
+        ------
+        ValueError
+            If a column is unknown.
+        """
+        unknown = [
+            column
+            for column in list(criteria) + [(order_by or "path").lstrip("-")]
+            if column not in COLUMNS
+        ]
+        if unknown:
+            raise ValueError("Unknown columns: {}".format(unknown))
+        conditions, values = [], []
+        if directory is not None:
+            prefix = os.path.join(directory, "")
+            conditions.append("substr(path, 1, ?) = ?")
+            values += [len(prefix), prefix]
+        for column, value in sorted(criteria.items()):
+            if value is None:
+                conditions.append("{} IS NULL".format(column))
+            else:
+                conditions.append("{} = ?".format(column))
+                values.append(value)
+        if conditions:
+            select += " WHERE " + " AND ".join(conditions)
+        if order_by is not None:
+            descending = order_by.startswith("-")
+            select += " ORDER BY {}{}".format(
+                order_by.lstrip("-"), " DESC" if descending else ""
+            )
+        return self._connection.execute(select, values).fetchall()
+
+
+def _find_logfiles(directory, pattern):
+    r"""
+    Parameters
+    ----------
+    directory : str
+        Root directory of a run tree.
+    pattern : str
+        Shell-style pattern of the names of the logfiles.
+
+    Returns
+    -------
+    dict
+        Size and modification time of each logfile of the run tree.
+    """
+    logfiles = {}
+    for dirpath, _, filenames in os.walk(directory):
+        for filename in fnmatch.filter(filenames, pattern):
+            path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            logfiles[path] = (stat.st_size, stat.st_mtime_ns)
+    return logfiles
+
+
+def _index_logfile(filename, tolerance):
+    r"""
+    Read the results of a logfile (this is the task sent to the workers
+    by :meth:`ResultsIndex.scan`).
+
+    Parameters
+    ----------
+    filename : str
+        Name of the logfile.
+    tolerance : float
+        Tolerance on the atomic positions of the posinp digest.
+
+    Returns
+    -------
+    tuple or None
+        Row of the index of the logfile, `None` if it does not exist.
+    """
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    row = dict.fromkeys(COLUMNS)
+    row.update(
+        path=filename,
+        run_dir=os.path.dirname(filename),
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        status=logfile_status(filename),
+    )
+    if row["status"] in (COMPLETE, ACCEPTABLE):
+        try:
+            logfile = Logfile.from_file(filename, fields=INDEX_FIELDS)
+        except (IOError, OSError, ValueError, yaml.YAMLError):
+            logfile = None
+        if logfile is not None:
+            row.update(_results(logfile, tolerance))
+    return tuple(row[column] for column in COLUMNS)
+
+
+def _results(logfile, tolerance):
+    r"""
+    Parameters
+    ----------
+    logfile : Logfile or GeoptLogfile or MultipleLogfile
+        Logfile to index.
+    tolerance : float
+        Tolerance on the atomic positions of the posinp digest.
+
+    Returns
+    -------
+    dict
+        Values of the columns giving the results of the logfile (those
+        of its last document) and the digests of its input parameters
+        and initial geometry (those of its first document).
+    """
+    if isinstance(logfile, MultipleLogfile):
+        first, last, n_documents = logfile[0], logfile[-1], len(logfile)
+    else:
+        first, last, n_documents = logfile, logfile, 1
+    params = _copy_params(first.inputparams.params)
+    # The input wavefunctions do not change the result
+    params.get("dft", {}).pop("inputpsiid", None)
+    forces = last.forces
+    if forces is not None:
+        forces = np.asarray(forces, dtype=float).tobytes()
+    dipole = last.dipole
+    if dipole is not None:
+        dipole = json.dumps(dipole)
+    return {
+        "n_documents": n_documents,
+        "energy": last.energy,
+        "forces": forces,
+        "forcemax": last.forcemax,
+        "dipole": dipole,
+        "walltime": last.walltime,
+        "n_at": last.n_at,
+        "boundary_conditions": last.boundary_conditions,
+        "input_digest": _digest(params),
+        "posinp_digest": _digest(_canonical_posinp(first.posinp, tolerance)),
+    }
+
+
+def _digest(content):
+    r"""
+    Parameters
+    ----------
+    content
+        Object that can be serialized in JSON.
+
+    Returns
+    -------
+    str
+        SHA-256 digest of its canonical JSON serialization.
+    """
+    dump = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha256(dump.encode("utf-8")).hexdigest()
+
+
+def _make_record(row):
+    r"""
+    Parameters
+    ----------
+    row : tuple
+        Row of the index.
+
+    Returns
+    -------
+    IndexRecord
+        Record of the row, where the forces and the dipole are given
+        back as in a Logfile.
+    """
+    record = IndexRecord(*row)
+    forces, dipole = record.forces, record.dipole
+    if forces is not None:
+        forces = np.frombuffer(forces, dtype=float).reshape((-1, 3))
+    if dipole is not None:
+        dipole = json.loads(dipole)
+    return record._replace(forces=forces, dipole=dipole)
@@ -0,0 +1,245 @@
+r"""
+The functions defined here turn the numerical data of a BigDFT logfile,
+stored as nested lists of dictionaries by the YAML parser, into numpy
+arrays built in a single pass:
+
+* the atomic forces, as an array of shape :math:`(n_{at}, 3)`,
+* the orbital energies and occupations, as arrays of shape
+  :math:`(n_{kpt}, n_{orb})`,
+* the k-points and their weights, as arrays of shape :math:`(n_{kpt}, 3)`
+  and :math:`(n_{kpt},)`,
+* the multipole coefficients of each atom (or support function), one
+  array per kind of coefficient.
+
+>>> forces = [{'N': [0.0, 0.0, 0.1]}, {'N': [0.0, 0.0, -0.1]}]
+>>> forces_array(forces).shape
+(2, 3)
+"""
+
+from __future__ import absolute_import
+from itertools import chain
+import numpy as np
+
+
+__all__ = ["forces_array", "eigenvalues_arrays", "kpoints_arrays", "multipoles_arrays"]
+
+
+def forces_array(forces):
+    r"""
+    Parameters
+    ----------
+    forces : list or numpy.ndarray or None
+        Atomic forces, as found in a logfile (a list of dictionaries
+        whose only value is the force on an atom).
+
+    Returns
+    -------
+    numpy.ndarray or None
+        Atomic forces, as an array of shape :math:`(n_{at}, 3)`.
+
+    >>> forces_array([{'H': [0.0, 0.1, 0.2]}, {'H': [0.0, -0.1, -0.2]}])[1]
+    array([ 0. , -0.1, -0.2])
+    """
+    if forces is None:
+        return None
+    if isinstance(forces, np.ndarray):
+        return np.array(forces, dtype=float).reshape((-1, 3))
+    values = chain.from_iterable(_first_value(force) for force in forces)
+    n_at = len(forces)
+    return np.fromiter(values, dtype=float, count=3 * n_at).reshape((n_at, 3))
+
+
+def eigenvalues_arrays(evals):
+    r"""
+    Parameters
+    ----------
+    evals : list or None
+        Orbital energies and occupations, as found in a logfile (a list
+        of dictionaries with the energy ``e`` of an orbital, its
+        occupation ``f`` and, if there are many k-points, the index
+        ``k`` of its k-point, starting at 1).
+
+    Returns
+    -------
+    tuple
+        Orbital energies and occupations, as two arrays of shape
+        :math:`(n_{kpt}, n_{orb})` (or `None` if there are no orbital
+        energies). The missing values are set to NaN.
+
+    >>> evals = [{'e': -0.9, 'f': 2.0}, {'e': -0.5, 'f': 2.0}]
+    >>> energies, occupations = eigenvalues_arrays(evals)
+    >>> print(energies)
+    [[-0.9 -0.5]]
+    >>> print(occupations)
+    [[2. 2.]]
+    """
+    if not evals:
+        return None, None
+    orbitals = [orbital for orbital in _flatten(evals) if isinstance(orbital, dict)]
+    if not orbitals:
+        return None, None
+    kpts = [int(orbital.get("k", 1)) - 1 for orbital in orbitals]
+    n_kpt = max(kpts) + 1
+    # Index of each orbital among those of its k-point
+    counts = np.zeros(n_kpt, dtype=int)
+    indices = np.empty(len(orbitals), dtype=int)
+    for i, kpt in enumerate(kpts):
+        indices[i] = counts[kpt]
+        counts[kpt] += 1
+    energies = np.full((n_kpt, counts.max()), np.nan)
+    occupations = np.full((n_kpt, counts.max()), np.nan)
+    energies[kpts, indices] = [_get(orbital, "e") for orbital in orbitals]
+    occupations[kpts, indices] = [_get(orbital, "f") for orbital in orbitals]
+    return energies, occupations
+
+
+def kpoints_arrays(kpts):
+    r"""
+    Parameters
+    ----------
+    kpts : list or None
+        K-points, as found in a logfile (a list of dictionaries with the
+        reduced coordinates ``Rc`` and the weight ``Wgt`` of a k-point).
+
+    Returns
+    -------
+    tuple
+        Reduced coordinates of the k-points, as an array of shape
+        :math:`(n_{kpt}, 3)`, and their weights, as an array of shape
+        :math:`(n_{kpt},)` (or `None` if there are no k-points).
+
+    >>> kpts = [{'Rc': [0.0, 0.0, 0.0], 'Wgt': 0.25},
+    ...         {'Rc': [0.0, 0.0, 0.5], 'Wgt': 0.75}]
+    >>> coordinates, weights = kpoints_arrays(kpts)
+    >>> print(coordinates[1], weights)
+    [0.  0.  0.5] [0.25 0.75]
+    """
+    if not kpts:
+        return None, None
+    n_kpt = len(kpts)
+    coordinates = np.empty((n_kpt, 3))
+    weights = np.full(n_kpt, np.nan)
+    for i, kpt in enumerate(kpts):
+        if isinstance(kpt, dict):
+            coordinates[i] = kpt.get("Rc", np.nan)
+            weights[i] = _get(kpt, "Wgt")
+        else:
+            coordinates[i] = kpt
+    return coordinates, weights
+
+
+def multipoles_arrays(values):
+    r"""
+    Parameters
+    ----------
+    values : list or None
+        Multipole coefficients, as found in a logfile (a list of
+        dictionaries with the type ``sym`` of an atom, its position
+        ``r`` and its coefficients, such as ``q0``, ``q1`` or ``q2``).
+
+    Returns
+    -------
+    dict or None
+        Types of the atoms (as a list) and values of each other key (as
+        an array whose first dimension is the number of atoms). The
+        missing values are set to NaN.
+
+    >>> values = [{'sym': 'N', 'r': [0.0, 0.0, 0.0], 'q0': [-0.1]},
+    ...           {'sym': 'N', 'r': [0.0, 0.0, 2.0], 'q0': [0.1]}]
+    >>> multipoles = multipoles_arrays(values)
+    >>> multipoles['sym']
+    ['N', 'N']
+    >>> multipoles['r'].shape, multipoles['q0'].shape
+    ((2, 3), (2, 1))
+    """
+    if not values:
+        return None
+    values = [value for value in values if isinstance(value, dict)]
+    keys = []
+    for value in values:
+        keys += [key for key in value if key not in keys]
+    multipoles = {}
+    for key in keys:
+        column = [value.get(key) for value in values]
+        if key == "sym" or not all(_is_numeric(item) for item in column):
+            multipoles[key] = column
+            continue
+        lengths = [np.size(item) if item is not None else 0 for item in column]
+        array = np.full((len(column), max(lengths)), np.nan)
+        for i, (item, length) in enumerate(zip(column, lengths)):
+            array[i, :length] = np.ravel(item) if length else []
+        multipoles[key] = array
+    return multipoles
+
+
+def _first_value(mapping):
+    r"""
+    Parameters
+    ----------
+    mapping : dict
+        Dictionary with a single item.
+
+    Returns
+    -------
+    Python object
+        Value of this item.
+    """
+    for value in mapping.values():
+        return value
+
+
+def _flatten(items):
+    r"""
+    Parameters
+    ----------
+    items : list
+        Nested lists.
+
+    Yields
+    ------
+    Python object
+        Items of the nested lists that are not lists.
+    """
+    for item in items:
+        if isinstance(item, list):
+            for subitem in _flatten(item):
+                yield subitem
+        else:
+            yield item
+
+
+def _get(mapping, key):
+    r"""
+    Parameters
+    ----------
+    mapping : dict
+        Dictionary.
+    key : str
+        Key of a numerical value.
+
+    Returns
+    -------
+    float
+        Value of the key in the dictionary, NaN if it is missing.
+    """
+    value = mapping.get(key)
+    return np.nan if value is None else value
+
+
+def _is_numeric(item):
+    r"""
+    Parameters
+    ----------
+    item
+        Value of a multipole coefficient.
+
+    Returns
+    -------
+    bool
+        `True` if the item is a number, a list of numbers or `None`.
+    """
+    if item is None or isinstance(item, (int, float)):
+        return not isinstance(item, bool)
+    if isinstance(item, list):
+        return all(_is_numeric(value) and value is not None for value in item)
+    return False
@@ -31,6 +31,11 @@ class InputParams(MutableMapping):
     r"""
     Class allowing to initialize, read, write and interact with the
     input parameters of a BigDFT calculation.
+
+    Input parameters can also be derived from other ones (see
+    :meth:`derive`). They then only store their differences with a
+    frozen copy of the base input parameters, which is shared by all
+    the input parameters derived from the same base.
     """
 
     def __init__(self, params=None):
@@ -73,6 +78,7 @@ class InputParams(MutableMapping):
             self.posinp = Posinp.from_dict(params.pop("posinp"))
         else:
             self.posinp = None
+        self._snapshot = None
         self.params = clean(params)
 
     @classmethod
@@ -123,11 +129,131 @@ class InputParams(MutableMapping):
         dict
             Input parameters.
         """
+        if self._base is not None:
+            # Stop depending on the base input parameters
+            self._params = {key: self[key] for key in self}
+            self._base = None
+            self._deleted = set()
         return self._params
 
     @params.setter
     def params(self, params):
         self._params = params
+        self._base = None
+        self._deleted = set()
+
+    def derive(self, changes):
+        r"""
+        Create new input parameters by updating these ones.
+
+        The new input parameters do not copy these ones: they refer to
+        a frozen copy of them (made once, as long as these input
+        parameters are not modified) and only store the main keys that
+        were changed or accessed. Deriving many input parameters from
+        the same base therefore costs as much as their differences.
+
+        Parameters
+        ----------
+        changes : dict
+            Input parameters to update. The value of each main key
+            updates the current one (instead of replacing it).
+
+        Returns
+        -------
+        InputParams
+            New input parameters.
+
+
+        >>> base = InputParams({'dft': {'hgrids': 0.35}})
+        >>> base.derive({'dft': {'rmult': [6, 9]}})
+        {'dft': {'hgrids': 0.35, 'rmult': [6, 9]}}
+        >>> base
+        {'dft': {'hgrids': 0.35}}
+        """
+        new = self.__class__.__new__(self.__class__)
+        new._posinp = self.posinp
+        new._snapshot = None
+        if self._base is None:
+            new._base = self._frozen_params()
+            new._params = {}
+            new._deleted = set()
+        else:
+            new._base = self._base
+            new._params = _copy(self._params)
+            new._deleted = set(self._deleted)
+        for key, value in changes.items():
+            updated_value = new[key] if key in new else {}
+            if value is not None:
+                updated_value.update(value)
+            cleaned_params = clean({key: updated_value})
+            if cleaned_params == {}:
+                new._remove(key)
+            else:
+                new._params[key] = cleaned_params[key]
+                new._deleted.discard(key)
+        return new
+
+    def _frozen_params(self):
+        r"""
+        Returns
+        -------
+        dict
+            Copy of the input parameters, which must never be modified
+            (it is only made again if the input parameters changed).
+        """
+        if self._snapshot is None or self._snapshot != self._params:
+            self._snapshot = _copy(self._params)
+        return self._snapshot
+
+    def _merged(self):
+        r"""
+        Returns
+        -------
+        dict
+            Input parameters, without copying the base ones (the result
+            must not be modified).
+        """
+        if self._base is None:
+            return self._params
+        merged = {
+            key: self._params.get(key, value)
+            for key, value in self._base.items()
+            if key not in self._deleted
+        }
+        merged.update(self._params)
+        return merged
+
+    def _clean(self):
+        r"""
+        Clean the input parameters. Only the main keys that differ from
+        the base input parameters need to be cleaned, if any.
+        """
+        cleaned_params = clean(self._params)
+        if self._base is not None:
+            for key in self._params:
+                if key not in cleaned_params:
+                    self._remove(key)
+        self._params = cleaned_params
+
+    def _remove(self, key):
+        r"""
+        Remove a main key, if it exists.
+
+        Parameters
+        ----------
+        key : str
+            Main key of the input parameters.
+
+        Returns
+        -------
+        bool
+            `True` if the key existed.
+        """
+        existed = key in self
+        self._params.pop(key, None)
+        if self._base is not None and key in self._base:
+            self._deleted.add(key)
+        return existed
 
     @property
     def posinp(self):
@@ -149,7 +275,16 @@ class InputParams(MutableMapping):
     def __getitem__(self, key):
         r"""
         """
-        return self.params[key]
+        try:
+            return self._params[key]
+        except KeyError:
+            if self._base is None or key in self._deleted:
+                raise
+        # Copy the value of the base input parameters, as it might be
+        # modified
+        value = _copy(self._base[key])
+        self._params[key] = value
+        return value
 
     def __setitem__(self, key, value):
         r"""
@@ -176,26 +311,50 @@ class InputParams(MutableMapping):
             cleaned_params = clean(params)
             # Set the input parameters with cleaned parameters
             if cleaned_params == {}:
-                try:
-                    # Update with default params
-                    del self.params[key]
-                except KeyError:
+                # Update with default params
+                if not self._remove(key):
                     warnings.warn("Nothing to update.", UserWarning)
             else:
                 # Update with cleaned params
-                self.params[key] = cleaned_params[key]
+                self._params[key] = cleaned_params[key]
+                if self._base is not None:
+                    self._deleted.discard(key)
 
     def __delitem__(self, key):
-        del self.params[key]
+        if not self._remove(key):
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in self._params:
+            return True
+        return self._base is not None and key in self._base and key not in self._deleted
 
     def __iter__(self):
-        return iter(self.params)
+        return iter(self._merged())
 
     def __len__(self):
-        return len(self.params)
+        return len(self._merged())
+
+    def __eq__(self, other):
+        if isinstance(other, InputParams):
+            return self._merged() == other._merged()
+        return super(InputParams, self).__eq__(other)
+
+    def __ne__(self, other):
+        return not self == other
 
     def __repr__(self):
-        return repr(self.params)
+        return repr(self._merged())
+
+    def __deepcopy__(self, memo):
+        # The base input parameters are frozen, hence shared
+        new = self.__class__.__new__(self.__class__)
+        new._posinp = deepcopy(self.posinp, memo)
+        new._params = deepcopy(self._params, memo)
+        new._base = self._base
+        new._deleted = set(self._deleted)
+        new._snapshot = None
+        return new
 
     def write(self, filename):
         """
@@ -207,8 +366,10 @@ class InputParams(MutableMapping):
             Name of the input file.
         """
         with open(filename, "w") as stream:
-            self.params = clean(self.params)  # Make sure it is valid
-            yaml.dump(self.params, stream=stream, Dumper=Dumper)
+            params = clean(self._merged())  # Make sure it is valid
+            if self._base is None:
+                self._params = params
+            yaml.dump(params, stream=stream, Dumper=Dumper)
 
 
 def clean(params, keyword=None):
@@ -226,44 +387,42 @@ def clean(params, keyword=None):
     dict
         Input parameters whose values are not their default, after
         checking that all the keys in `params` correspond to actual
-        BigDFT parameters.
+        BigDFT parameters. Only the non-default values are copied.
     """
-    #    # Make sure to convert hgrids to a list beforehand
-    #    if "dft" in params and "hgrids" in params["dft"]:
-    #        hgrids = deepcopy(params["dft"]["hgrids"])
-    #        if not isinstance(hgrids, list):
-    #            params["dft"]["hgrids"] = [hgrids]*3
-    # Use a copy of params to update the input parameters while looping
-    # on params. This copy will be returned.
-    real_params = deepcopy(params)
-    # Use the correct reference for the input variables
-    default = DEFAULT_PARAMETERS
-    if keyword is not None:
-        default = default[keyword]
-    # Set real_params['output']['orbitals'] to 'None' when it is False
-    if (
-        "output" in real_params
-        and real_params["output"] is not None
-        and "orbitals" in real_params["output"]
-        and not real_params["output"]["orbitals"]
-    ):
-        real_params["output"]["orbitals"] = "None"
+    validator = _get_validator(keyword)
     # Check the validity of the given input parameters
-    check(real_params, keyword=keyword)
+    checked_params = {}
+    for key, value in params.items():
+        # Set params['output']['orbitals'] to 'None' when it is False
+        if (
+            key == "output"
+            and value is not None
+            and "orbitals" in value
+            and not value["orbitals"]
+        ):
+            checked_value = dict(value)
+            checked_value["orbitals"] = "None"
+        else:
+            checked_value = value
+        validator.check_key(key, checked_value)
+        checked_params[key] = checked_value
     # Return the cleaned input parameters
+    real_params = {}
     for key, value in params.items():
         # The key might be empty (e.g.: logfile with many documents)
         if value is None:
-            del real_params[key]
             continue
-        # Delete the child keys whose values are default
-        for child_key, child_value in value.items():
-            default_value = default[key][child_key]
-            if child_value == default_value:
-                del real_params[key][child_key]
-        # Delete the key if it is empty
-        if real_params[key] == {}:
-            del real_params[key]
+        # Keep only the child keys whose values are not default
+        default = validator.defaults[key]
+        checked_value = checked_params[key]
+        real_value = {
+            child_key: _copy(checked_value[child_key])
+            for child_key, child_value in value.items()
+            if child_value != default[child_key]
+        }
+        # Keep the key only if it is not empty
+        if real_value != {}:
+            real_params[key] = real_value
     # Clean the chess input variables as well
     if "chess" in real_params:
         chess_params = clean(real_params["chess"], keyword="chess")
@@ -297,21 +456,243 @@ def check(params, keyword=None):
         possible values, the value of the master key does not allow for
         the key to be defined)
     """
-    parameters = INPUT_PARAMETERS_DEFINITIONS
-    if keyword is not None:
-        parameters = parameters[keyword]
+    validator = _get_validator(keyword)
     for key, value in params.items():
-        # Check the key
-        if key not in parameters:
+        validator.check_key(key, value)
+
+
+# Validators of the input parameters (and of the CheSS ones), compiled
+# from their definitions when first needed
+_VALIDATORS = {}
+
+
+def _get_validator(keyword=None):
+    r"""
+    Parameters
+    ----------
+    keyword : NoneType or str
+        Main key of the input parameters to be checked (used to check
+        CheSS input parameters).
+
+    Returns
+    -------
+    _Validator
+        Validator of the input parameters.
+    """
+    try:
+        return _VALIDATORS[keyword]
+    except KeyError:
+        definitions = INPUT_PARAMETERS_DEFINITIONS
+        defaults = DEFAULT_PARAMETERS
+        if keyword is not None:
+            definitions = definitions[keyword]
+            defaults = defaults[keyword]
+        validator = _Validator(definitions, defaults)
+        _VALIDATORS[keyword] = validator
+        return validator
+
+
+class _Validator(object):
+    r"""
+    Check input parameters against their definitions.
+
+    The definitions are compiled once into :class:`_Rule` instances,
+    and the values of the main keys that were already found to be
+    valid are memorized, so that checking the same input parameters
+    again is almost free.
+    """
+
+    #: Maximal number of valid values memorized
+    MAX_MEMO_SIZE = 4096
+
+    def __init__(self, definitions, defaults):
+        r"""
+        Parameters
+        ----------
+        definitions : dict
+            Definitions of the input parameters.
+        defaults : dict
+            Default values of the input parameters.
+        """
+        self.definitions = definitions
+        self.defaults = defaults
+        self.rules = {
+            key: {
+                subkey: _Rule(subkey_definition)
+                for subkey, subkey_definition in key_definition.items()
+                if isinstance(subkey_definition, dict)
+            }
+            for key, key_definition in definitions.items()
+        }
+        self._valid = set()
+
+    def check_key(self, key, value):
+        r"""
+        Check that a main key and its value are valid.
+
+        Parameters
+        ----------
+        key : str
+            Main key of the input parameters.
+        value : dict or None
+            Value of the main key.
+
+        Raises
+        ------
+        KeyError
+            If a key or a sub-key is not a BigDFT parameter.
+        ValueError
+            If a value is invalid.
+        """
+        if key not in self.rules:
             raise KeyError("Unknown key '{}'".format(key))
-        if value is not None:
-            for subkey, subvalue in value.items():
-                # Check the subkey
-                key_definition = parameters[key]
-                if subkey not in key_definition:
-                    raise KeyError("Unknown key '{}' in '{}'".format(subkey, key))
-                # Check the subvalue:
+        if value is None:
+            return
+        memo_key = (key, _freeze(value))
+        try:
+            if memo_key in self._valid:
+                return
+        except TypeError:  # Some items are not hashable
+            memo_key = None
+        key_definition = self.definitions[key]
+        rules = self.rules[key]
+        for subkey, subvalue in value.items():
+            # Check the subkey
+            if subkey not in key_definition:
+                raise KeyError("Unknown key '{}' in '{}'".format(subkey, key))
+            # Check the subvalue:
+            if subkey in rules:
+                rules[subkey].check(subkey, subvalue, key, value)
+            else:
                 check_value(subkey, subvalue, key, value, key_definition)
+        if memo_key is not None:
+            if len(self._valid) >= self.MAX_MEMO_SIZE:
+                self._valid.clear()
+            self._valid.add(memo_key)
+
+
+class _Rule(object):
+    r"""
+    Compiled definition of an input parameter, performing the same
+    checks as :func:`check_value`.
+    """
+
+    __slots__ = ("default", "condition", "possible_values", "valid_range", "bounds")
+
+    def __init__(self, definition):
+        r"""
+        Parameters
+        ----------
+        definition : dict
+            Definition of the input parameter.
+        """
+        self.default = definition.get("default")
+        condition = definition.get("CONDITION")
+        if condition is not None:
+            condition = (condition["MASTER_KEY"], condition["WHEN"])
+        self.condition = condition
+        self.possible_values = definition.get("EXCLUSIVE")
+        self.valid_range = definition.get("RANGE")
+        if self.valid_range:
+            self.bounds = (float(self.valid_range[0]), float(self.valid_range[1]))
+        else:
+            self.bounds = None
+
+    def check(self, subkey, subvalue, key, value):
+        r"""
+        Check the value of an input parameter is valid.
+
+        Parameters
+        ----------
+        subkey : str
+            Name of the BigDFT input parameter under consideration.
+        subvalue
+            Value of the BigDFT input parameter under consideration.
+        key : str
+            Base key of the BigDFT input parameter under consideration.
+        value : dict
+            Value of the base key.
+
+        Raises
+        ------
+        ValueError
+            If a value is invalid (not in the correct range, not in the
+            possible values, the value of the master key does not allow
+            for the key to be defined)
+        """
+        # If default value, no need to worry anymore
+        if subvalue == self.default:
+            return
+        # If the subkey is conditioned by the value of another subkey,
+        # check that this other subkey has a valid value
+        if self.condition is not None:
+            master_key, possible_values = self.condition
+            if value[master_key] not in possible_values:
+                raise ValueError(
+                    "Condition '{} in {}' not met for '{}' in '{}' (got {})".format(
+                        master_key, possible_values, subkey, key, subvalue
+                    )
+                )
+        # It must be in the exclusive values
+        possible_values = self.possible_values
+        if possible_values and subvalue not in possible_values:
+            raise ValueError(
+                "'{}' in '{}' not in the possible values (got {}, not in {})".format(
+                    subkey, subkey, subvalue, possible_values
+                )
+            )
+        # It must be in the correct range
+        if self.bounds is not None:
+            low, high = self.bounds
+            if isinstance(subvalue, list):
+                value_in_range = all([low <= float(val) <= high for val in subvalue])
+            else:
+                value_in_range = low <= float(subvalue) <= high
+            if not value_in_range:
+                raise ValueError(
+                    "'{}' in '{}' not in valid range (got {}, not in {})".format(
+                        subkey, key, subvalue, self.valid_range
+                    )
+                )
+
+
+def _freeze(value):
+    r"""
+    Parameters
+    ----------
+    value
+        Value of input parameters.
+
+    Returns
+    -------
+    Hashable version of the value (as long as its items are hashable).
+    The types of the items are part of it, so that ``1``, ``1.0`` and
+    ``True`` are not confused.
+    """
+    if isinstance(value, dict):
+        return frozenset([(key, _freeze(val)) for key, val in value.items()])
+    elif isinstance(value, list):
+        return (list, *[_freeze(val) for val in value])
+    return (value.__class__, value)
+
+
+def _copy(value):
+    r"""
+    Parameters
+    ----------
+    value
+        Value of input parameters.
+
+    Returns
+    -------
+    Copy of the value where only the lists and dictionaries are copied
+    (the other values being immutable).
+    """
+    if isinstance(value, dict):
+        return {key: _copy(val) for key, val in value.items()}
+    elif isinstance(value, list):
+        return [_copy(val) for val in value]
+    return value
 
 
 def check_value(subkey, subvalue, key, value, key_definition):
@@ -16,19 +16,36 @@ method of the ``Logfile`` class, returning a
 """
 
 from __future__ import print_function
+import os
 import warnings
-from collections import Sequence, Mapping
+from collections import Sequence, Mapping, OrderedDict
 from copy import deepcopy
+from concurrent.futures import ProcessPoolExecutor
 import yaml
 
 try:
     from yaml import CLoader as Loader, CDumper as Dumper
 except ImportError:  # pragma: no cover
     from yaml import Loader, Dumper
-import numpy as np
 from mybigdft.globals import INPUT_PARAMETERS_DEFINITIONS
 from .inputparams import InputParams, clean
 from .posinp import Posinp
+from .selectiveloader import selective_load_all, prune, UnresolvedAliasError
+from .sidecar import read_sidecar, write_sidecar
+from .status import logfile_status, AVOIDABLE_WARNING, INCOMPLETE
+from .columns import (
+    forces_array,
+    eigenvalues_arrays,
+    kpoints_arrays,
+    multipoles_arrays,
+)
+from .trajectory import (
+    document_offsets,
+    read_document,
+    Trajectory,
+    ENERGY_PATHS,
+    FORCEMAX_PATHS,
+)
 
 
 __all__ = ["Logfile", "MultipleLogfile", "GeoptLogfile"]
@@ -46,6 +63,16 @@ LAST_SUBSPACE_OPTIMIZATION = LAST_GROUND_STATE_OPTIMIZATION + [
 
 def _get_value_from_last_optimization(key):
     r"""
+    Parameters
+    ----------
+    key : str
+        Key of a value given at the end of a wavefunction optimization.
+
+    Returns
+    -------
+    list
+        Paths to the value in the last ground state optimization and in
+        its last subspace optimization.
     """
     l_1 = deepcopy(LAST_GROUND_STATE_OPTIMIZATION)
     l_1.append(key)
@@ -72,14 +99,7 @@ ATTRIBUTES = {
         PATHS: [["Atomic System Properties", "Types of atoms"]],
         DOC: "List of the atomic types present in the posinp",
     },
-    "energy": {
-        PATHS: [
-            ["Last Iteration", "FKS"],
-            ["Last Iteration", "EKS"],
-            ["Energy (Hartree)"],
-        ],
-        DOC: "Energy (Hartree)",
-    },
+    "energy": {PATHS: ENERGY_PATHS, DOC: "Energy (Hartree)"},
     "astruct": {PATHS: [["Atomic structure"]], DOC: "Atomic structure"},
     "evals": {
         PATHS: [["Complete list of energy eigenvalues"]]
@@ -104,13 +124,7 @@ ATTRIBUTES = {
         PATHS: [["geopt", "forcemax"]],
         DOC: "Convergence criterion on forces",
     },
-    "forcemax": {
-        PATHS: [
-            ["Geometry", "FORCES norm(Ha/Bohr)", "maxval"],
-            ["Clean forces norm (Ha/Bohr)", "maxval"],
-        ],
-        DOC: "Maximum value of forces",
-    },
+    "forcemax": {PATHS: FORCEMAX_PATHS, DOC: "Maximum value of forces"},
     "pressure": {PATHS: [["Pressure", "GPa"]], DOC: "Pressure (GPa)"},
     "dipole": {
         PATHS: [["Electric Dipole Moment (AU)", "P vector"]],
@@ -139,6 +153,57 @@ ATTRIBUTES = {
     "WARNINGS": {PATHS: [["WARNINGS"]], DOC: "Warnings raised during the BigDFT run"},
 }
 
+# Attributes always read, since they are required to initialize a Logfile
+REQUIRED_ATTRIBUTES = ["energy", "forces", "walltime", "WARNINGS", "atom_types"]
+# Other parts of the logfile always read: the input parameters, the
+# pseudopotentials and the atomic structure
+REQUIRED_PATHS = [
+    ["dft"],
+    ["geopt"],
+    ["psppar.*", "Pseudopotential XC"],
+    ["Atomic structure"],
+]
+# Maximal number of documents of a logfile kept in memory when they are
+# read one at a time
+MAX_CACHED_DOCUMENTS = 8
+
+
+def _get_paths(fields):
+    r"""
+    Parameters
+    ----------
+    fields : list
+        Names of the attributes (see ATTRIBUTES) to read from a logfile.
+
+    Returns
+    -------
+    list
+        Paths of the parts of the logfile to read in order to
+        initialize a Logfile with these attributes.
+
+    Raises
+    ------
+    ValueError
+        If a field is not an attribute of a Logfile.
+
+
+    >>> _get_paths(["dipole"])[0]
+    ['Electric Dipole Moment (AU)', 'P vector']
+    >>> _get_paths(["dipol"])
+    Traceback (most recent call last):
+    ...
+    ValueError: Unknown logfile fields: ['dipol']
+    """
+    unknown = [field for field in fields if field not in ATTRIBUTES]
+    if unknown:
+        raise ValueError("Unknown logfile fields: {}".format(unknown))
+    paths = []
+    for field in list(fields) + REQUIRED_ATTRIBUTES:
+        paths += ATTRIBUTES[field][PATHS]
+    paths += [[key] for key in INPUT_PARAMETERS_DEFINITIONS]
+    paths += REQUIRED_PATHS
+    return paths
+
 
 class Logfile(Mapping):
     r"""
@@ -146,16 +211,27 @@ class Logfile(Mapping):
     output file of a BigDFT calculation.
     """
 
-    def __init__(self, log=None):
+    def __init__(self, log=None, check_psppar=True):
         r"""
         Parameters
         ----------
         log : dict
             Output of the BigDFT code as a yaml dictionary.
+        check_psppar : bool
+            If `True`, warn if the XC of the pseudopotentials is
+            different from the XC of the input parameters.
         """
         if log is None:
             log = {}
         self._log = log
+        # Logfile and index of the document the log was read from
+        self._origin = None
+        # Same, in case only some parts of the document were read
+        self._source = None
+        # If True, the whole document is never kept in memory
+        self._slim = False
+        # Numerical data of the log as numpy arrays, built when needed
+        self._columns = {}
         self._set_builtin_attributes()
         self._clean_attributes()
         # It might happen that a geopt calculation has a step whose log
@@ -165,20 +241,16 @@ class Logfile(Mapping):
         # log is not the initial one, we look for the "geopt" key, which
         # is not repreated in the subsequent logs. It's a workaround
         # which might prove edgy in the future.
-        if "geopt" not in self.log:
-            avoidable_warning = (
-                "The norm of the residue is too large, need "
-                "to recalculate input wavefunctions"
-            )
+        if "geopt" not in log:
             warnings = log.get("WARNINGS")
             acceptable_though_incomplete = (
-                warnings is not None and avoidable_warning in warnings
+                warnings is not None and AVOIDABLE_WARNING in warnings
             )
         else:
             acceptable_though_incomplete = False
         # Check if the logfile is incomplete
         if (
-            self.log != {}
+            log != {}
             and not acceptable_though_incomplete
             and (self.energy is None and self.forces is None and self.walltime is None)
         ):
@@ -187,7 +259,7 @@ class Logfile(Mapping):
         params = clean(params)
         self._inputparams = InputParams(params=params)
         self._posinp = self.inputparams.posinp
-        self._check_warnings()
+        self._check_warnings(check_psppar)
 
     def _set_builtin_attributes(self):
         r"""
@@ -210,7 +282,7 @@ class Logfile(Mapping):
             for path in description[PATHS]:
                 # Loop over the different levels of the logfile to
                 # retrieve the value
-                value = self  # Always start from the bare logfile
+                value = self._log  # Always start from the bare logfile
                 for key in path:
                     try:
                         value = value.get(key)  # value can be a dict
@@ -248,16 +320,15 @@ class Logfile(Mapping):
         if self.boundary_conditions is not None:
             self._boundary_conditions = self._boundary_conditions.lower()
         # Make the forces as a numpy array of shape (n_at, 3)
-        if self.forces is not None:
-            new_forces = np.array([])
-            for force in self.forces:
-                new_forces = np.append(new_forces, list(force.values())[0])
-            n_at = len(self.forces)
-            new_forces = new_forces.reshape((n_at, 3))
-            self._forces = new_forces
+        self._forces = forces_array(self._forces)
 
-    def _check_warnings(self):
+    def _check_warnings(self, check_psppar=True):
         r"""
+        Parameters
+        ----------
+        check_psppar : bool
+            If `True`, the XC of the pseudopotentials is also checked.
+
         Warns
         -----
         UserWarning
@@ -278,7 +349,8 @@ class Logfile(Mapping):
                     print("MyBigDFT: weird error message found")
                     message = str(message)
                 warnings.warn(message, UserWarning)
-        self._check_psppar()
+        if check_psppar:
+            self._check_psppar()
 
     def _check_psppar(self):
         r"""
@@ -291,8 +363,8 @@ class Logfile(Mapping):
         if self.atom_types is not None:
             for atom_type in self.atom_types:
                 psp = "psppar.{}".format(atom_type)
-                psp_ixc = self[psp]["Pseudopotential XC"]
-                inp_ixc = self["dft"]["ixc"]
+                psp_ixc = self._log[psp]["Pseudopotential XC"]
+                inp_ixc = self._log["dft"]["ixc"]
                 if psp_ixc != inp_ixc:
                     warnings.warn(
                         "The XC of pseudo potentials ({}) is different from "
@@ -303,14 +375,49 @@ class Logfile(Mapping):
                     )
 
     @classmethod
-    def from_file(cls, filename):
+    def from_file(
+        cls, filename, fields=None, sidecar=False, slim=False, check_psppar=True
+    ):
         r"""
         Initialize the Logfile from a file on disk.
 
+        If the logfile contains many documents (for instance, one per
+        step of a geometry optimization), only their positions in the
+        logfile are found at first: each document is then read only when
+        it is used, a few of them being kept in memory.
+
+        If `sidecar` is `True`, the parts of a logfile with a single
+        document required to define all the attributes of a Logfile are
+        stored in a sidecar file (see :mod:`mybigdft.iofiles.sidecar`)
+        the first time it is read. The next time, these parts are read
+        from the sidecar, which is much faster, as long as the logfile
+        did not change. The other parts of the logfile are then only
+        read if the :attr:`log` attribute is used (or if the Logfile is
+        used as a dictionary). This is meant for the logfiles that are
+        read many times, in directories that can be written (such as the
+        logfiles read by a :class:`~mybigdft.job.Job`).
+
         Parameters
         ----------
         filename : str
             Name of the logfile.
+        fields : list or None
+            Names of the attributes to read. If given, only the parts of
+            the logfile required to get them are read (see
+            :meth:`from_stream`).
+        sidecar : bool
+            If `True`, the sidecar file of the logfile is used (and
+            written next to the logfile if needed).
+        slim : bool
+            If `True`, the whole logfile is never kept in memory (see
+            :attr:`slim`). This is meant for logfiles with a single
+            document, since the documents of the other logfiles are
+            already read one at a time.
+        check_psppar : bool
+            If `True`, warn if the XC of the pseudopotentials is
+            different from the XC of the input parameters (this might be
+            checked beforehand, see
+            :meth:`~mybigdft.pseudos.PseudopotentialStore.check_xc`).
 
         Returns
         -------
@@ -328,41 +435,276 @@ class Logfile(Mapping):
         >>> log.energy
         -19.884659235401838
         """
-        with open(filename, "r") as stream:
-            return cls.from_stream(stream)
+        paths = None
+        if fields is not None:
+            paths = _get_paths(fields)  # Check the fields
+        offsets = document_offsets(filename)
+        if len(offsets) > 1:
+            # Only the first document is read: the end of the logfile is
+            # checked so that an incomplete logfile is not missed
+            if logfile_status(filename) == INCOMPLETE:
+                raise ValueError("The logfile is incomplete!")
+            logs = _LogfileSequence(filename, offsets, paths, check_psppar)
+            return cls._from_logs(logs, Trajectory.from_file(filename, offsets))
+        if slim and fields is None:
+            # Only the parts of the logfile kept in memory are read
+            fields = list(ATTRIBUTES)
+            paths = _get_paths(fields)
+        if sidecar:
+            all_paths = _get_paths(list(ATTRIBUTES))
+            content_id = repr(all_paths)
+            docs = read_sidecar(filename, content_id)
+            partial = True
+            if docs is None:
+                # Read the logfile and write its sidecar
+                with open(filename, "r") as stream:
+                    if fields is None:
+                        docs = list(yaml.load_all(stream, Loader=Loader))
+                    else:
+                        docs = cls._selective_load_all(stream, all_paths)
+                pruned_docs = [prune(doc, all_paths) for doc in docs]
+                write_sidecar(filename, pruned_docs, content_id)
+                partial = fields is not None
+        else:
+            with open(filename, "r") as stream:
+                if fields is None:
+                    docs = list(yaml.load_all(stream, Loader=Loader))
+                else:
+                    docs = cls._selective_load_all(stream, paths)
+            partial = fields is not None
+        logfile = cls._from_docs(docs, filename, partial, check_psppar)
+        if slim:
+            logfile.slim = True
+        return logfile
+
+    @staticmethod
+    def status(filename):
+        r"""
+        Tell whether a logfile can be used without parsing it: only its
+        end is read, unless its calculation does not look over (see
+        :func:`~mybigdft.iofiles.status.logfile_status`). This is much
+        faster than catching the error raised by :meth:`from_file` when
+        a logfile is incomplete.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the logfile.
+
+        Returns
+        -------
+        str
+            ``"complete"`` if the calculation is over, ``"acceptable"``
+            if it stopped because of a harmless warning,
+            ``"incomplete"`` if it is not over (:meth:`from_file` then
+            raises a ValueError) and ``"missing"`` if there is no
+            logfile.
+
+        >>> Logfile.status("tests/log.yaml")
+        'complete'
+        >>> Logfile.status("tests/missing.yaml")
+        'missing'
+        """
+        return logfile_status(filename)
 
     @classmethod
-    def from_stream(cls, stream):
+    def load_many(cls, filenames, fields=None, workers=None, sidecar=False):
+        r"""
+        Read many logfiles in a pool of worker processes.
+
+        Only the parts of the logfiles required to get the requested
+        attributes are sent back by the workers (see :meth:`from_file`),
+        the other parts being read only if the :attr:`log` attribute of
+        a Logfile is used.
+
+        Parameters
+        ----------
+        filenames : list
+            Names of the logfiles.
+        fields : list or None
+            Names of the attributes to read (all of them if `None`).
+        workers : int or None
+            Number of worker processes (default to the number of cores
+            of the machine). The logfiles are read in the current
+            process if there is only one worker.
+        sidecar : bool
+            If `True`, the sidecar files of the logfiles are used (see
+            :meth:`from_file`).
+
+        Returns
+        -------
+        list
+            Logfile (or GeoptLogfile or MultipleLogfile) of each
+            filename, `None` if it could not be read (for instance,
+            because it is missing or incomplete).
+
+        Raises
+        ------
+        ValueError
+            If a field is not an attribute of a Logfile.
+
+
+        >>> logs = Logfile.load_many(["tests/log.yaml", "missing.yaml"])
+        >>> logs[0].energy
+        -19.884659235401838
+        >>> logs[1] is None
+        True
+        """
+        filenames = list(filenames)
+        if fields is None:
+            fields = list(ATTRIBUTES)
+        _get_paths(fields)  # Check the fields
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(filenames))
+        if workers <= 1:
+            return [_load_logfile(filename, fields, sidecar) for filename in filenames]
+        chunksize = max(1, len(filenames) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(
+                pool.map(
+                    _load_logfile,
+                    filenames,
+                    [fields] * len(filenames),
+                    [sidecar] * len(filenames),
+                    chunksize=chunksize,
+                )
+            )
+
+    @classmethod
+    def from_stream(cls, stream, fields=None):
         r"""
         Initialize the Logfile from a stream.
 
+        If `fields` is given, the other parts of the logfile (such as
+        the history of the SCF iterations) are skipped while reading the
+        stream, which is much faster and requires much less memory. Only
+        the input parameters, the warnings and the attributes required
+        to check that the logfile is complete are always read.
+
         Parameters
         ----------
         stream
             Logfile as a stream.
+        fields : list or None
+            Names of the attributes to read (all the logfile is read if
+            `None`).
 
         Returns
         -------
         Logfile or GeoptLogfile or MultipleLogfile
             Logfile initialized from a stream.
+
+        Raises
+        ------
+        ValueError
+            If a field is not an attribute of a Logfile.
+
+
+        >>> with open("tests/log.yaml") as stream:
+        ...     log = Logfile.from_stream(stream, fields=["dipole"])
+        >>> log.dipole
+        [-0.00051199, -0.00051199, -0.00055711]
+        >>> log.energy
+        -19.884659235401838
+        >>> log.evals is None
+        True
         """
         # The logfile might contain multiple documents
-        docs = yaml.load_all(stream, Loader=Loader)
-        logs = [cls(doc) for doc in docs]
+        if fields is None:
+            docs = yaml.load_all(stream, Loader=Loader)
+        else:
+            docs = cls._selective_load_all(stream, _get_paths(fields))
+        return cls._from_docs(docs)
+
+    @classmethod
+    def _from_docs(cls, docs, filename=None, partial=False, check_psppar=True):
+        r"""
+        Initialize the Logfile from the documents of a logfile.
+
+        Parameters
+        ----------
+        docs : list
+            Documents of the logfile (or some parts of them).
+        filename : str or None
+            Name of the logfile the documents were read from.
+        partial : bool
+            If `True`, only some parts of the documents were read. The
+            whole documents are then read from the logfile only when
+            needed.
+        check_psppar : bool
+            If `True`, the XC of the pseudopotentials is checked.
+
+        Returns
+        -------
+        Logfile or GeoptLogfile or MultipleLogfile
+            Logfile initialized from the documents.
+        """
+        logs = [cls(doc, check_psppar=check_psppar) for doc in docs]
+        if filename is not None:
+            for i, log in enumerate(logs):
+                log._origin = (filename, i)
+                if partial:
+                    log._source = log._origin
         if len(logs) == 1:
             # If only one document, return a Logfile instance
             return logs[0]
+        return cls._from_logs(logs)
+
+    @staticmethod
+    def _from_logs(logs, trajectory=None):
+        r"""
+        Parameters
+        ----------
+        logs : list or _LogfileSequence
+            Logfiles of the documents of a logfile.
+        trajectory : Trajectory or None
+            Trajectory read from the logfile, if it is a geometry
+            optimization.
+
+        Returns
+        -------
+        GeoptLogfile or MultipleLogfile
+            Logfile containing multiple documents.
+        """
+        if logs[0].inputparams["geopt"] is not None:
+            # If the logfile corresponds to a geopt calculation,
+            # return a GeoptLogfile instance
+            return GeoptLogfile(logs, trajectory=trajectory)
         else:
-            if logs[0].inputparams["geopt"] is not None:
-                # If the logfile corresponds to a geopt calculation,
-                # return a GeoptLogfile instance
-                return GeoptLogfile(logs)
-            else:
-                warnings.warn(
-                    "More than one document found in the logfile!", UserWarning
-                )
-                # In other cases, just return a MultipleLogfile instance
-                return MultipleLogfile(logs)
+            warnings.warn("More than one document found in the logfile!", UserWarning)
+            # In other cases, just return a MultipleLogfile instance
+            return MultipleLogfile(logs)
+
+    @staticmethod
+    def _selective_load_all(stream, paths):
+        r"""
+        Read the requested parts of all the documents of the stream.
+        The whole documents are read if a requested part refers to a
+        skipped part of the logfile (and the stream can be read again).
+
+        Parameters
+        ----------
+        stream
+            Logfile as a stream.
+        paths : list
+            Paths of the parts of the documents to read.
+
+        Returns
+        -------
+        list
+            Documents of the logfile.
+        """
+        try:
+            start = stream.tell()
+        except AttributeError:
+            start = None  # The stream is a string
+        try:
+            return list(selective_load_all(stream, paths))
+        except UnresolvedAliasError:  # pragma: no cover
+            if start is not None:
+                stream.seek(start)
+            return list(yaml.load_all(stream, Loader=Loader))
 
     @property
     def log(self):
@@ -372,8 +714,52 @@ class Logfile(Mapping):
         Logfile
             Yaml dictionary of the output of the BigDFT code.
         """
+        if self._source is not None:
+            # Only some parts of the document were read: read the whole
+            # document from the logfile
+            filename, index = self._source
+            log = read_document(filename, index)
+            if self.slim:
+                return log
+            self._log = log
+            self._source = None
         return self._log
 
+    @property
+    def slim(self):
+        r"""
+        If `True`, only the parts of the log giving the attributes, the
+        input parameters and the initial positions of the Logfile are
+        kept in memory. The whole document is read again from the
+        logfile each time the :attr:`log` attribute is used (or the
+        Logfile is used as a dictionary), without being kept.
+
+        A Logfile that was not read from a file always keeps its whole
+        log in memory.
+
+        Returns
+        -------
+        bool
+            `True` if the whole document is not kept in memory.
+
+
+        >>> log = Logfile.from_file("tests/log.yaml", sidecar=False)
+        >>> log.slim = True
+        >>> "Timings for root process" in log._log
+        False
+        >>> log["Timings for root process"]["CPU time (s)"]
+        18.76
+        """
+        return self._slim
+
+    @slim.setter
+    def slim(self, slim):
+        slim = bool(slim)
+        if slim and self._source is None and self._origin is not None:
+            self._log = prune(self._log, _get_paths(list(ATTRIBUTES)))
+            self._source = self._origin
+        self._slim = slim and self._origin is not None
+
     def __dir__(self):
         r"""
         The base attributes are not found when doing `dir()` on a
@@ -459,6 +845,128 @@ class Logfile(Mapping):
         """
         return self._inputparams
 
+    def _get_columns(self, name, extract):
+        r"""
+        Parameters
+        ----------
+        name : str
+            Name of a built-in attribute.
+        extract : function
+            Function turning the value of the attribute into numpy
+            arrays.
+
+        Returns
+        -------
+        Python object
+            Value of the attribute as numpy arrays (computed only once).
+        """
+        try:
+            return self._columns[name]
+        except KeyError:
+            columns = extract(getattr(self, name))
+            self._columns[name] = columns
+            return columns
+
+    @property
+    def eigenvalues(self):
+        r"""
+        Returns
+        -------
+        numpy.ndarray or None
+            Orbital energies (in Hartree), as an array of shape
+            :math:`(n_{kpt}, n_{orb})`.
+
+        >>> log = Logfile.from_file("tests/log.yaml")
+        >>> log.eigenvalues.shape
+        (1, 5)
+        >>> print(log.eigenvalues[0, 0])
+        -1.043551616577
+        """
+        return self._get_columns("evals", eigenvalues_arrays)[0]
+
+    @property
+    def occupations(self):
+        r"""
+        Returns
+        -------
+        numpy.ndarray or None
+            Occupations of the orbitals, as an array of shape
+            :math:`(n_{kpt}, n_{orb})`.
+        """
+        return self._get_columns("evals", eigenvalues_arrays)[1]
+
+    @property
+    def kpoints(self):
+        r"""
+        Returns
+        -------
+        numpy.ndarray or None
+            Reduced coordinates of the k-points, as an array of shape
+            :math:`(n_{kpt}, 3)`.
+        """
+        return self._get_columns("kpts", kpoints_arrays)[0]
+
+    @property
+    def kpoint_weights(self):
+        r"""
+        Returns
+        -------
+        numpy.ndarray or None
+            Weights of the k-points, as an array of shape
+            :math:`(n_{kpt},)`.
+        """
+        return self._get_columns("kpts", kpoints_arrays)[1]
+
+    @property
+    def multipoles(self):
+        r"""
+        Returns
+        -------
+        dict or None
+            Electrostatic multipoles of the atoms: their types (key
+            ``"sym"``), positions (key ``"r"``) and coefficients (keys
+            ``"q0"``, ``"q1"``...) as arrays whose first dimension is the
+            number of atoms (see
+            :func:`~mybigdft.iofiles.columns.multipoles_arrays`).
+        """
+        return self._get_columns("electrostatic_multipoles", multipoles_arrays)
+
+    @property
+    def support_functions_multipoles(self):
+        r"""
+        Returns
+        -------
+        dict or None
+            Multipole coefficients of the support functions, in the same
+            format as :attr:`multipoles`.
+        """
+        return self._get_columns("support_functions", multipoles_arrays)
+
+
+def _load_logfile(filename, fields, sidecar):
+    r"""
+    Read a logfile (this is the task sent to the workers by
+    :meth:`Logfile.load_many`).
+
+    Parameters
+    ----------
+    filename : str
+        Name of the logfile.
+    fields : list
+        Names of the attributes to read.
+    sidecar : bool
+        If `True`, the sidecar file of the logfile is used.
+
+    Returns
+    -------
+    Logfile or GeoptLogfile or MultipleLogfile or None
+        Logfile read from the file, `None` if it could not be read.
+    """
+    try:
+        return Logfile.from_file(filename, fields=fields, sidecar=sidecar)
+    except (IOError, OSError, ValueError, yaml.YAMLError):
+        return None
+
 
 class MultipleLogfile(Sequence):
     r"""
@@ -502,7 +1010,7 @@ class MultipleLogfile(Sequence):
         filename : str
             Name of the logfile.
         """
-        logs = [log.log for log in self.logs]
+        logs = (log.log for log in self.logs)
         with open(filename, "w") as stream:
             yaml.dump_all(logs, stream=stream, Dumper=Dumper, explicit_start=True)
 
@@ -511,22 +1019,47 @@ class GeoptLogfile(MultipleLogfile):
     r"""
     Class allowing to initialize, read, write and interact with an
     output file of a geometry optimization calculation.
+
+    The geometries, energies and maximal forces of the steps are
+    available through the :attr:`trajectory` attribute.
     """
 
-    def __init__(self, logs):
+    def __init__(self, logs, trajectory=None):
         r"""
         Parameters
         ----------
         logs : list
             List of the various documents contained in the logfile of a
             geometry optimization calculation.
+        trajectory : Trajectory or None
+            Trajectory of the geometry optimization (by default, it is
+            given by the documents).
         """
         super(GeoptLogfile, self).__init__(logs)
-        # Update the input parameters and positions of the documents
-        for log in self.logs[1:]:
+        if isinstance(logs, _LogfileSequence):
+            # The documents are read when needed
+            logs.prepare = self._prepare
+        else:
+            for index, log in enumerate(self.logs):
+                self._prepare(index, log)
+        if trajectory is None:
+            trajectory = Trajectory.from_logs(self.logs)
+        self._trajectory = trajectory
+
+    def _prepare(self, index, log):
+        r"""
+        Update the input parameters and positions of a document.
+
+        Parameters
+        ----------
+        index : int
+            Index of the document.
+        log : Logfile
+            Logfile of the document.
+        """
+        if index > 0:
             log._inputparams = self.inputparams
-            log._posinp = Posinp.from_dict(log["Atomic structure"])
-        self._posinps = [log.posinp for log in self.logs]
+            log._posinp = Posinp.from_dict(log._log["Atomic structure"])
 
     @property
     def inputparams(self):
@@ -539,13 +1072,104 @@ class GeoptLogfile(MultipleLogfile):
         """
         return self.logs[0].inputparams
 
+    @property
+    def trajectory(self):
+        r"""
+        Returns
+        -------
+        Trajectory
+            Geometries, energies and maximal forces of the steps of the
+            geometry optimization procedure.
+        """
+        return self._trajectory
+
     @property
     def posinps(self):
         r"""
         Returns
         -------
-        list
-            List of the input positions for each step of the geometry
-            optimization procedure.
+        Trajectory
+            Sequence of the input positions for each step of the
+            geometry optimization procedure.
         """
-        return self._posinps
+        return self._trajectory
+
+
+class _LogfileSequence(Sequence):
+    r"""
+    Sequence of the Logfiles of the documents of a logfile, each document
+    being read only when it is used. Only the first document and the
+    last documents used are kept in memory.
+    """
+
+    def __init__(self, filename, offsets, paths=None, check_psppar=True):
+        r"""
+        Parameters
+        ----------
+        filename : str
+            Name of the logfile.
+        offsets : list
+            Offsets of the documents in the logfile.
+        paths : list or None
+            Paths of the parts of the documents to read (the whole
+            documents are read if `None`).
+        check_psppar : bool
+            If `True`, the XC of the pseudopotentials of each document
+            is checked.
+        """
+        self._filename = filename
+        self._offsets = offsets
+        self._paths = paths
+        self._check_psppar = check_psppar
+        self._cache = OrderedDict()
+        self.prepare = None
+        self._first = self._read(0)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Logfile index out of range")
+        if index == 0:
+            return self._first
+        try:
+            self._cache.move_to_end(index)
+            return self._cache[index]
+        except KeyError:
+            pass
+        log = self._read(index)
+        self._cache[index] = log
+        if len(self._cache) > MAX_CACHED_DOCUMENTS:
+            self._cache.popitem(last=False)
+        return log
+
+    def _read(self, index):
+        r"""
+        Parameters
+        ----------
+        index : int
+            Index of a document.
+
+        Returns
+        -------
+        Logfile
+            Logfile of the document.
+        """
+        doc = read_document(self._filename, index, self._offsets, self._paths)
+        log = Logfile(doc, check_psppar=self._check_psppar)
+        log._origin = (self._filename, index)
+        if self._paths is not None:
+            log._source = log._origin
+        if self.prepare is not None:
+            self.prepare(index, log)
+        return log
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_cache"] = OrderedDict()
+        return state
@@ -4,7 +4,8 @@ atomic systems used as input for a BigDFT calculation.
 """
 
 from __future__ import print_function
-from copy import deepcopy
+from copy import copy, deepcopy
+from itertools import product
 from collections import Sequence
 import numpy as np
 from mybigdft.globals import ATOMS_MASS
@@ -29,6 +30,11 @@ class Posinp(Sequence):
     * the subsequent :math:`n_{at}` lines are used to define each atom
       of the system: first its type, then its position given by three
       coordinates (for :math:`x`, :math:`y` and :math:`z`).
+
+    The positions of all the atoms are stored in a single array of shape
+    (:math:`n_{at}`, 3), while the atoms of a Posinp instance are views
+    on that array. Manipulating the geometry of large systems therefore
+    does not require to loop over the atoms.
     """
 
     def __init__(self, atoms, units, boundary_conditions, cell=None):
@@ -36,7 +42,10 @@ class Posinp(Sequence):
         Parameters
         ----------
         atoms : list
-            List of :class:`Atom` instances.
+            List of :class:`Atom` instances. Their types and positions
+            are copied in the arrays of the posinp: modifying these
+            atoms afterwards does not modify the posinp (modify the
+            atoms of the posinp instead).
         units : str
             Units of the coordinate system.
         boundary_conditions : str
@@ -193,16 +202,13 @@ class Posinp(Sequence):
                 "number of atoms ({} != {})".format(len(lines), n_at)
             )
         # Decode the atoms
-        atoms = []
-        for line in lines:
-            atom_type = line[0]
-            position = np.array(line[1:4], dtype=float)
-            if boundary_conditions != "free":
-                position = periodic_positions(
-                    position, np.array(cell, dtype=float), boundary_conditions
-                )
-            atoms.append(Atom(atom_type, position))
-        return cls(atoms, units, boundary_conditions, cell=cell)
+        types = [line[0] for line in lines]
+        positions = np.array([line[1:4] for line in lines], dtype=float)
+        if boundary_conditions != "free":
+            positions = periodic_positions(
+                positions, np.array(cell, dtype=float), boundary_conditions
+            )
+        return cls.from_arrays(types, positions, units, boundary_conditions, cell=cell)
 
     @classmethod
     def from_dict(cls, posinp):
@@ -261,9 +267,12 @@ class Posinp(Sequence):
                 posinp[key.lower()] = ref_posinp[key]
                 del posinp[key]
         # Read data from the dictionary
-        atoms = []  # atomic positions
+        types = []
+        positions = []  # atomic positions
         for atom in posinp["positions"]:
-            atoms.append(Atom.from_dict(atom))
+            [(atom_type, position)] = atom.items()
+            types.append(atom_type)
+            positions.append(position)
         units = posinp.get("units", "atomic")  # Units of the coordinates
         cell = posinp.get("cell")  # Simulation cell size
         # Infer the boundary conditions from the value of cell
@@ -274,27 +283,149 @@ class Posinp(Sequence):
                 boundary_conditions = "surface"
             else:
                 boundary_conditions = "periodic"
-        return cls(atoms, units, boundary_conditions, cell=cell)
+        return cls.from_arrays(types, positions, units, boundary_conditions, cell=cell)
+
+    @classmethod
+    def from_arrays(cls, types, positions, units, boundary_conditions, cell=None):
+        r"""
+        Initialize the input positions from the types and positions of
+        the atoms, without creating any :class:`Atom` instance.
+
+        Parameters
+        ----------
+        types : Sequence of str
+            Type of each atom.
+        positions : numpy.array of shape (:math:`n_{at}`, 3)
+            Position of each atom.
+        units : str
+            Units of the coordinate system.
+        boundary_conditions : str
+            Boundary conditions.
+        cell : Sequence of length 3 or None
+            Size of the simulation domain in the three space
+            coordinates.
+
+        Returns
+        -------
+        Posinp
+            Posinp initialized from the arrays.
+
+
+        >>> pos = Posinp.from_arrays(['N', 'N'], [[0, 0, 0], [0, 0, 1.1]],
+        ...                          'angstroem', 'free')
+        >>> print(pos)
+        2   angstroem
+        free
+        N   0.0   0.0   0.0
+        N   0.0   0.0   1.1
+        <BLANKLINE>
+        """
+        posinp = cls([], units, boundary_conditions, cell=cell)
+        posinp._set_arrays(types, positions)
+        return posinp
+
+    def _set_arrays(self, types, positions):
+        r"""
+        Set the arrays storing the atoms of the system.
+
+        Parameters
+        ----------
+        types : Sequence of str
+            Type of each atom.
+        positions : numpy.array of shape (:math:`n_{at}`, 3)
+            Position of each atom.
+        """
+        positions = np.array(positions, dtype=float).reshape((-1, 3))
+        if len(types) != len(positions):
+            raise ValueError(
+                "There must be as many atom types as positions ({} != {})".format(
+                    len(types), len(positions)
+                )
+            )
+        type_names, type_ids = np.unique(
+            np.array(types, dtype=str), return_inverse=True
+        )
+        self._type_names = type_names.tolist()
+        self._type_ids = type_ids.reshape(-1)
+        self._positions = positions
+        type_masses = np.array([ATOMS_MASS[name] for name in self._type_names])
+        self._masses = type_masses[self._type_ids]
+
+    def _set_type(self, index, atom_type):
+        r"""
+        Change the type of an atom.
+
+        Parameters
+        ----------
+        index : int
+            Index of the atom.
+        atom_type : str
+            New type of the atom.
+        """
+        if atom_type not in self._type_names:
+            self._type_names = self._type_names + [atom_type]
+        # The arrays might be shared with other posinps (copy on write)
+        self._type_ids = self._type_ids.copy()
+        self._type_ids[index] = self._type_names.index(atom_type)
+        self._set_mass(index, ATOMS_MASS[atom_type])
+
+    def _set_mass(self, index, mass):
+        r"""
+        Change the mass of an atom.
+
+        Parameters
+        ----------
+        index : int
+            Index of the atom.
+        mass : float
+            New mass of the atom.
+        """
+        # The array might be shared with other posinps (copy on write)
+        self._masses = self._masses.copy()
+        self._masses[index] = mass
 
     @property
     def atoms(self):
         r"""
         Returns
         -------
-        list of Atoms
-            Atoms of the system (atomic type and positions).
+        tuple of Atoms
+            Atoms of the system (atomic type and positions). They are
+            views on the system, but the tuple itself cannot be
+            modified: atoms are added or removed by setting a new list
+            of atoms.
+
+
+        >>> pos = Posinp([Atom('N', [0, 0, 0])], 'angstroem', 'free')
+        >>> pos.atoms[0].position = [0, 0, 1]
+        >>> pos.atoms = list(pos.atoms) + [Atom('N', [0, 0, 0])]
+        >>> pos.positions
+        array([[0., 0., 1.],
+               [0., 0., 0.]])
         """
-        return self._atoms
+        return tuple(self)
 
     @atoms.setter
     def atoms(self, atoms):
-        if isinstance(atoms, list):
+        if isinstance(atoms, (list, tuple)):
             if all([isinstance(at, Atom) for at in atoms]):
-                self._atoms = atoms
+                self._set_arrays(
+                    [atom.type for atom in atoms], [atom.position for atom in atoms]
+                )
             else:
                 raise TypeError("All atoms should be mybigdft.Atoms instances")
         else:
-            raise TypeError("Atoms should be given in a list")
+            raise TypeError("Atoms should be given in a list or a tuple")
+
+    @property
+    def types(self):
+        r"""
+        Returns
+        -------
+        list of str
+            Type of each atom of the system.
+        """
+        return [self._type_names[i] for i in self._type_ids]
 
     @property
     def units(self):
@@ -352,9 +483,12 @@ class Posinp(Sequence):
         Returns
         -------
         2D numpy array of shape (:math:`n_{at}`, 3)
-            Position of all the atoms in the system.
+            Position of all the atoms in the system (as a read-only
+            array). The positions are modified via the atoms of the
+            system, or by creating a new posinp (see :meth:`translate`
+            for instance).
         """
-        return np.array([atom.position for atom in self])
+        return _read_only(self._positions)
 
     @property
     def masses(self):
@@ -362,9 +496,10 @@ class Posinp(Sequence):
         Returns
         -------
         numpy array of length :math:`n_{at}`
-            Masses of all the atoms in the system.
+            Masses of all the atoms in the system (as a read-only
+            array).
         """
-        return np.array([atom.mass for atom in self])
+        return _read_only(self._masses)
 
     def __getitem__(self, index):
         r"""
@@ -373,7 +508,7 @@ class Posinp(Sequence):
 
         Parameters
         ----------
-        index : int
+        index : int or slice
             Index of a given atom
 
         Returns
@@ -381,10 +516,21 @@ class Posinp(Sequence):
         Atom
             The required atom.
         """
-        return self.atoms[index]
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+        n_at = len(self)
+        if index < 0:
+            index += n_at
+        if not 0 <= index < n_at:
+            raise IndexError("Posinp index out of range")
+        return Atom._view(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield Atom._view(self, index)
 
     def __len__(self):
-        return len(self.atoms)
+        return len(self._positions)
 
     def __eq__(self, other):
         r"""
@@ -399,18 +545,21 @@ class Posinp(Sequence):
             `True` if both initial positions have the same number of
             atoms, the same units and boundary conditions and the same
             atoms (whatever the order of the atoms in the initial list
-            of atoms).
+            of atoms, see :meth:`find_permutation`).
         """
         try:
             # Check that both cells are the same, but first make sure
             # that the unimportant cell size are not compared
             cell = deepcopy(self.cell)
             other_cell = deepcopy(other.cell)
-            if self.boundary_conditions == "surface":
-                cell[1] = 0.0
-            if other.boundary_conditions == "surface":
-                other_cell[1] = 0.0
-            same_cell = np.allclose(cell, other_cell)
+            if cell is None or other_cell is None:
+                same_cell = cell is None and other_cell is None
+            else:
+                if self.boundary_conditions == "surface":
+                    cell[1] = 0.0
+                if other.boundary_conditions == "surface":
+                    other_cell[1] = 0.0
+                same_cell = np.allclose(cell, other_cell)
             # Check the other basic attributes
             same_BC = self.boundary_conditions == other.boundary_conditions
             same_base = (
@@ -422,13 +571,99 @@ class Posinp(Sequence):
             # Finally check the atoms only if the base is similar, as it
             # might be time-consuming for large systems
             if same_base:
-                same_atoms = all([atom in other.atoms for atom in self.atoms])
-                return same_atoms
+                return self.find_permutation(other) is not None
             else:
                 return False
         except AttributeError:
             return False
 
+    def find_permutation(self, other, rtol=1e-05, atol=1e-08):
+        r"""
+        Find how the atoms of another posinp must be reordered to match
+        the atoms of this posinp.
+
+        Two atoms match if they have the same type and if their
+        positions are close (as defined by :func:`numpy.allclose`, with
+        the same tolerances), each atom being matched only once. The
+        atoms are hashed on a grid whose spacing is the tolerance, so
+        that the cost of the matching grows linearly with the number of
+        atoms.
+
+        Parameters
+        ----------
+        other : Posinp
+            Other posinp.
+        rtol : float
+            Relative tolerance on the atomic positions.
+        atol : float
+            Absolute tolerance on the atomic positions.
+
+        Returns
+        -------
+        numpy.array or None
+            Index in `other` of each atom of the posinp, or `None` if
+            the atoms of both posinps do not match.
+
+
+        >>> pos1 = Posinp([Atom('N', [0, 0, 0]), Atom('O', [0, 0, 1.1])],
+        ...               'angstroem', 'free')
+        >>> pos2 = Posinp([Atom('O', [0, 0, 1.1]), Atom('N', [0, 0, 0])],
+        ...               'angstroem', 'free')
+        >>> pos1.find_permutation(pos2)
+        array([1, 0])
+        >>> pos1.find_permutation(pos2.translate([0, 0, 0.1])) is None
+        True
+        """
+        n_at = len(self)
+        if len(other) != n_at:
+            return None
+        types = np.array(self._type_names)[self._type_ids]
+        other_types = np.array(other._type_names)[other._type_ids]
+        positions = self._positions
+        other_positions = other._positions
+        # Most of the time, the atoms are in the same order
+        if np.array_equal(types, other_types) and np.allclose(
+            positions, other_positions, rtol=rtol, atol=atol
+        ):
+            return np.arange(n_at)
+        if sorted(types.tolist()) != sorted(other_types.tolist()):
+            return None
+        # Hash the atoms of the other posinp on a grid such that the
+        # matching atoms are in the same or in neighbouring cells (the
+        # spacing is bounded from below to keep the cell indices small)
+        max_position = np.max(np.abs(other_positions))
+        spacing = max(atol + rtol * max_position, 1e-12 * max(max_position, 1.0))
+        keys = np.floor(positions / spacing).astype(np.int64).tolist()
+        other_keys = np.floor(other_positions / spacing).astype(np.int64).tolist()
+        cells = {}
+        for j, key in enumerate(other_keys):
+            cells.setdefault(tuple(key), []).append(j)
+        types = types.tolist()
+        other_types = other_types.tolist()
+        positions = positions.tolist()
+        other_positions = other_positions.tolist()
+        # Match the atoms one by one
+        used = [False] * n_at
+        permutation = np.empty(n_at, dtype=int)
+        for i, (x, y, z) in enumerate(keys):
+            match = None
+            for dx, dy, dz in _NEIGHBOURS:
+                for j in cells.get((x + dx, y + dy, z + dz), ()):
+                    if (
+                        not used[j]
+                        and types[i] == other_types[j]
+                        and _are_close(positions[i], other_positions[j], rtol, atol)
+                    ):
+                        match = j
+                        break
+                if match is not None:
+                    break
+            if match is None:
+                return None
+            used[match] = True
+            permutation[i] = match
+        return permutation
+
     def __ne__(self, other):
         # This is only for the python2 version to work
         return not self.__eq__(other)
@@ -460,8 +695,8 @@ class Posinp(Sequence):
             The string representation of a Posinp instance.
         """
         return (
-            "Posinp({0.atoms}, '{0.units}', '{0.boundary_conditions}', "
-            "cell={0.cell})".format(self)
+            "Posinp({1}, '{0.units}', '{0.boundary_conditions}', "
+            "cell={0.cell})".format(self, list(self))
         )
 
     def write(self, filename):
@@ -497,9 +732,8 @@ class Posinp(Sequence):
         >>> pos = Posinp(atoms, units="angstroem", boundary_conditions="free")
         >>> assert pos.distance(0, 1) == 5.0
         """
-        pos_1 = self[i_at_1].position
-        pos_2 = self[i_at_2].position
-        return np.sqrt(sum([(pos_1[i] - pos_2[i]) ** 2 for i in range(3)]))
+        vector = self._positions[i_at_2] - self._positions[i_at_1]
+        return np.sqrt(np.sum(vector**2))
 
     def translate_atom(self, i_at, vector):
         r"""
@@ -535,9 +769,58 @@ class Posinp(Sequence):
         N   0.0   0.0   1.15
         <BLANKLINE>
         """
-        new_posinp = deepcopy(self)
-        new_posinp.atoms[i_at] = self[i_at].translate(vector)
-        return new_posinp
+        assert len(vector) == 3, "The vector must have three components"
+        new_positions = self._positions.copy()
+        new_positions[i_at] += np.array(vector, dtype=float)
+        return self._with_positions(new_positions)
+
+    def displaced(self, indices, vectors):
+        r"""
+        Create many posinps where a single atom is translated, in one go.
+
+        The positions of all the new posinps are stored in a single
+        array of shape (:math:`n_{struct}`, :math:`n_{at}`, 3), while
+        the atom types and masses are shared with the initial posinp
+        (they are only copied if they are modified). This is much
+        cheaper than calling :meth:`translate_atom` for each
+        displacement.
+
+        Parameters
+        ----------
+        indices : Sequence of int
+            Index of the atom to translate in each new posinp.
+        vectors : numpy.array of shape (:math:`n_{struct}`, 3) or (3,)
+            Translation vector to apply in each new posinp (the same
+            vector is used for all of them if only one is given).
+
+        Returns
+        -------
+        list of Posinp
+            New posinps, where the atom ``indices[i]`` of the i-th one
+            was translated by ``vectors[i]``.
+
+
+        .. Warning::
+
+            You have to make sure that the units of the vectors match
+            those used by the posinp.
+
+
+        >>> posinp = Posinp([Atom('N', [0, 0, 0]), Atom('N', [0, 0, 1.1])],
+        ...                 'angstroem', 'free')
+        >>> posinps = posinp.displaced([0, 1], [0, 0, 0.05])
+        >>> posinps[1] == posinp.translate_atom(1, [0, 0, 0.05])
+        True
+        >>> posinps[0].positions
+        array([[0.  , 0.  , 0.05],
+               [0.  , 0.  , 1.1 ]])
+        """
+        indices = np.asarray(indices, dtype=int).reshape(-1)
+        n_struct = len(indices)
+        vectors = np.broadcast_to(np.asarray(vectors, dtype=float), (n_struct, 3))
+        all_positions = np.repeat(self._positions[np.newaxis], n_struct, axis=0)
+        all_positions[np.arange(n_struct), indices] += vectors
+        return [self._with_positions(positions) for positions in all_positions]
 
     def translate(self, vector):
         r"""
@@ -560,17 +843,27 @@ class Posinp(Sequence):
             You have to make sure that the units of the vector match
             those used by the posinp.
         """
-        new_positions = self.positions + np.array(vector)
-        atoms = [
-            Atom(atom.type, pos.tolist())
-            for atom, pos in zip(self.atoms, new_positions)
-        ]
-        return Posinp(
-            atoms,
-            units=self.units,
-            cell=self.cell,
-            boundary_conditions=self.boundary_conditions,
-        )
+        return self._with_positions(self._positions + np.array(vector, dtype=float))
+
+    def _with_positions(self, positions):
+        r"""
+        Parameters
+        ----------
+        positions : numpy.array of shape (:math:`n_{at}`, 3)
+            New positions of the atoms.
+
+        Returns
+        -------
+        Posinp
+            New posinp with the same atoms, units, boundary conditions
+            and cell, but where the atoms are at the given positions
+            (the atom types and masses are shared with the posinp).
+        """
+        new_posinp = copy(self)
+        if self.cell is not None:
+            new_posinp._cell = list(self.cell)
+        new_posinp._positions = positions
+        return new_posinp
 
     def to_centroid(self):
         r"""
@@ -595,14 +888,18 @@ class Posinp(Sequence):
             New posinp where all the atoms are centered on the center
             of mass of the system.
         """
-        m = self.masses
-        barycenter = np.sum(m * self.positions.T, axis=1) / np.sum(m)
+        m = self._masses
+        barycenter = np.dot(m, self._positions) / np.sum(m)
         return self.translate(-barycenter)
 
 
 class Atom(object):
     r"""
     Class allowing to represent an atom by its type and position.
+
+    The atoms of a :class:`Posinp` instance are views on the arrays
+    storing the types and positions of all the atoms of the system:
+    modifying them modifies the system.
     """
 
     def __init__(self, atom_type, position):
@@ -624,10 +921,33 @@ class Atom(object):
         12.011
         """
         # TODO: Check that the atom type exists
+        self._posinp = None
+        self._index = None
         self.type = atom_type
         self.position = position
         self.mass = ATOMS_MASS[self.type]
 
+    @classmethod
+    def _view(cls, posinp, index):
+        r"""
+        Parameters
+        ----------
+        posinp : Posinp
+            System the atom belongs to.
+        index : int
+            Index of the atom in the system.
+
+        Returns
+        -------
+        Atom
+            Atom whose type, position and mass are those stored by the
+            system.
+        """
+        atom = cls.__new__(cls)
+        atom._posinp = posinp
+        atom._index = index
+        return atom
+
     @classmethod
     def from_dict(cls, atom_dict):
         r"""
@@ -649,12 +969,18 @@ class Atom(object):
         str
             Type of the atom.
         """
+        if self._posinp is not None:
+            posinp = self._posinp
+            return posinp._type_names[posinp._type_ids[self._index]]
         return self._type
 
     @type.setter
     def type(self, type):
         if isinstance(type, str):
-            self._type = type
+            if self._posinp is not None:
+                self._posinp._set_type(self._index, type)
+            else:
+                self._type = type
         else:
             TypeError("Atom type should be given as a string.")
 
@@ -666,12 +992,17 @@ class Atom(object):
         list or numpy.array of length 3
             Position of the atom in cartesian coordinates.
         """
+        if self._posinp is not None:
+            return self._posinp._positions[self._index]
         return self._position
 
     @position.setter
     def position(self, position):
         assert len(position) == 3, "The position must have three components."
-        self._position = np.array(position, dtype=float)
+        if self._posinp is not None:
+            self._posinp._positions[self._index] = position
+        else:
+            self._position = np.array(position, dtype=float)
 
     @property
     def mass(self):
@@ -681,11 +1012,16 @@ class Atom(object):
         float
             Mass of the atom in atomic mass units.
         """
+        if self._posinp is not None:
+            return self._posinp._masses[self._index]
         return self._mass
 
     @mass.setter
     def mass(self, mass):
-        self._mass = mass
+        if self._posinp is not None:
+            self._posinp._set_mass(self._index, mass)
+        else:
+            self._mass = mass
 
     def translate(self, vector):
         r"""
@@ -711,6 +1047,11 @@ class Atom(object):
         new_atom.position = self.position + np.array(vector)
         return new_atom
 
+    def __reduce__(self):
+        # An atom is always copied or pickled as a standalone atom, and
+        # not along with the whole system it might be a view of
+        return (self.__class__, (self.type, self.position.copy()), {"_mass": self.mass})
+
     def __str__(self):
         r"""
         Returns
@@ -761,11 +1102,72 @@ class Atom(object):
         except AttributeError:
             return False
 
-def periodic_positions(position, cell, boundary_conditions):
+
+#: Offsets of a cell of a grid and of its neighbouring cells
+_NEIGHBOURS = list(product((0, -1, 1), repeat=3))
+
+
+def _are_close(position, other_position, rtol, atol):
+    r"""
+    Parameters
+    ----------
+    position : list of length 3
+        Position of an atom.
+    other_position : list of length 3
+        Position of another atom.
+    rtol : float
+        Relative tolerance.
+    atol : float
+        Absolute tolerance.
+
+    Returns
+    -------
+    bool
+        `True` if both positions are close (as defined by
+        :func:`numpy.allclose`).
+    """
+    return all(
+        abs(a - b) <= atol + rtol * abs(b) for a, b in zip(position, other_position)
+    )
+
+
+def periodic_positions(positions, cell, boundary_conditions):
+    r"""
+    Bring the positions back in the simulation cell.
+
+    Parameters
+    ----------
+    positions : numpy.array of shape (3,) or (:math:`n_{at}`, 3)
+        Position(s) of the atom(s).
+    cell : numpy.array of length 3
+        Cell size.
+    boundary_conditions : str
+        Boundary conditions.
+
+    Returns
+    -------
+    numpy.array
+        Positions in the simulation cell.
+    """
     if boundary_conditions == "free":
-        return position
+        return positions
     else:
-        below, above = np.where(position < 0.0)[0], np.where(position > cell)[0]
-        position[below] = position[below] + cell[below]
-        position[above] = position[above] - cell[above]
-        return position
+        positions = np.where(positions < 0.0, positions + cell, positions)
+        return np.where(positions > cell, positions - cell, positions)
+
+
+def _read_only(array):
+    r"""
+    Parameters
+    ----------
+    array : numpy.array
+        Array.
+
+    Returns
+    -------
+    numpy.array
+        Read-only view of the array.
+    """
+    view = array.view()
+    view.flags.writeable = False
+    return view
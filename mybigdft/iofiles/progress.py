@@ -0,0 +1,382 @@
+r"""
+The :class:`LogfileFollower` class follows the logfile of a running
+BigDFT calculation, so that its progress is known before it ends. Only
+the lines appended to the logfile since the previous read are
+processed, without parsing the YAML documents (which are incomplete
+while the calculation runs). The progress is reported as
+:class:`ProgressEvent` instances:
+
+* :data:`GEOPT_STEP` when a new step of a geometry optimization starts
+  (each step being a new document of the logfile),
+* :data:`HAMILTONIAN_STEP` and :data:`SUBSPACE_STEP` when a new
+  Hamiltonian or subspace optimization starts,
+* :data:`SCF_ITERATION` for each wavefunction iteration, with its
+  energy and the norm of its residue (gnrm),
+* :data:`ATTRIBUTE` when the value of an attribute of the logfile is
+  found (see :data:`~mybigdft.iofiles.logfiles.ATTRIBUTES`), such as
+  the energy or the maximal force of a step.
+
+>>> follower = LogfileFollower("tests/log.yaml")
+>>> events = follower.read()
+>>> scf = [e for e in events if e.kind == SCF_ITERATION]
+>>> scf[-1].iteration, scf[-1].values["gnrm"]
+(11, 3.35e-05)
+>>> [list(e.values) for e in events if e.kind == ATTRIBUTE]
+[['forcemax'], ['energy'], ['walltime']]
+>>> follower.read()  # Nothing was appended to the logfile
+[]
+"""
+
+from __future__ import absolute_import
+import os
+import re
+import time
+from collections import namedtuple
+import yaml
+
+try:
+    from yaml import CLoader as Loader
+except ImportError:  # pragma: no cover
+    from yaml import Loader
+
+
+__all__ = [
+    "LogfileFollower",
+    "ProgressEvent",
+    "GEOPT_STEP",
+    "HAMILTONIAN_STEP",
+    "SUBSPACE_STEP",
+    "SCF_ITERATION",
+    "ATTRIBUTE",
+]
+
+
+#: Kind of the events giving the start of a new geometry optimization step
+GEOPT_STEP = "geopt_step"
+#: Kind of the events giving the start of a new Hamiltonian optimization
+HAMILTONIAN_STEP = "hamiltonian_step"
+#: Kind of the events giving the start of a new subspace optimization
+SUBSPACE_STEP = "subspace_step"
+#: Kind of the events giving the result of a wavefunction iteration
+SCF_ITERATION = "scf_iteration"
+#: Kind of the events giving the value of an attribute of the logfile
+ATTRIBUTE = "attribute"
+#: Attributes of the logfile reported by default
+PROGRESS_FIELDS = ("energy", "forcemax", "walltime")
+#: Size (in bytes) of the chunks read from the logfile
+CHUNK_SIZE = 2**16
+#: Maximal length (in bytes) of the lines that are processed (only the
+#: beginning of longer lines is processed)
+MAX_LINE_LENGTH = 2**14
+
+# Document start marker
+_DOCUMENT_START = re.compile(r"^---(?=[ \t]|$)")
+# Start of a Hamiltonian optimization (with its anchor giving its number)
+_HAMILTONIAN = re.compile(r"Hamiltonian Optimization[ \t]*:[ \t]*&itrp(\d+)")
+# Start of a subspace optimization (with its anchor giving its number)
+_SUBSPACE = re.compile(r"Subspace Optimization[ \t]*:[ \t]*&itrep\d+-(\d+)")
+# Summary of a wavefunction iteration
+_ITERATION = re.compile(
+    r"\biter:[ \t]*(\d+),[ \t]*[EF]KS:[ \t]*([-+.\dEe]+),[ \t]*gnrm:[ \t]*([-+.\dEe]+)"
+)
+# Key of a block mapping (the sequence indicators being part of the
+# indentation), with its value if it is on the same line
+_KEY = re.compile(
+    r"^(?P<indent>[ \t]*(?:-[ \t]+)*)(?P<key>[^\s#&*!{\[\]}:,-][^:#]*?)"
+    r"[ \t]*:(?:[ \t]+(?P<value>.*?))?[ \t]*$"
+)
+# Comment at the end of a line
+_COMMENT = re.compile(r"(?:^|[ \t])#.*$")
+# Value that is only an anchor (of a block mapping or sequence)
+_ANCHOR = re.compile(r"^&\S+$")
+
+
+class ProgressEvent(
+    namedtuple(
+        "ProgressEvent",
+        [
+            "kind",
+            "geopt_step",
+            "hamiltonian_step",
+            "subspace_step",
+            "iteration",
+            "values",
+        ],
+    )
+):
+    r"""
+    Progress of a running calculation: the kind of the event, the
+    position in the calculation where it happened (geometry
+    optimization step, starting at 0, Hamiltonian and subspace
+    optimizations and wavefunction iteration, starting at 1, or 0 if
+    none started yet), and the values it reports (a dictionary).
+    """
+
+    __slots__ = ()
+
+
+class LogfileFollower(object):
+    r"""
+    Incremental reader of a logfile being written by a BigDFT
+    calculation. The memory it uses does not depend on the size of the
+    logfile.
+    """
+
+    def __init__(self, filename, fields=PROGRESS_FIELDS):
+        r"""
+        Parameters
+        ----------
+        filename : str
+            Name of the logfile (it may not exist yet).
+        fields : list
+            Names of the attributes of the logfile to report (see
+            :data:`~mybigdft.iofiles.logfiles.ATTRIBUTES`), whose paths
+            only contain keys.
+
+        Raises
+        ------
+        ValueError
+            If a field is not an attribute of a Logfile.
+        """
+        from .logfiles import ATTRIBUTES, PATHS
+
+        unknown = [field for field in fields if field not in ATTRIBUTES]
+        if unknown:
+            raise ValueError("Unknown attributes: {}".format(unknown))
+        self._filename = filename
+        self._attribute_paths = [
+            (field, path)
+            for field in fields
+            for path in ATTRIBUTES[field][PATHS]
+            if all(isinstance(key, str) for key in path)
+        ]
+        self._reset(None)
+
+    def _reset(self, inode):
+        r"""
+        Start reading the logfile from its beginning.
+
+        Parameters
+        ----------
+        inode : int or None
+            Inode of the logfile.
+        """
+        self._inode = inode
+        self._offset = 0
+        self._partial_line = b""
+        # If True, the partial line is too long: the rest of it is ignored
+        self._long_line = False
+        self._keys = []  # Indentations and keys of the parent mappings
+        self._flow_depth = 0
+        self._has_content = False
+        self._position = [0, 0, 0, 0]
+
+    @property
+    def filename(self):
+        r"""
+        Returns
+        -------
+        str
+            Name of the logfile.
+        """
+        return self._filename
+
+    def skip(self):
+        r"""
+        Ignore the current content of the logfile (left by a previous
+        calculation, for instance): only what is appended to it (or the
+        content of a new logfile replacing it) will be read.
+        """
+        try:
+            stat = os.stat(self.filename)
+        except (IOError, OSError):
+            return
+        self._reset(stat.st_ino)
+        self._offset = stat.st_size
+
+    def read(self):
+        r"""
+        Read what was appended to the logfile since the last read. The
+        logfile is read again from its beginning if it was replaced or
+        truncated (for instance, when a calculation is restarted).
+
+        Returns
+        -------
+        list
+            Progress events found in the new lines of the logfile.
+        """
+        events = []
+        try:
+            with open(self.filename, "rb") as f:
+                stat = os.fstat(f.fileno())
+                if stat.st_ino != self._inode or stat.st_size < self._offset:
+                    self._reset(stat.st_ino)
+                f.seek(self._offset)
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    self._offset += len(chunk)
+                    if self._long_line:
+                        # The end of a line that is too long is ignored
+                        end = chunk.find(b"\n")
+                        if end < 0:
+                            continue
+                        chunk = chunk[end:]
+                        self._long_line = False
+                    lines = (self._partial_line + chunk).split(b"\n")
+                    self._partial_line = lines.pop()
+                    if len(self._partial_line) > MAX_LINE_LENGTH:
+                        # Only the beginning of the line is kept, as for
+                        # the other lines that are too long
+                        self._partial_line = self._partial_line[:MAX_LINE_LENGTH]
+                        self._long_line = True
+                    for line in lines:
+                        line = line[:MAX_LINE_LENGTH].decode("utf-8", "replace")
+                        events.extend(self._process(line.rstrip("\r")))
+        except (IOError, OSError):
+            pass
+        return events
+
+    def _event(self, kind, values=None):
+        r"""
+        Parameters
+        ----------
+        kind : str
+            Kind of the event.
+        values : dict or None
+            Values reported by the event.
+
+        Returns
+        -------
+        ProgressEvent
+            Event happening at the current position in the logfile.
+        """
+        return ProgressEvent(kind, *self._position, values=values or {})
+
+    def _process(self, line):
+        r"""
+        Parameters
+        ----------
+        line : str
+            New line of the logfile.
+
+        Returns
+        -------
+        list
+            Progress events found in the line.
+        """
+        if _DOCUMENT_START.match(line):
+            self._keys, self._flow_depth = [], 0
+            if self._has_content:
+                self._position = [self._position[0] + 1, 0, 0, 0]
+                return [self._event(GEOPT_STEP)]
+            return []
+        self._has_content = self._has_content or bool(line.strip())
+        events = []
+        match = _HAMILTONIAN.search(line)
+        if match:
+            self._position[1:] = [int(match.group(1)), 0, 0]
+            events.append(self._event(HAMILTONIAN_STEP))
+        match = _SUBSPACE.search(line)
+        if match:
+            self._position[2:] = [int(match.group(1)), 0]
+            events.append(self._event(SUBSPACE_STEP))
+        match = _ITERATION.search(line)
+        if match:
+            self._position[3] = int(match.group(1))
+            values = {"energy": float(match.group(2)), "gnrm": float(match.group(3))}
+            events.append(self._event(SCF_ITERATION, values))
+        content = _COMMENT.sub("", line)
+        if self._flow_depth == 0:
+            events.extend(self._process_key(content))
+        self._flow_depth += sum(content.count(c) for c in "{[")
+        self._flow_depth -= sum(content.count(c) for c in "}]")
+        self._flow_depth = max(self._flow_depth, 0)
+        return events
+
+    def _process_key(self, content):
+        r"""
+        Keep track of the keys of the mappings of the logfile, and read
+        the value of the attributes of interest.
+
+        Parameters
+        ----------
+        content : str
+            New line of the logfile, without comment, outside of any
+            flow collection.
+
+        Returns
+        -------
+        list
+            Attribute events found in the line.
+        """
+        match = _KEY.match(content)
+        if not match:
+            return []
+        indent = len(match.group("indent"))
+        key, value = match.group("key"), match.group("value")
+        while self._keys and self._keys[-1][0] >= indent:
+            self._keys.pop()
+        if value is None or _ANCHOR.match(value):
+            self._keys.append((indent, key))
+            return []
+        path = [k for _, k in self._keys] + [key]
+        events = []
+        for field, attribute_path in self._attribute_paths:
+            if attribute_path[: len(path)] != path:
+                continue
+            try:
+                found = yaml.load(value, Loader=Loader)
+                for subkey in attribute_path[len(path) :]:
+                    found = found[subkey]
+            except (yaml.YAMLError, KeyError, TypeError):
+                continue
+            events.append(self._event(ATTRIBUTE, {field: found}))
+        return events
+
+    def follow(self, callback, is_done, poll_interval=1.0):
+        r"""
+        Follow the logfile until the calculation is done, calling a
+        function on each progress event.
+
+        Parameters
+        ----------
+        callback : function
+            Function called with each progress event.
+        is_done : function
+            Function returning `True` once the calculation is done (the
+            end of the logfile is then read before returning).
+        poll_interval : float
+            Number of seconds between two reads of the logfile.
+        """
+        while True:
+            done = is_done()
+            for event in self.read():
+                callback(event)
+            if done:
+                break
+            time.sleep(poll_interval)
+
+    async def follow_async(self, is_done, poll_interval=1.0):
+        r"""
+        Asynchronous iterator over the progress events of the logfile,
+        until the calculation is done.
+
+        Parameters
+        ----------
+        is_done : function
+            Function returning `True` once the calculation is done (the
+            end of the logfile is then read before stopping).
+        poll_interval : float
+            Number of seconds between two reads of the logfile.
+        """
+        import asyncio
+
+        while True:
+            done = is_done()
+            for event in self.read():
+                yield event
+            if done:
+                break
+            await asyncio.sleep(poll_interval)
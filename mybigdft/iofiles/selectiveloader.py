@@ -0,0 +1,470 @@
+r"""
+The :func:`selective_load_all` function reads the documents of a YAML
+stream, such as a BigDFT logfile, but only builds the parts of each
+document that were requested. It works on the events emitted by the
+YAML parser (libyaml if available), so that the skipped subtrees (for
+instance, the whole history of the SCF iterations) are never turned into
+Python objects.
+
+The requested parts are given as paths, that is lists of keys (for the
+mappings) and indices (for the sequences, -1 meaning the last item):
+
+>>> stream = '''
+... a: {b: 1, c: [1, 2, 3]}
+... d: [{e: 1, f: 2}, {e: 3, f: 4}]
+... g: 5
+... '''
+>>> docs = selective_load_all(stream, [["a", "b"], ["d", -1, "e"]])
+>>> next(docs) == {"a": {"b": 1}, "d": [None, {"e": 3}]}
+True
+
+A mapping key can also be a pattern, such as ``"psppar.*"`` (see
+:mod:`fnmatch`).
+
+The same selection can be applied to documents that were already loaded,
+using :func:`prune`.
+"""
+
+from __future__ import absolute_import
+import fnmatch
+import yaml
+from yaml.events import (
+    AliasEvent,
+    ScalarEvent,
+    MappingStartEvent,
+    CollectionStartEvent,
+    CollectionEndEvent,
+    DocumentStartEvent,
+)
+from yaml.nodes import ScalarNode
+
+try:
+    from yaml import CLoader as Loader
+except ImportError:  # pragma: no cover
+    from yaml import Loader
+
+
+__all__ = ["selective_load_all", "prune", "UnresolvedAliasError"]
+
+
+class UnresolvedAliasError(yaml.YAMLError):
+    r"""
+    Raised when a requested part of a document refers to an anchored
+    node that was skipped.
+    """
+
+
+# Marker of the nodes of the tree of paths that must be fully built
+_FULL = object()
+# Marker of the anchored nodes that were skipped or partially built
+_UNAVAILABLE = object()
+
+
+def selective_load_all(stream, paths):
+    r"""
+    Read all the documents of a YAML stream, keeping only the requested
+    parts of each document.
+
+    Sequences are kept with their length up to the last item kept, the
+    items that are not requested being set to `None`.
+
+    Parameters
+    ----------
+    stream : str or file object
+        YAML stream.
+    paths : list
+        Paths of the parts of the documents to keep.
+
+    Yields
+    ------
+    Python object
+        Pruned documents of the stream.
+
+    Raises
+    ------
+    UnresolvedAliasError
+        If a kept part of a document refers to an anchored node that
+        was not built.
+    """
+    tree = _make_tree(paths)
+    events = yaml.parse(stream, Loader=Loader)
+    builder = _Builder(events)
+    for event in events:
+        if isinstance(event, DocumentStartEvent):
+            builder.anchors = {}
+            root = next(events)
+            if _FULL in tree:
+                yield builder.build(root)
+            else:
+                yield builder.select(root, tree)
+
+
+def prune(doc, paths):
+    r"""
+    Keep only the requested parts of a document, as
+    :func:`selective_load_all` would.
+
+    Parameters
+    ----------
+    doc
+        Document (as loaded from a YAML stream).
+    paths : list
+        Paths of the parts of the document to keep.
+
+    Returns
+    -------
+    Python object
+        Pruned document (sharing its values with the initial document).
+
+    >>> prune({"a": {"b": 1, "c": 2}, "d": [1, 2, 3]}, [["a", "b"], ["d", 1]])
+    {'a': {'b': 1}, 'd': [None, 2]}
+    """
+    tree = _make_tree(paths)
+    if _FULL in tree:
+        return doc
+    return _prune(doc, tree)
+
+
+def _prune(value, tree):
+    r"""
+    Parameters
+    ----------
+    value
+        Value of a node of a document.
+    tree : dict
+        Tree of the paths to keep, relative to the node.
+
+    Returns
+    -------
+    Python object
+        Pruned value of the node.
+    """
+    if isinstance(value, dict):
+        pruned = {}
+        for key, item in value.items():
+            subtree = _mapping_subtree(tree, key)
+            if _FULL in subtree:
+                pruned[key] = item
+            elif subtree:
+                pruned[key] = _prune(item, subtree)
+        return pruned
+    elif isinstance(value, list):
+        last = len(value) - 1
+        pruned = []
+        n_kept = 0
+        for index, item in enumerate(value):
+            subtree = tree.get(index, {})
+            if index == last:
+                subtree = _merge(subtree, tree.get(-1, {}))
+            if _FULL in subtree:
+                pruned.append(item)
+            elif subtree:
+                pruned.append(_prune(item, subtree))
+            else:
+                pruned.append(None)
+            if subtree:
+                n_kept = index + 1
+        del pruned[n_kept:]
+        return pruned
+    return value
+
+
+def _make_tree(paths):
+    r"""
+    Parameters
+    ----------
+    paths : list
+        Paths of the parts of the documents to keep.
+
+    Returns
+    -------
+    dict
+        Tree of the paths, whose leaves are marked by the
+        :data:`_FULL` key.
+    """
+    tree = {}
+    for path in paths:
+        node = tree
+        for key in path:
+            node = node.setdefault(key, {})
+        node[_FULL] = True
+    return tree
+
+
+class _Builder(object):
+    r"""
+    Build the Python objects from the YAML events.
+    """
+
+    def __init__(self, events):
+        r"""
+        Parameters
+        ----------
+        events : generator
+            YAML events of the stream.
+        """
+        self.events = events
+        self.anchors = {}
+        self._loader = Loader("")
+        self._scalars = {}
+
+    def scalar(self, event):
+        r"""
+        Parameters
+        ----------
+        event : ScalarEvent
+            Event of a scalar node.
+
+        Returns
+        -------
+        Python object
+            Value of the scalar, as the YAML loader would construct it.
+        """
+        key = (event.tag, event.value, event.implicit, event.style)
+        try:
+            return self._scalars[key]
+        except KeyError:
+            pass
+        loader = self._loader
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(ScalarNode, event.value, event.implicit)
+        node = ScalarNode(tag, event.value, style=event.style)
+        constructor = loader.yaml_constructors.get(tag)
+        if constructor is not None:
+            value = constructor(loader, node)
+        else:  # pragma: no cover
+            value = loader.construct_object(node)
+            loader.constructed_objects = {}
+        if len(self._scalars) < 100000:
+            self._scalars[key] = value
+        return value
+
+    def build(self, event):
+        r"""
+        Build the whole node starting with the given event.
+
+        Parameters
+        ----------
+        event : Event
+            First event of the node.
+
+        Returns
+        -------
+        Python object
+            Value of the node.
+        """
+        if isinstance(event, ScalarEvent):
+            value = self.scalar(event)
+        elif isinstance(event, AliasEvent):
+            return self.alias(event)
+        elif isinstance(event, MappingStartEvent):
+            value = {}
+            if event.anchor is not None:
+                self.anchors[event.anchor] = value
+            events = self.events
+            for key_event in events:
+                if isinstance(key_event, CollectionEndEvent):
+                    break
+                key = self.build(key_event)
+                value[key] = self.build(next(events))
+        else:
+            value = []
+            if event.anchor is not None:
+                self.anchors[event.anchor] = value
+            for item_event in self.events:
+                if isinstance(item_event, CollectionEndEvent):
+                    break
+                value.append(self.build(item_event))
+        if event.anchor is not None:
+            self.anchors[event.anchor] = value
+        return value
+
+    def alias(self, event):
+        r"""
+        Parameters
+        ----------
+        event : AliasEvent
+            Event of an alias.
+
+        Returns
+        -------
+        Python object
+            Value of the anchored node.
+
+        Raises
+        ------
+        UnresolvedAliasError
+            If the anchored node was not built.
+        """
+        value = self.anchors.get(event.anchor, _UNAVAILABLE)
+        if value is _UNAVAILABLE:
+            raise UnresolvedAliasError(
+                "The anchor '{}' was not loaded.".format(event.anchor)
+            )
+        return value
+
+    def select(self, event, tree):
+        r"""
+        Build the requested parts of the node starting with the given
+        event.
+
+        Parameters
+        ----------
+        event : Event
+            First event of the node.
+        tree : dict
+            Tree of the paths to keep, relative to the node.
+
+        Returns
+        -------
+        Python object
+            Pruned value of the node.
+        """
+        if isinstance(event, ScalarEvent):
+            return self.build(event)
+        elif isinstance(event, AliasEvent):
+            return self.alias(event)
+        if event.anchor is not None:
+            # A partially built node cannot be used by an alias
+            self.anchors[event.anchor] = _UNAVAILABLE
+        events = self.events
+        if isinstance(event, MappingStartEvent):
+            value = {}
+            for key_event in events:
+                if isinstance(key_event, CollectionEndEvent):
+                    break
+                key = self.build(key_event)
+                subtree = _mapping_subtree(tree, key)
+                value_event = next(events)
+                if _FULL in subtree:
+                    value[key] = self.build(value_event)
+                elif subtree:
+                    value[key] = self.select(value_event, subtree)
+                else:
+                    self.skip(value_event)
+        else:
+            value = []
+            keep_last = -1 in tree
+            n_kept = 0  # Length of the sequence up to the last item kept
+            for index, item_event in enumerate(events):
+                if isinstance(item_event, CollectionEndEvent):
+                    break
+                if keep_last and value and index - 1 not in tree:
+                    # The previous item is not the last one after all
+                    value[-1] = None
+                subtree = _sequence_subtree(tree, index)
+                if _FULL in subtree:
+                    value.append(self.build(item_event))
+                elif subtree:
+                    value.append(self.select(item_event, subtree))
+                else:
+                    self.skip(item_event)
+                    value.append(None)
+                if keep_last or index in tree:
+                    n_kept = index + 1
+            del value[n_kept:]
+        return value
+
+    def skip(self, event):
+        r"""
+        Skip the node starting with the given event. Its anchored nodes
+        are still built if they are scalars or flow collections (since
+        they are small and might be used by an alias).
+
+        Parameters
+        ----------
+        event : Event
+            First event of the node.
+        """
+        depth = 0
+        events = self.events
+        while True:
+            if isinstance(event, CollectionStartEvent):
+                if event.anchor is not None:
+                    if event.flow_style:
+                        self.build(event)
+                    else:
+                        self.anchors[event.anchor] = _UNAVAILABLE
+                        depth += 1
+                else:
+                    depth += 1
+            elif isinstance(event, CollectionEndEvent):
+                depth -= 1
+            elif isinstance(event, ScalarEvent) and event.anchor is not None:
+                self.anchors[event.anchor] = self.scalar(event)
+            if depth == 0:
+                return
+            event = next(events)
+
+
+def _mapping_subtree(tree, key):
+    r"""
+    Parameters
+    ----------
+    tree : dict
+        Tree of the paths to keep, relative to a mapping.
+    key
+        Key of an item of the mapping.
+
+    Returns
+    -------
+    dict
+        Tree of the paths to keep, relative to the value of the item.
+    """
+    subtree = tree.get(key, {})
+    if isinstance(key, str):
+        for pattern, other in tree.items():
+            if (
+                isinstance(pattern, str)
+                and "*" in pattern
+                and pattern != key
+                and fnmatch.fnmatchcase(key, pattern)
+            ):
+                subtree = _merge(subtree, other)
+    return subtree
+
+
+def _sequence_subtree(tree, index):
+    r"""
+    Parameters
+    ----------
+    tree : dict
+        Tree of the paths to keep, relative to a sequence.
+    index : int
+        Index of an item of the sequence.
+
+    Returns
+    -------
+    dict
+        Tree of the paths to keep, relative to the item (it might be
+        the last one).
+    """
+    return _merge(tree.get(index, {}), tree.get(-1, {}))
+
+
+def _merge(tree1, tree2):
+    r"""
+    Parameters
+    ----------
+    tree1 : dict
+        Tree of paths.
+    tree2 : dict
+        Another tree of paths.
+
+    Returns
+    -------
+    dict
+        Union of both trees.
+    """
+    if not tree1:
+        return tree2
+    if not tree2:
+        return tree1
+    merged = dict(tree1)
+    for key, subtree in tree2.items():
+        if key == _FULL:
+            merged[key] = True
+        else:
+            merged[key] = _merge(merged.get(key, {}), subtree)
+    return merged
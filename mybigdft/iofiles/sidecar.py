@@ -0,0 +1,199 @@
+r"""
+The functions defined here allow to store the parts of a logfile that
+are used to initialize a :class:`~mybigdft.iofiles.logfiles.Logfile`
+instance in a compact sidecar file, written next to the logfile. Reading
+it is much faster than parsing the logfile again.
+
+The sidecar of a logfile ``log.yaml`` is the hidden file
+``.log.yaml.npz`` (a numpy archive). It is only used as long as the
+logfile it was created from did not change (same size, modification
+time and content at its beginning and at its end).
+"""
+
+from __future__ import absolute_import
+import os
+import json
+import hashlib
+import numpy as np
+
+__all__ = ["sidecar_name", "read_sidecar", "write_sidecar", "remove_sidecar"]
+
+
+#: Version of the sidecar format (sidecars of other versions are ignored)
+SIDECAR_VERSION = 1
+#: Size (in bytes) of the beginning and end of the logfile used to check
+#: that it did not change
+CHECKED_SIZE = 2**16
+#: Key of the forces in a logfile
+FORCES_KEY = "Atomic Forces (Ha/Bohr)"
+
+
+def sidecar_name(filename):
+    r"""
+    Parameters
+    ----------
+    filename : str
+        Name of a logfile.
+
+    Returns
+    -------
+    str
+        Name of its sidecar file.
+
+    >>> sidecar_name("tests/log.yaml")
+    'tests/.log.yaml.npz'
+    """
+    dirname, basename = os.path.split(filename)
+    return os.path.join(dirname, "." + basename + ".npz")
+
+
+def _signature(filename, content_id):
+    r"""
+    Parameters
+    ----------
+    filename : str
+        Name of a logfile.
+    content_id : str
+        Identifier of the parts of the logfile stored in the sidecar.
+
+    Returns
+    -------
+    dict
+        Signature of the logfile, allowing to check that its sidecar is
+        still valid.
+    """
+    stat = os.stat(filename)
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        digest.update(f.read(CHECKED_SIZE))
+        if stat.st_size > CHECKED_SIZE:
+            f.seek(max(CHECKED_SIZE, stat.st_size - CHECKED_SIZE))
+            digest.update(f.read())
+    return {
+        "version": SIDECAR_VERSION,
+        "content": content_id,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "digest": digest.hexdigest(),
+    }
+
+
+def read_sidecar(filename, content_id):
+    r"""
+    Parameters
+    ----------
+    filename : str
+        Name of a logfile.
+    content_id : str
+        Identifier of the parts of the logfile stored in the sidecar.
+
+    Returns
+    -------
+    list or None
+        Documents stored in the sidecar of the logfile, or `None` if
+        there is no valid sidecar. The forces are given as numpy arrays.
+    """
+    try:
+        with np.load(sidecar_name(filename), allow_pickle=False) as sidecar:
+            header = _loads(sidecar["header"])
+            if header != _signature(filename, content_id):
+                return None
+            docs = _loads(sidecar["docs"])
+            for i, doc in enumerate(docs):
+                forces = "forces_{}".format(i)
+                if forces in sidecar:
+                    doc[FORCES_KEY] = sidecar[forces]
+    except (IOError, OSError, ValueError, KeyError):
+        return None
+    return docs
+
+
+def write_sidecar(filename, docs, content_id):
+    r"""
+    Write the sidecar of a logfile. Nothing is written if the documents
+    cannot be stored faithfully or if the sidecar cannot be written
+    (for instance, in a read-only directory).
+
+    Parameters
+    ----------
+    filename : str
+        Name of a logfile.
+    docs : list
+        Parts of the documents of the logfile to store.
+    content_id : str
+        Identifier of the parts of the logfile stored in the sidecar.
+    """
+    docs = [dict(doc) if isinstance(doc, dict) else doc for doc in docs]
+    arrays = {}
+    for i, doc in enumerate(docs):
+        if isinstance(doc, dict) and doc.get(FORCES_KEY) is not None:
+            try:
+                forces = doc.pop(FORCES_KEY)
+                values = [list(force.values())[0] for force in forces]
+                arrays["forces_{}".format(i)] = np.array(values, dtype=float)
+            except (AttributeError, IndexError, TypeError, ValueError):
+                return
+    try:
+        dump = _dumps(docs)
+        if _loads(dump) != docs:
+            # Some values (such as non-string keys) are not preserved
+            return
+    except (TypeError, ValueError):
+        return
+    sidecar = sidecar_name(filename)
+    tmp_sidecar = sidecar + ".{}.tmp.npz".format(os.getpid())
+    try:
+        header = _dumps(_signature(filename, content_id))
+        with open(tmp_sidecar, "wb") as f:
+            np.savez(f, header=header, docs=dump, **arrays)
+        os.replace(tmp_sidecar, sidecar)
+    except (IOError, OSError):
+        try:
+            os.remove(tmp_sidecar)
+        except OSError:
+            pass
+
+
+def _dumps(obj):
+    r"""
+    Parameters
+    ----------
+    obj
+        Object that can be serialized in JSON.
+
+    Returns
+    -------
+    numpy.ndarray
+        JSON serialization of the object, as an array of bytes.
+    """
+    return np.frombuffer(json.dumps(obj).encode("utf-8"), dtype=np.uint8)
+
+
+def _loads(array):
+    r"""
+    Parameters
+    ----------
+    array : numpy.ndarray
+        JSON serialization of an object, as an array of bytes.
+
+    Returns
+    -------
+    Python object
+        Deserialized object.
+    """
+    return json.loads(array.tobytes().decode("utf-8"))
+
+
+def remove_sidecar(filename):
+    r"""
+    Remove the sidecar of a logfile, if any.
+
+    Parameters
+    ----------
+    filename : str
+        Name of a logfile.
+    """
+    try:
+        os.remove(sidecar_name(filename))
+    except OSError:
+        pass
@@ -0,0 +1,142 @@
+r"""
+The :func:`logfile_status` function tells whether a BigDFT calculation
+is over by looking at the end of its logfile, without parsing it. This
+allows to know which calculations of a large set of run directories are
+still to be run in a matter of seconds.
+
+The status of a logfile is the one the
+:class:`~mybigdft.iofiles.logfiles.Logfile` class would give when
+reading it:
+
+* :data:`COMPLETE` if the last document of the logfile contains the
+  energy, the forces or the walltime of the calculation,
+* :data:`ACCEPTABLE` if it does not, but the run stopped because of a
+  warning that is known to be harmless (such logfiles are found in
+  geometry optimizations),
+* :data:`INCOMPLETE` otherwise (the calculation crashed or is still
+  running),
+* :data:`MISSING` if there is no logfile.
+
+>>> logfile_status("tests/log.yaml")
+'complete'
+"""
+
+from __future__ import absolute_import
+import os
+import re
+import mmap
+from .trajectory import document_offsets
+
+
+__all__ = ["logfile_status", "COMPLETE", "ACCEPTABLE", "INCOMPLETE", "MISSING"]
+
+
+#: Status of a logfile whose calculation is over
+COMPLETE = "complete"
+#: Status of a logfile whose calculation stopped because of a harmless
+#: warning
+ACCEPTABLE = "acceptable"
+#: Status of a logfile whose calculation is not over
+INCOMPLETE = "incomplete"
+#: Status of a logfile that does not exist
+MISSING = "missing"
+#: Size (in bytes) of the end of a logfile that is read first
+TAIL_SIZE = 2**14
+#: Warning making an incomplete logfile acceptable
+AVOIDABLE_WARNING = (
+    "The norm of the residue is too large, need to recalculate input wavefunctions"
+)
+
+# Document start marker, at the beginning of a line
+_DOCUMENT_START = re.compile(rb"^---(?=[ \t\r\n]|$)", re.MULTILINE)
+# Top-level keys only written at the end of a calculation
+_FINAL_KEYS = re.compile(
+    rb"^ ?(?:Walltime since initialization|Energy \(Hartree\)|"
+    rb"Atomic Forces \(Ha/Bohr\))[ \t]*:",
+    re.MULTILINE,
+)
+# Key of the last SCF iteration, giving the energy of the calculation
+_LAST_ITERATION = re.compile(rb"^[ \t-]*Last Iteration[ \t]*:", re.MULTILINE)
+# Geometry optimization parameters, only found in the first document
+_GEOPT = re.compile(rb"^ ?geopt[ \t]*:", re.MULTILINE)
+
+
+def logfile_status(filename, tail_size=TAIL_SIZE):
+    r"""
+    Find the status of a logfile without parsing it. Only its end is
+    read, unless its calculation does not look over: the whole last
+    document is then searched (still without parsing it).
+
+    Only the last document of a logfile matters, since BigDFT starts a
+    new document once the previous one is over.
+
+    Parameters
+    ----------
+    filename : str
+        Name of a logfile.
+    tail_size : int
+        Size (in bytes) of the end of the logfile read first.
+
+    Returns
+    -------
+    str
+        Status of the logfile (:data:`COMPLETE`, :data:`ACCEPTABLE`,
+        :data:`INCOMPLETE` or :data:`MISSING`).
+    """
+    if not os.path.exists(filename):
+        return MISSING
+    with open(filename, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        start = max(0, size - tail_size)
+        f.seek(start)
+        tail = f.read()
+    if start > 0:
+        # Drop the first line, that is likely to be cut
+        tail = tail[tail.find(b"\n") + 1 :]
+        start = size - len(tail)
+    doc_starts = [match.start() for match in _DOCUMENT_START.finditer(tail)]
+    if doc_starts:
+        tail = tail[doc_starts[-1] :]
+        offset = start + doc_starts[-1]
+    elif start == 0:
+        offset = 0
+    else:
+        offset = None
+    if _FINAL_KEYS.search(tail):
+        return COMPLETE
+    if size == 0:
+        return INCOMPLETE
+    if offset is None:
+        # The last document begins before the end that was read
+        offset = document_offsets(filename)[-1]
+    with open(filename, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return _search_last_document(data, offset)
+        finally:
+            data.close()
+
+
+def _search_last_document(data, offset):
+    r"""
+    Parameters
+    ----------
+    data : mmap.mmap
+        Content of a logfile whose end does not contain the final keys
+        of a calculation.
+    offset : int
+        Offset (in bytes) of the beginning of its last document.
+
+    Returns
+    -------
+    str
+        Status of the logfile.
+    """
+    if _FINAL_KEYS.search(data, offset) or _LAST_ITERATION.search(data, offset):
+        return COMPLETE
+    if data.find(AVOIDABLE_WARNING.encode(), offset) >= 0 and not _GEOPT.search(
+        data, offset
+    ):
+        return ACCEPTABLE
+    return INCOMPLETE
@@ -0,0 +1,687 @@
+r"""
+The functions and classes defined here allow to read the documents of a
+logfile containing many of them (such as the logfile of a geometry
+optimization) one at a time, without reading the whole logfile.
+
+The positions of the documents in the logfile are found by
+:func:`document_offsets`, which only looks for the document start
+markers. Each document can then be read independently with
+:func:`read_document`.
+
+The :class:`Trajectory` class uses them to give access to the geometries,
+energies and maximal forces of the steps of a geometry optimization,
+while keeping only a few geometries in memory.
+
+Long trajectories (for instance, those of the relaxations driven by a
+machine learning model) can be stored on disk in a
+:class:`TrajectoryStore`, whose positions are a memory-mapped array of
+shape :math:`(n_{frames}, n_{at}, 3)`.
+"""
+
+from __future__ import absolute_import
+import os
+import re
+import json
+import mmap
+from collections import Sequence, OrderedDict
+import yaml
+
+try:
+    from yaml import CLoader as Loader
+except ImportError:  # pragma: no cover
+    from yaml import Loader
+import numpy as np
+from .posinp import Posinp
+from .selectiveloader import selective_load_all, UnresolvedAliasError
+
+
+__all__ = ["document_offsets", "read_document", "Trajectory", "TrajectoryStore"]
+
+
+#: Paths of the energy in a logfile document
+ENERGY_PATHS = [
+    ["Last Iteration", "FKS"],
+    ["Last Iteration", "EKS"],
+    ["Energy (Hartree)"],
+]
+#: Paths of the maximal force in a logfile document
+FORCEMAX_PATHS = [
+    ["Geometry", "FORCES norm(Ha/Bohr)", "maxval"],
+    ["Clean forces norm (Ha/Bohr)", "maxval"],
+]
+#: Paths of the geometry in a logfile document (the input positions
+#: only being found in the first document)
+POSINP_PATHS = [["posinp"], ["Atomic structure"]]
+#: Maximal number of geometries kept in memory by a Trajectory
+MAX_CACHED_POSINPS = 16
+
+# Document start marker, at the beginning of a line
+_DOCUMENT_START = re.compile(rb"^---(?=[ \t\r\n]|$)", re.MULTILINE)
+# Line with some content (neither blank nor a comment)
+_CONTENT_LINE = re.compile(rb"^[ \t]*[^ \t\r\n#%]", re.MULTILINE)
+
+
+def document_offsets(filename):
+    r"""
+    Parameters
+    ----------
+    filename : str
+        Name of a YAML file.
+
+    Returns
+    -------
+    list
+        Offsets (in bytes) of the beginning of each document in the
+        file.
+
+    >>> document_offsets("tests/log.yaml")
+    [0]
+    >>> len(document_offsets("tests/log-HCN.yaml"))
+    9
+    """
+    with open(filename, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            return [0]
+        try:
+            offsets = [match.start() for match in _DOCUMENT_START.finditer(data)]
+            # The first document may have no start marker
+            if not offsets or (
+                offsets[0] > 0 and _CONTENT_LINE.search(data, 0, offsets[0])
+            ):
+                offsets.insert(0, 0)
+        finally:
+            data.close()
+    return offsets
+
+
+def read_document(filename, index, offsets=None, paths=None):
+    r"""
+    Read a single document of a YAML file.
+
+    Parameters
+    ----------
+    filename : str
+        Name of a YAML file.
+    index : int
+        Index of the document in the file.
+    offsets : list or None
+        Offsets of the documents in the file (found by
+        :func:`document_offsets` if `None`).
+    paths : list or None
+        Paths of the parts of the document to read (see
+        :func:`~mybigdft.iofiles.selectiveloader.selective_load_all`).
+        The whole document is read if `None`.
+
+    Returns
+    -------
+    Python object
+        Document (or the requested parts of the document).
+
+    >>> doc = read_document("tests/log-HCN.yaml", 1, paths=[["Energy (Hartree)"]])
+    >>> doc
+    {'Energy (Hartree)': -16.189791554674812}
+    """
+    if offsets is None:
+        offsets = document_offsets(filename)
+    if index < 0:
+        index += len(offsets)
+    start = offsets[index]
+    with open(filename, "rb") as f:
+        f.seek(start)
+        if index + 1 < len(offsets):
+            data = f.read(offsets[index + 1] - start)
+        else:
+            data = f.read()
+    text = data.decode("utf-8")
+    if paths is not None:
+        try:
+            return next(selective_load_all(text, paths))
+        except UnresolvedAliasError:  # pragma: no cover
+            pass
+    return yaml.load(text, Loader=Loader)
+
+
+def _find_value(doc, paths):
+    r"""
+    Parameters
+    ----------
+    doc : dict
+        Document of a logfile.
+    paths : list
+        Paths where the value might be found, by order of preference.
+
+    Returns
+    -------
+    Python object
+        First value found (`None` if there is none).
+
+    >>> _find_value({"a": {"b": [1, 2]}}, [["c"], ["a", "b", -1]])
+    2
+    """
+    for path in paths:
+        value = doc
+        for key in path:
+            try:
+                value = value[key]
+            except (KeyError, IndexError, TypeError):
+                value = None
+                break
+        if value is not None:
+            return value
+    return None
+
+
+class Trajectory(Sequence):
+    r"""
+    Sequence of the geometries of the steps of a geometry optimization,
+    with their energy and maximal force.
+
+    When initialized from a logfile, the geometries are only read when
+    requested, a few of them being kept in memory. The energies and
+    maximal forces are read from the whole logfile the first time they
+    are used, without keeping anything else.
+
+    >>> traj = Trajectory.from_file("tests/log-HCN.yaml")
+    >>> len(traj)
+    9
+    >>> traj.energies.shape
+    (9,)
+    >>> traj[-1].units
+    'angstroem'
+    """
+
+    def __init__(self, posinps=None, energies=None, forcemax=None):
+        r"""
+        Parameters
+        ----------
+        posinps : list or None
+            Geometries of the steps.
+        energies : list or None
+            Energies of the steps (in Hartree).
+        forcemax : list or None
+            Maximal forces of the steps (in Ha/Bohr).
+        """
+        self._posinps = posinps
+        self._energies = _to_array(energies)
+        self._forcemax = _to_array(forcemax)
+        self._filename = None
+        self._offsets = None
+        self._cache = OrderedDict()
+
+    @classmethod
+    def from_file(cls, filename, offsets=None):
+        r"""
+        Parameters
+        ----------
+        filename : str
+            Name of the logfile of a geometry optimization.
+        offsets : list or None
+            Offsets of the documents in the logfile (found by
+            :func:`document_offsets` if `None`).
+
+        Returns
+        -------
+        Trajectory
+            Trajectory read from the logfile when needed.
+        """
+        traj = cls()
+        traj._filename = filename
+        if offsets is None:
+            offsets = document_offsets(filename)
+        traj._offsets = offsets
+        return traj
+
+    @classmethod
+    def from_logs(cls, logs):
+        r"""
+        Parameters
+        ----------
+        logs : list
+            Logfiles of the steps of a geometry optimization.
+
+        Returns
+        -------
+        Trajectory
+            Trajectory of the logfiles.
+        """
+        return cls(
+            posinps=[log.posinp for log in logs],
+            energies=[log.energy for log in logs],
+            forcemax=[log.forcemax for log in logs],
+        )
+
+    def __len__(self):
+        if self._posinps is not None:
+            return len(self._posinps)
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if self._posinps is not None:
+            return self._posinps[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Trajectory index out of range")
+        try:
+            self._cache.move_to_end(index)
+            return self._cache[index]
+        except KeyError:
+            pass
+        doc = read_document(self._filename, index, self._offsets, POSINP_PATHS)
+        posinp = Posinp.from_dict(_find_value(doc, POSINP_PATHS))
+        self._cache[index] = posinp
+        if len(self._cache) > MAX_CACHED_POSINPS:
+            self._cache.popitem(last=False)
+        return posinp
+
+    @property
+    def energies(self):
+        r"""
+        Returns
+        -------
+        numpy.ndarray
+            Energy of each step (in Hartree), NaN if it is unknown.
+        """
+        if self._energies is None:
+            self._read_summary()
+        return self._energies
+
+    @property
+    def forcemax(self):
+        r"""
+        Returns
+        -------
+        numpy.ndarray
+            Maximal force of each step (in Ha/Bohr), NaN if it is
+            unknown.
+        """
+        if self._forcemax is None:
+            self._read_summary()
+        return self._forcemax
+
+    def _read_summary(self):
+        r"""
+        Read the energy and maximal force of each step, one document
+        at a time.
+        """
+        n_steps = len(self)
+        energies = np.full(n_steps, np.nan)
+        forcemax = np.full(n_steps, np.nan)
+        for i in range(n_steps):
+            doc = read_document(
+                self._filename, i, self._offsets, ENERGY_PATHS + FORCEMAX_PATHS
+            )
+            energies[i] = _to_float(_find_value(doc, ENERGY_PATHS))
+            forcemax[i] = _to_float(_find_value(doc, FORCEMAX_PATHS))
+        self._energies = energies
+        self._forcemax = forcemax
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_cache"] = OrderedDict()
+        return state
+
+    def store(self, directory):
+        r"""
+        Store the trajectory on disk.
+
+        Parameters
+        ----------
+        directory : str
+            Directory of the trajectory store.
+
+        Returns
+        -------
+        TrajectoryStore
+            Trajectory store containing the geometries, energies and
+            maximal forces of the trajectory.
+        """
+        return TrajectoryStore.from_posinps(directory, self)
+
+
+class TrajectoryStore(Sequence):
+    r"""
+    Trajectory of a system stored on disk, in a directory containing:
+
+    * the positions of the atoms at each frame, as a raw array of
+      shape :math:`(n_{frames}, n_{at}, 3)`,
+    * the energy and maximal force of each frame, as raw arrays of shape
+      :math:`(n_{frames},)`,
+    * the description of the system (types of the atoms, units,
+      boundary conditions and cell) in a JSON file.
+
+    The arrays are memory-mapped, so that they can be sliced without
+    reading the whole trajectory. Frames can be appended while the
+    trajectory is being read, even by another process.
+
+    >>> import tempfile
+    >>> from mybigdft import Posinp
+    >>> pos = Posinp.from_arrays(['N', 'N'], [[0, 0, 0], [0, 0, 1.1]],
+    ...                          'angstroem', 'free')
+    >>> store = TrajectoryStore.create(tempfile.mkdtemp(), pos)
+    >>> for i in range(3):
+    ...     store.append(pos.translate([0, 0, i]), energy=-1.0*i)
+    >>> store.positions.shape
+    (3, 2, 3)
+    >>> print(store.energies)
+    [-0. -1. -2.]
+    >>> store[-1] == pos.translate([0, 0, 2])
+    True
+    """
+
+    METADATA_NAME = "metadata.json"
+    POSITIONS_NAME = "positions.f8"
+    ENERGIES_NAME = "energies.f8"
+    FORCEMAX_NAME = "forcemax.f8"
+
+    def __init__(self, directory):
+        r"""
+        Parameters
+        ----------
+        directory : str
+            Directory of an existing trajectory store (see
+            :meth:`create`).
+        """
+        self._directory = directory
+        with open(os.path.join(directory, self.METADATA_NAME)) as f:
+            metadata = json.load(f)
+        self._types = metadata["types"]
+        self._units = metadata["units"]
+        self._boundary_conditions = metadata["boundary_conditions"]
+        self._cell = metadata["cell"]
+        self._arrays = {}
+
+    @classmethod
+    def create(cls, directory, posinp):
+        r"""
+        Create an empty trajectory store.
+
+        Parameters
+        ----------
+        directory : str
+            Directory of the trajectory store (created if needed). Any
+            trajectory previously stored there is removed.
+        posinp : Posinp
+            Geometry defining the system (the types of its atoms, the
+            units, the boundary conditions and the cell).
+
+        Returns
+        -------
+        TrajectoryStore
+            Empty trajectory store.
+        """
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        for name in [cls.POSITIONS_NAME, cls.ENERGIES_NAME, cls.FORCEMAX_NAME]:
+            open(os.path.join(directory, name), "wb").close()
+        metadata = {
+            "types": list(posinp.types),
+            "units": posinp.units,
+            "boundary_conditions": posinp.boundary_conditions,
+            "cell": posinp.cell,
+        }
+        with open(os.path.join(directory, cls.METADATA_NAME), "w") as f:
+            json.dump(metadata, f)
+        return cls(directory)
+
+    @classmethod
+    def from_posinps(cls, directory, posinps, energies=None, forcemax=None):
+        r"""
+        Store a sequence of geometries of the same system, such as the
+        geometries of a :class:`Trajectory` (for instance, the
+        :attr:`~mybigdft.iofiles.logfiles.GeoptLogfile.posinps` of a
+        geometry optimization) or a set of displaced geometries.
+
+        Parameters
+        ----------
+        directory : str
+            Directory of the trajectory store.
+        posinps : Sequence
+            Geometries to store.
+        energies : Sequence or None
+            Energy of each geometry (by default, those of the
+            trajectory, if any).
+        forcemax : Sequence or None
+            Maximal force of each geometry (by default, those of the
+            trajectory, if any).
+
+        Returns
+        -------
+        TrajectoryStore
+            Trajectory store containing the geometries.
+        """
+        if isinstance(posinps, Trajectory):
+            if energies is None:
+                energies = posinps.energies
+            if forcemax is None:
+                forcemax = posinps.forcemax
+        store = cls.create(directory, posinps[0])
+        for i, posinp in enumerate(posinps):
+            store.append(
+                posinp,
+                energy=None if energies is None else energies[i],
+                forcemax=None if forcemax is None else forcemax[i],
+            )
+        return store
+
+    @property
+    def directory(self):
+        r"""
+        Returns
+        -------
+        str
+            Directory of the trajectory store.
+        """
+        return self._directory
+
+    @property
+    def types(self):
+        r"""
+        Returns
+        -------
+        list
+            Type of each atom.
+        """
+        return self._types
+
+    @property
+    def n_at(self):
+        r"""
+        Returns
+        -------
+        int
+            Number of atoms of the system.
+        """
+        return len(self._types)
+
+    def _path(self, name):
+        r"""
+        Parameters
+        ----------
+        name : str
+            Name of a file of the trajectory store.
+
+        Returns
+        -------
+        str
+            Path to the file.
+        """
+        return os.path.join(self.directory, name)
+
+    def __len__(self):
+        frame_size = 8 * 3 * self.n_at
+        return min(
+            os.path.getsize(self._path(self.POSITIONS_NAME)) // frame_size,
+            os.path.getsize(self._path(self.ENERGIES_NAME)) // 8,
+            os.path.getsize(self._path(self.FORCEMAX_NAME)) // 8,
+        )
+
+    def _array(self, name, shape):
+        r"""
+        Parameters
+        ----------
+        name : str
+            Name of a file of the trajectory store.
+        shape : tuple
+            Shape of each frame of the array.
+
+        Returns
+        -------
+        numpy.ndarray
+            Read-only memory-mapped array of all the frames.
+        """
+        n_frames = len(self)
+        array = self._arrays.get(name)
+        if array is None or len(array) != n_frames:
+            if n_frames == 0:
+                array = np.empty((0,) + shape)
+            else:
+                array = np.memmap(
+                    self._path(name),
+                    dtype="<f8",
+                    mode="r",
+                    shape=(n_frames,) + shape,
+                )
+            self._arrays[name] = array
+        return array
+
+    @property
+    def positions(self):
+        r"""
+        Returns
+        -------
+        numpy.ndarray
+            Positions of the atoms at each frame, as a read-only
+            memory-mapped array of shape :math:`(n_{frames}, n_{at}, 3)`.
+        """
+        return self._array(self.POSITIONS_NAME, (self.n_at, 3))
+
+    @property
+    def energies(self):
+        r"""
+        Returns
+        -------
+        numpy.ndarray
+            Energy of each frame, NaN if it is unknown.
+        """
+        return self._array(self.ENERGIES_NAME, ())
+
+    @property
+    def forcemax(self):
+        r"""
+        Returns
+        -------
+        numpy.ndarray
+            Maximal force of each frame, NaN if it is unknown.
+        """
+        return self._array(self.FORCEMAX_NAME, ())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return Posinp.from_arrays(
+            self._types,
+            self.positions[index],
+            self._units,
+            self._boundary_conditions,
+            cell=self._cell,
+        )
+
+    def append(self, positions, energy=None, forcemax=None):
+        r"""
+        Append a frame to the trajectory.
+
+        Parameters
+        ----------
+        positions : Posinp or numpy.ndarray
+            Geometry of the frame, or positions of its atoms.
+        energy : float or None
+            Energy of the frame.
+        forcemax : float or None
+            Maximal force of the frame.
+        """
+        self.extend(
+            [getattr(positions, "positions", positions)],
+            energies=[energy],
+            forcemax=[forcemax],
+        )
+
+    def extend(self, positions, energies=None, forcemax=None):
+        r"""
+        Append many frames to the trajectory.
+
+        Parameters
+        ----------
+        positions : numpy.ndarray
+            Positions of the atoms at each frame, as an array of shape
+            :math:`(n_{frames}, n_{at}, 3)`.
+        energies : Sequence or None
+            Energy of each frame.
+        forcemax : Sequence or None
+            Maximal force of each frame.
+
+        Raises
+        ------
+        ValueError
+            If the number of atoms is not that of the trajectory.
+        """
+        positions = np.asarray(positions, dtype="<f8")
+        if positions.shape[1:] != (self.n_at, 3):
+            raise ValueError(
+                "The frames must contain {} atoms (got {}).".format(
+                    self.n_at, positions.shape[1]
+                )
+            )
+        n_frames = len(positions)
+        if energies is None:
+            energies = [None] * n_frames
+        if forcemax is None:
+            forcemax = [None] * n_frames
+        # Remove any partially written frame before appending new ones
+        n_written = len(self)
+        names = {
+            self.POSITIONS_NAME: (positions, 8 * 3 * self.n_at),
+            self.ENERGIES_NAME: (_to_array(energies).astype("<f8"), 8),
+            self.FORCEMAX_NAME: (_to_array(forcemax).astype("<f8"), 8),
+        }
+        for name, (values, frame_size) in names.items():
+            with open(self._path(name), "r+b") as f:
+                f.truncate(n_written * frame_size)
+                f.seek(0, os.SEEK_END)
+                f.write(values.tobytes())
+
+
+def _to_float(value):
+    r"""
+    Parameters
+    ----------
+    value : float or None
+        Value read from a logfile.
+
+    Returns
+    -------
+    float
+        The value, NaN if it is `None`.
+    """
+    return np.nan if value is None else float(value)
+
+
+def _to_array(values):
+    r"""
+    Parameters
+    ----------
+    values : list or None
+        Values read from logfiles.
+
+    Returns
+    -------
+    numpy.ndarray or None
+        The values as an array, the missing ones being set to NaN.
+    """
+    if values is None:
+        return None
+    return np.array([_to_float(value) for value in values])
@@ -4,23 +4,50 @@ The :class:`Job` class is the base class defining a BigDFT calculation.
 
 from __future__ import print_function, absolute_import
 import os
+import sys
 import shutil
 import subprocess
-from threading import Timer
+import asyncio
+from threading import Thread, Timer
 from copy import deepcopy
 from mybigdft.iofiles import InputParams, Logfile
 from mybigdft.iofiles.logfiles import GeoptLogfile
+from mybigdft.iofiles.sidecar import sidecar_name, remove_sidecar
+from mybigdft.iofiles.status import INCOMPLETE
+from mybigdft.iofiles.progress import LogfileFollower
 from mybigdft.iofiles.inputparams import clean
+from .pseudos import PseudopotentialStore
+from .streams import StreamSink, CHUNK_SIZE
+from .watchdog import DEFAULT_GNRM_CV
+from .datadir import propagate_data_dir, STRATEGIES, REFLINK, HARDLINK, SYMLINK
 from .globals import BIGDFT_PATH, BIGDFT_TOOL_PATH, DEFAULT_PARAMETERS
 
 
 class Job(object):
     r"""
     This class is meant to define a BigDFT calculation. :meth:`run` is
-    its main method and it must be used in a context manager to ensure
-    that the calculation is run the desired directory.
+    its main method. It runs the calculation in the desired directory
+    without changing the working directory nor the environment of the
+    current process, so that several jobs can be run concurrently (in
+    different threads, for instance). It may still be used in a context
+    manager, going to the directory of the calculation while in it.
+
+    The calculation can also be run by an :mod:`asyncio` event loop,
+    using the :meth:`run_async` coroutine.
     """
 
+    #: Number of seconds a process is given to stop after being sent a
+    #: SIGTERM signal, before being killed.
+    TERMINATION_GRACE_PERIOD = 10
+    #: Number of lines at the end of the standard output and error of a
+    #: running calculation kept in memory (the whole output is written
+    #: in files of the run directory, see :attr:`stdout_name`).
+    OUTPUT_LINES = 100
+    #: Number of seconds between two reads of the logfile of a running
+    #: calculation, when its progress is reported (see
+    #: :attr:`progress_callback`).
+    PROGRESS_POLL_INTERVAL = 1.0
+
     def __init__(
         self,
         name="",
@@ -30,6 +57,8 @@ class Job(object):
         ref_data_dir=None,
         skip=False,
         pseudos=False,
+        data_dir_strategy=REFLINK,
+        quiet=False,
     ):
         r"""
         You may pass input parameters and/or initial geometry (posinp).
@@ -43,7 +72,9 @@ class Job(object):
 
         A reference calculation may be given in order to copy its data
         directory to the present calculation (main use: restart from the
-        wavefunctions of the reference calculation).
+        wavefunctions of the reference calculation). How its files are
+        propagated is set by `data_dir_strategy` (see
+        :mod:`mybigdft.datadir`).
 
         Parameters
         ----------
@@ -68,12 +99,19 @@ class Job(object):
         pseudos : bool
             If `True`, the pseudopotential files stored in $PSEUDODIR
             will be used to complete the job.
+        data_dir_strategy : str
+            Strategy used to propagate the files of the reference data
+            directory: "reflink" (copy-on-write clones where the
+            filesystem supports it), "hardlink", "symlink" or "copy".
+        quiet : bool
+            If `True`, the output of the calculation is not printed on
+            the console (it is still written in the run directory).
 
         Raises
         ------
         ValueError
             If no initial positions are given in the posinp or the input
-            parameters.
+            parameters, or if the data directory strategy is unknown.
 
 
         A Job instance can be initialized by using a posinp only:
@@ -143,11 +181,22 @@ class Job(object):
             raise ValueError("inputparams and posinp do not define the same posinp.")
 
         # Set the base attributes
-        inputparams.params = clean(inputparams.params)
+        inputparams._clean()
         self.inputparams = inputparams
         self.posinp = posinp
+        self._slim_logfile = False
         self.logfile = Logfile()
+        # Logfile read beforehand from the disk (see preload_logfile)
+        self._preloaded_logfile = None
         self.ref_data_dir = ref_data_dir
+        self.data_dir_strategy = data_dir_strategy
+        self.quiet = quiet
+        self.progress_callback = None
+        self.watchdog = None
+        self.manifest = None
+        # Watchdog following the running calculation (see watchdog)
+        self._monitor = None
+        self._stop_reason = None
         self.name = name
         self.skip = skip
         self.is_completed = False
@@ -219,8 +268,28 @@ class Job(object):
 
     @logfile.setter
     def logfile(self, logfile):
+        if self.slim_logfile and isinstance(logfile, Logfile):
+            logfile.slim = True
         self._logfile = logfile
 
+    @property
+    def slim_logfile(self):
+        r"""
+        Returns
+        -------
+        bool
+            If `True`, the logfile of the calculation only keeps in
+            memory the parts of its log giving its attributes (see
+            :attr:`~mybigdft.iofiles.logfiles.Logfile.slim`).
+        """
+        return self._slim_logfile
+
+    @slim_logfile.setter
+    def slim_logfile(self, slim_logfile):
+        self._slim_logfile = bool(slim_logfile)
+        if isinstance(self.logfile, Logfile):
+            self.logfile.slim = self._slim_logfile
+
     @property
     def ref_data_dir(self):
         r"""
@@ -236,6 +305,105 @@ class Job(object):
     def ref_data_dir(self, ref_data_dir):
         self._ref_data_dir = ref_data_dir
 
+    @property
+    def data_dir_strategy(self):
+        r"""
+        Returns
+        -------
+        str
+            Strategy used to propagate the files of the reference data
+            directory to the data directory (see
+            :func:`~mybigdft.datadir.propagate_data_dir`).
+        """
+        return self._data_dir_strategy
+
+    @data_dir_strategy.setter
+    def data_dir_strategy(self, data_dir_strategy):
+        if data_dir_strategy not in STRATEGIES:
+            raise ValueError(
+                "Unknown data directory strategy '{}' (use one of {}).".format(
+                    data_dir_strategy, STRATEGIES
+                )
+            )
+        self._data_dir_strategy = data_dir_strategy
+
+    @property
+    def quiet(self):
+        r"""
+        Returns
+        -------
+        bool
+            If `True`, the output of the calculation is only written in
+            the files of the run directory given by :attr:`stdout_name`
+            and :attr:`stderr_name`, without being printed.
+        """
+        return self._quiet
+
+    @quiet.setter
+    def quiet(self, quiet):
+        self._quiet = bool(quiet)
+
+    @property
+    def progress_callback(self):
+        r"""
+        Returns
+        -------
+        function or None
+            Function called with the job and each
+            :class:`~mybigdft.iofiles.progress.ProgressEvent` (SCF
+            iteration, geometry optimization step, energy...) found in
+            the logfile while the calculation runs (see
+            :class:`~mybigdft.iofiles.progress.LogfileFollower`).
+        """
+        return self._progress_callback
+
+    @progress_callback.setter
+    def progress_callback(self, progress_callback):
+        self._progress_callback = progress_callback
+
+    @property
+    def watchdog(self):
+        r"""
+        Returns
+        -------
+        Watchdog or None
+            Policy stopping the calculation early when it is hopeless
+            (see :class:`~mybigdft.watchdog.Watchdog`), based on its
+            progress read in the logfile while it runs.
+        """
+        return self._watchdog
+
+    @watchdog.setter
+    def watchdog(self, watchdog):
+        self._watchdog = watchdog
+
+    @property
+    def manifest(self):
+        r"""
+        Returns
+        -------
+        WorkflowManifest or None
+            Manifest where the job is recorded once it is over (see
+            :class:`~mybigdft.manifest.WorkflowManifest`).
+        """
+        return self._manifest
+
+    @manifest.setter
+    def manifest(self, manifest):
+        self._manifest = manifest
+
+    @property
+    def stop_reason(self):
+        r"""
+        Returns
+        -------
+        str or None
+            Reason why the last calculation was stopped by the
+            :attr:`watchdog` (`None` if it was not). A stopped job is
+            not completed (see :attr:`is_completed`).
+        """
+        return self._stop_reason
+
     @property
     def pseudos(self):
         r"""
@@ -381,6 +549,36 @@ class Job(object):
     def logfile_name(self, logfile_name):
         self._logfile_name = logfile_name
 
+    @property
+    def stdout_name(self):
+        r"""
+        Returns
+        -------
+        str
+            Name of the file where the standard output of the
+            calculation is written.
+        """
+        return self._stdout_name
+
+    @stdout_name.setter
+    def stdout_name(self, stdout_name):
+        self._stdout_name = stdout_name
+
+    @property
+    def stderr_name(self):
+        r"""
+        Returns
+        -------
+        str
+            Name of the file where the standard error of the calculation
+            is written.
+        """
+        return self._stderr_name
+
+    @stderr_name.setter
+    def stderr_name(self, stderr_name):
+        self._stderr_name = stderr_name
+
     @property
     def is_completed(self):
         r"""
@@ -480,10 +678,29 @@ class Job(object):
             self.input_name = self.name + ".yaml"  # input file name
             self.posinp_name = self.name + ".xyz"  # posinp file name
             self.logfile_name = "log-" + self.input_name  # output file name
+            self.stdout_name = self.name + ".out"  # standard output file name
+            self.stderr_name = self.name + ".err"  # standard error file name
         else:
             self.input_name = "input.yaml"  # input file name
             self.posinp_name = "posinp.xyz"  # posinp file name
             self.logfile_name = "log.yaml"  # output file name
+            self.stdout_name = "bigdft.out"  # standard output file name
+            self.stderr_name = "bigdft.err"  # standard error file name
+
+    def _get_path(self, filename):
+        r"""
+        Parameters
+        ----------
+        filename : str
+            Name of a file (or directory) of the calculation.
+
+        Returns
+        -------
+        str
+            Absolute path to that file, located in the run directory
+            of the calculation.
+        """
+        return os.path.join(self.run_dir, filename)
 
     def __enter__(self):
         r"""
@@ -514,6 +731,7 @@ class Job(object):
         dry_run=False,
         restart_if_incomplete=False,
         timeout=None,
+        cache=None,
     ):
         r"""
         Run the BigDFT calculation if it was not already performed.
@@ -529,6 +747,11 @@ class Job(object):
         If `restart_if_incomplete` is set to `True`, the previously
         existing logfile is removed and the calculation restarts.
 
+        If a `cache` is given, the logfile of an identical calculation
+        (see :class:`~mybigdft.cache.ResultCache`) is retrieved instead
+        of running the calculation. Otherwise, the logfile of the
+        calculation is stored in the cache once it is run.
+
         Parameters
         ----------
         nmpi : int
@@ -546,78 +769,422 @@ class Job(object):
             incomplete.
         timeout : float or int or None
             Number of minutes after which the job must be stopped.
+        cache : ResultCache or None
+            Cache of the results of the calculations.
         """
+        if self._load_from_cache(cache, force_run, dry_run):
+            self._record_in_manifest(dry_run)
+        elif self._must_launch_calculation(force_run, dry_run):
+            command, env = self._prepare_calculation(nmpi, nomp, dry_run)
+            self._launch_calculation(
+                command,
+                timeout,
+                cwd=self.run_dir,
+                env=env,
+                echo=not dry_run,
+                follow_logfile=not dry_run,
+            )
+            self._read_calculation_output(dry_run, timeout)
+            if self.stop_reason is not None:
+                # The calculation is not over: the job is not completed
+                return
+            self._store_in_cache(cache, dry_run)
+            self._record_in_manifest(dry_run)
+        elif self._read_existing_logfile(restart_if_incomplete):
+            self.run(
+                nmpi=nmpi,
+                nomp=nomp,
+                force_run=force_run,
+                dry_run=dry_run,
+                restart_if_incomplete=False,
+                timeout=timeout,
+                cache=cache,
+            )
+        self.is_completed = True
+
+    async def run_async(
+        self,
+        nmpi=1,
+        nomp=1,
+        force_run=False,
+        dry_run=False,
+        restart_if_incomplete=False,
+        timeout=None,
+        cache=None,
+    ):
+        r"""
+        Coroutine running the BigDFT calculation if it was not already
+        performed. It behaves as :meth:`run`, but the bigdft (or
+        bigdft-tool) process is run without blocking the event loop, so
+        that many calculations can be driven concurrently by a single
+        thread.
+
+        Cancelling the task running this coroutine stops the
+        calculation: the process is sent a SIGTERM signal, followed by
+        a SIGKILL signal if it is still running after
+        :attr:`TERMINATION_GRACE_PERIOD` seconds. The same happens when
+        the timeout is reached.
+
+        Parameters
+        ----------
+        nmpi : int
+            Number of MPI tasks.
+        nomp : int
+            Number of OpenMP tasks.
+        force_run : bool
+            If `True`, the calculation is run even though a logfile
+            already exists.
+        dry_run : bool
+            If `True`, the input files are written on disk, but the
+            bigdft-tool command is run instead of the bigdft one.
+        restart_if_incomplete : bool
+            If `True`, the job is restarted if the existing logfile is
+            incomplete.
+        timeout : float or int or None
+            Number of minutes after which the job must be stopped.
+        cache : ResultCache or None
+            Cache of the results of the calculations.
+        """
+        if self._load_from_cache(cache, force_run, dry_run):
+            self._record_in_manifest(dry_run)
+        elif self._must_launch_calculation(force_run, dry_run):
+            command, env = self._prepare_calculation(nmpi, nomp, dry_run)
+            await self._launch_calculation_async(
+                command,
+                timeout,
+                cwd=self.run_dir,
+                env=env,
+                echo=not dry_run,
+                follow_logfile=not dry_run,
+            )
+            self._read_calculation_output(dry_run, timeout)
+            if self.stop_reason is not None:
+                # The calculation is not over: the job is not completed
+                return
+            self._store_in_cache(cache, dry_run)
+            self._record_in_manifest(dry_run)
+        elif self._read_existing_logfile(restart_if_incomplete):
+            await self.run_async(
+                nmpi=nmpi,
+                nomp=nomp,
+                force_run=force_run,
+                dry_run=dry_run,
+                restart_if_incomplete=False,
+                timeout=timeout,
+                cache=cache,
+            )
+        self.is_completed = True
+
+    def _load_from_cache(self, cache, force_run, dry_run):
+        r"""
+        Get the logfile of the calculation from the cache, when the
+        calculation would otherwise be launched. It is not used when
+        the calculation is forced to run or in `dry_run` mode, or if a
+        logfile already exists in the run directory.
+
+        Parameters
+        ----------
+        cache : ResultCache or None
+            Cache of the results of the calculations.
+        force_run : bool
+            If `True`, the calculation is run even though a logfile
+            already exists.
+        dry_run : bool
+            If `True`, the bigdft-tool command is run instead of the
+            bigdft one.
+
+        Returns
+        -------
+        bool
+            `True` if the logfile was found in the cache.
+        """
+        if cache is None or force_run or dry_run:
+            return False
+        if os.path.exists(self._get_path(self.logfile_name)):
+            return False
+        if not os.path.exists(self.run_dir):
+            os.makedirs(self.run_dir)
+        logfile = cache.load(self)
+        if logfile is None:
+            return False
+        print("Logfile {} retrieved from the cache.\n".format(self.logfile_name))
+        self.logfile = logfile
+        return True
+
+    def _store_in_cache(self, cache, dry_run):
+        r"""
+        Store the logfile of the calculation that was just run in the
+        cache.
+
+        Parameters
+        ----------
+        cache : ResultCache or None
+            Cache of the results of the calculations.
+        dry_run : bool
+            If `True`, the bigdft-tool command was run instead of the
+            bigdft one (and its output is not stored).
+        """
+        if cache is not None and not dry_run:
+            cache.store(self)
+
+    def _record_in_manifest(self, dry_run=False):
+        r"""
+        Record the job in its manifest, once its logfile was read.
+
+        Parameters
+        ----------
+        dry_run : bool
+            If `True`, the bigdft-tool command was run instead of the
+            bigdft one (and the job is not recorded).
+        """
+        if self.manifest is not None and not dry_run:
+            self.manifest.record(self)
+
+    def _must_launch_calculation(self, force_run, dry_run):
+        r"""
+        Prepare the run directory (copying the data directory of the
+        reference calculation if needed) and tell if the calculation
+        has to be launched.
+
+        Parameters
+        ----------
+        force_run : bool
+            If `True`, the calculation is run even though a logfile
+            already exists.
+        dry_run : bool
+            If `True`, the bigdft-tool command is run instead of the
+            bigdft one.
+
+        Returns
+        -------
+        bool
+            `True` if bigdft (or bigdft-tool) must be run.
+        """
+        if not os.path.exists(self.run_dir):
+            os.makedirs(self.run_dir)
+        logfile_exists = os.path.exists(self._get_path(self.logfile_name))
+
         # Copy the data directory of a reference calculation
         if self.ref_data_dir is not None:
             # Copy the data directory only when bigdft has to run
-            if force_run or not os.path.exists(self.logfile_name):
+            if force_run or not logfile_exists:
                 self._copy_reference_data_dir()
             # Always update the input file, so that it reads the
             # reference wavefunctions in the data directory
             if os.path.exists(self.data_dir):
                 self._read_wavefunctions_from_data_dir()
 
-        if dry_run or force_run or not os.path.exists(self.logfile_name):
-            # Run bigdft (if dry_run is False) or bigdft-tool (if
-            # dry_run is True)
-            self._set_environment(nomp)
-            self.write_input_files()
-            command = self._get_command(nmpi, dry_run)
-            output_msg = self._launch_calculation(command, timeout)
-            if dry_run:
-                self._write_bigdft_tool_output(output_msg)
+        return dry_run or force_run or not logfile_exists
+
+    def _prepare_calculation(self, nmpi, nomp, dry_run):
+        r"""
+        Write the input files and get the command to run bigdft (if
+        `dry_run` is `False`) or bigdft-tool (if `dry_run` is `True`)
+        in the run directory, with its own environment.
+
+        Parameters
+        ----------
+        nmpi : int
+            Number of MPI tasks.
+        nomp : int
+            Number of OpenMP tasks.
+        dry_run : bool
+            If `True`, the bigdft-tool command is run instead of the
+            bigdft one.
+
+        Returns
+        -------
+        tuple
+            The command to run and its environment variables.
+        """
+        env = self._get_environment(nomp)
+        self._stop_reason = None
+        self.write_input_files()
+        command = self._get_command(nmpi, dry_run)
+        return command, env
+
+    def _read_calculation_output(self, dry_run, timeout):
+        r"""
+        Read the output of a calculation that was just run. The logfile
+        of a calculation stopped by the :attr:`watchdog` is incomplete,
+        hence not read: the reason why it was stopped is given by
+        :attr:`stop_reason`.
+
+        Parameters
+        ----------
+        dry_run : bool
+            If `True`, the bigdft-tool command was run instead of the
+            bigdft one.
+        timeout : float or int or None
+            Number of minutes after which the job had to be stopped.
+
+        Raises
+        ------
+        RuntimeError
+            If the logfile is incomplete because the timeout was
+            exceeded.
+        """
+        if dry_run:
+            self._write_bigdft_tool_output()
+        if self.stop_reason is not None:
+            print(
+                "Stopped by the watchdog ({}): {}\n".format(
+                    self.stop_reason, self._monitor.message
+                )
+            )
+            return
+        try:
+            self.logfile = Logfile.from_file(
+                self._get_path(self.logfile_name),
+                sidecar=True,
+                check_psppar=not self._check_pseudopotentials(),
+            )
+        except ValueError as e:
+            if str(e) == "The logfile is incomplete!":
+                raise RuntimeError("Timeout exceded ({} minutes)".format(timeout))
+        if os.path.exists(self.data_dir):
+            self._clean_data_dir()
+
+    def _read_existing_logfile(self, restart_if_incomplete):
+        r"""
+        Read the logfile of a previous calculation. The initial
+        positions and the initial parameters used to perform that
+        calculation must correspond to the ones used to initialize the
+        current job.
+
+        Parameters
+        ----------
+        restart_if_incomplete : bool
+            If `True`, an incomplete logfile is removed so that the
+            calculation can be restarted.
+
+        Returns
+        -------
+        bool
+            `True` if the calculation must be restarted.
+        """
+        print("Logfile {} already exists!\n".format(self.logfile_name))
+        logfile_path = self._get_path(self.logfile_name)
+        try:
+            logfile, verified = self._pop_preloaded_logfile()
+            if logfile is None:
+                # Look at the end of the logfile before parsing it
+                if Logfile.status(logfile_path) == INCOMPLETE:
+                    raise ValueError("The logfile is incomplete!")
+                # The sidecar written when the job was run, if any, is used
+                logfile = Logfile.from_file(
+                    logfile_path,
+                    sidecar=os.path.exists(sidecar_name(logfile_path)),
+                    check_psppar=not self._check_pseudopotentials(),
+                )
+            self.logfile = logfile
+        except ValueError as e:
+            incomplete_log = str(e) == "The logfile is incomplete!"
+            if incomplete_log and restart_if_incomplete:
+                # Remove the logfile and restart the calculation
+                print("The logfile was incomplete, restart calculation")
+                os.remove(logfile_path)
+                remove_sidecar(logfile_path)
+                return True
             else:
-                output_msg = output_msg.decode("unicode_escape")
-                print(output_msg)
-            try:
-                self.logfile = Logfile.from_file(self.logfile_name)
-            except ValueError as e:
-                if str(e) == "The logfile is incomplete!":
-                    raise RuntimeError("Timeout exceded ({} minutes)".format(timeout))
-            if os.path.exists(self.data_dir):
-                self._clean_data_dir()
+                raise e
         else:
-            # The logfile already exists: the initial positions and the
-            # initial parameters used to perform that calculation must
-            # correspond to the ones used to initialize the current job.
-            print("Logfile {} already exists!\n".format(self.logfile_name))
-            try:
-                self.logfile = Logfile.from_file(self.logfile_name)
-            except ValueError as e:
-                incomplete_log = str(e) == "The logfile is incomplete!"
-                if incomplete_log and restart_if_incomplete:
-                    # Remove the logfile and restart the calculation
-                    print("The logfile was incomplete, restart calculation")
-                    os.remove(self.logfile_name)
-                    self.run(
-                        nmpi=nmpi,
-                        nomp=nomp,
-                        force_run=force_run,
-                        dry_run=dry_run,
-                        restart_if_incomplete=False,
-                        timeout=timeout,
-                    )
-                else:
-                    raise e
-            else:
+            # A logfile from the manifest was already checked
+            if not verified:
                 self._check_logfile_posinp()
                 self._check_logfile_inputparams()
-        self.is_completed = True
+                self._record_in_manifest()
+        return False
+
+    def preload_logfile(self, logfile, signature, verified=False):
+        r"""
+        Give the logfile of a previous calculation, read beforehand
+        (for instance, by :meth:`~mybigdft.iofiles.logfiles.Logfile.load_many`).
+        It is used instead of reading the logfile again when the job is
+        run, as long as the logfile did not change in the meantime.
+
+        Parameters
+        ----------
+        logfile : Logfile
+            Logfile read from the disk.
+        signature : tuple or None
+            Signature of the logfile before it was read (see
+            :meth:`logfile_signature`).
+        verified : bool
+            If `True`, the logfile is known to correspond to the initial
+            positions and input parameters of the job (for instance,
+            because it was recorded in the :attr:`manifest` with the
+            same digest), so that they are not checked again.
+        """
+        if logfile is not None and signature is not None:
+            self._preloaded_logfile = (signature, logfile, verified)
+        else:
+            self._preloaded_logfile = None
+
+    @property
+    def has_preloaded_logfile(self):
+        r"""
+        Returns
+        -------
+        bool
+            `True` if the logfile on disk was read beforehand and did
+            not change since then.
+        """
+        preloaded = self._preloaded_logfile
+        return preloaded is not None and preloaded[0] == self.logfile_signature()
+
+    def logfile_signature(self):
+        r"""
+        Returns
+        -------
+        tuple or None
+            Size and modification time of the logfile on disk (`None` if
+            there is no logfile).
+        """
+        try:
+            stat = os.stat(self._get_path(self.logfile_name))
+        except OSError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _pop_preloaded_logfile(self):
+        r"""
+        Returns
+        -------
+        tuple
+            Logfile read beforehand, if the logfile on disk did not
+            change since then (`None` otherwise), and whether it was
+            already checked. It is used only once.
+        """
+        logfile, verified = None, False
+        if self.has_preloaded_logfile:
+            logfile, verified = self._preloaded_logfile[1:]
+        self._preloaded_logfile = None
+        return logfile, verified
 
     def _copy_reference_data_dir(self):
         r"""
         Copy the reference data directory to the current calculation
         directory so as to restart the new calculation from the result
-        of the reference calculation.
-        """
-        if os.path.exists(self.ref_data_dir):
-            if os.path.basename(self.data_dir) in os.listdir(os.curdir):
-                # Remove the previously existing data directory before
-                # copying the reference data directory (otherwise,
-                # shutil.copytree raises an error).
-                shutil.rmtree(self.data_dir)
-            shutil.copytree(self.ref_data_dir, self.data_dir)
-            print("Data directory copied from {}.".format(self.ref_data_dir))
+        of the reference calculation. The files are propagated according
+        to :attr:`data_dir_strategy`, except that they are never linked
+        if the calculation writes its orbitals (which would overwrite
+        the reference ones).
+        """
+        # A relative reference data directory is defined with respect
+        # to the run directory
+        ref_data_dir = self._get_path(self.ref_data_dir)
+        if os.path.exists(ref_data_dir):
+            strategy = self.data_dir_strategy
+            if strategy in (HARDLINK, SYMLINK) and self._writes_orbitals():
+                strategy = REFLINK
+            # The existing data directory is updated in place
+            strategy = propagate_data_dir(ref_data_dir, self.data_dir, strategy)
+            print(
+                "Data directory copied from {} ({}).".format(
+                    self.ref_data_dir, strategy
+                )
+            )
         else:
             print("Data directory {} not found.".format(self.ref_data_dir))
 
@@ -646,18 +1213,33 @@ class Job(object):
                 pass
 
     @staticmethod
-    def _set_environment(nomp):
+    def _get_environment(nomp):
         r"""
-        Set the number of OpenMP threads.
+        Get the environment of the calculation, setting the number of
+        OpenMP threads. The environment of the current process is not
+        modified.
 
         Parameters
         ----------
         nomp : int
             Number of OpenMP tasks.
+
+        Returns
+        -------
+        dict
+            Environment variables of the calculation.
+
+        >>> env = Job._get_environment(4)
+        >>> env["OMP_NUM_THREADS"]
+        '4'
+        >>> env is os.environ
+        False
         """
+        env = dict(os.environ)
         nomp = int(nomp)  # Make sure you get an integer
         if nomp > 1:
-            os.environ["OMP_NUM_THREADS"] = str(nomp)
+            env["OMP_NUM_THREADS"] = str(nomp)
+        return env
 
     def _get_command(self, nmpi, dry_run):
         r"""
@@ -691,27 +1273,73 @@ class Job(object):
         r"""
         Write the input files on disk (there might be no posinp to write,
         since the initial positions can be defined in the input
-        parameters).
+        parameters). They are written in the run directory.
         """
-        self.inputparams.write(self.input_name)
+        self.inputparams.write(self._get_path(self.input_name))
         if self.posinp is not None:
-            self.posinp.write(self.posinp_name)
+            self.posinp.write(self._get_path(self.posinp_name))
         if self.pseudos:
-            elements = set([atom.type for atom in self.posinp])
-            for element in elements:
-                shutil.copyfile(
-                    os.environ["PSEUDODIR"] + "psppar." + element, "psppar." + element
-                )
+            # Link the pseudopotential files instead of copying them
+            elements = sorted(set(atom.type for atom in self.posinp))
+            PseudopotentialStore.shared().link(elements, self.run_dir)
 
-    @staticmethod
-    def _launch_calculation(command, timeout):
+    def _check_pseudopotentials(self):
         r"""
-        Launch the command to run the bigdft or bigdft-tool command.
+        Check that the XC of the pseudopotential files used by the job
+        is the one of its input parameters. This is done once for all
+        the jobs using the same files (see
+        :meth:`~mybigdft.pseudos.PseudopotentialStore.check_xc`),
+        instead of once per logfile.
+
+        Returns
+        -------
+        bool
+            `True` if the check was done, so that the logfile of the job
+            does not need to do it.
+        """
+        if not self.pseudos or "PSEUDODIR" not in os.environ:
+            return False
+        elements = sorted(set(atom.type for atom in self.posinp))
+        try:
+            PseudopotentialStore.shared().check_xc(
+                elements, self.inputparams["dft"]["ixc"]
+            )
+        except (IOError, OSError):
+            return False
+        return True
+
+    def _launch_calculation(
+        self, command, timeout, cwd=None, env=None, echo=True, follow_logfile=False
+    ):
+        r"""
+        Launch the command to run the bigdft or bigdft-tool command. Its
+        standard output and error are written in files, chunk by chunk,
+        while it runs (see :meth:`_open_output_sinks`).
 
         Parameters
         ----------
         command : list
             The command to run bigdft or bigdft-tool.
+        timeout : float or int or None
+            Number of minutes after which the command must be stopped.
+        cwd : str or None
+            Directory where the command is run (default to the current
+            working directory).
+        env : dict or None
+            Environment variables of the command (default to the
+            environment of the current process).
+        echo : bool
+            If `True`, the standard output is also printed while the
+            command runs (unless the job is :attr:`quiet`).
+        follow_logfile : bool
+            If `True`, the progress of the calculation is reported to
+            the :attr:`progress_callback` (if any) while it runs.
+
+        Returns
+        -------
+        bytes
+            Last lines of the standard output of the command (see
+            :attr:`OUTPUT_LINES`).
 
         Raises
         ------
@@ -722,39 +1350,330 @@ class Job(object):
         to_str = "{} " * len(command)
         command_msg = to_str.format(*command) + "..."
         print(command_msg)
+        # Ignore the logfile of a previous calculation
+        follower = self._logfile_follower(cwd) if follow_logfile else None
         # Run the calculation for at most timeout minutes
-        run = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        run = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd, env=env
+        )
         if timeout is None:
             # 60 years timeout should be enough...
             timeout = 60 * 365 * 24 * 60
         timer = Timer(timeout * 60, run.kill)
+        out, err = self._open_output_sinks(cwd, echo)
+        readers = [
+            Thread(target=out.pump, args=(run.stdout,)),
+            Thread(target=err.pump, args=(run.stderr,)),
+        ]
+        if follower is not None:
+            readers.append(Thread(target=self._follow_logfile, args=(follower, run)))
         try:
             timer.start()
-            out, err = run.communicate()
-            error_msg = err.decode("unicode_escape")
+            for reader in readers:
+                reader.start()
+            for reader in readers:
+                reader.join()
+            run.wait()
         finally:
             timer.cancel()
-        # Raise an error if the calculation ended badly, else return the
-        # decoded output message
-        if error_msg != "":
+            out.close()
+            err.close()
+            run.stdout.close()
+            run.stderr.close()
+        if self.stop_reason is None:
+            Job._check_error_message(err)
+        return out.tail
+
+    async def _launch_calculation_async(
+        self, command, timeout, cwd=None, env=None, echo=True, follow_logfile=False
+    ):
+        r"""
+        Coroutine launching the command to run the bigdft or bigdft-tool
+        command. Its standard output and error are read incrementally
+        while it runs, and written in files (see
+        :meth:`_open_output_sinks`).
+
+        Parameters
+        ----------
+        command : list
+            The command to run bigdft or bigdft-tool.
+        timeout : float or int or None
+            Number of minutes after which the command must be stopped.
+        cwd : str or None
+            Directory where the command is run (default to the current
+            working directory).
+        env : dict or None
+            Environment variables of the command (default to the
+            environment of the current process).
+        echo : bool
+            If `True`, the standard output is also printed while the
+            command runs (unless the job is :attr:`quiet`).
+        follow_logfile : bool
+            If `True`, the progress of the calculation is reported to
+            the :attr:`progress_callback` (if any) while it runs.
+
+        Returns
+        -------
+        bytes
+            Last lines of the standard output of the command (see
+            :attr:`OUTPUT_LINES`).
+
+        Raises
+        ------
+        RuntimeError
+            If the calculation ended with an error message.
+        """
+        # Print the command in a human readable way
+        to_str = "{} " * len(command)
+        command_msg = to_str.format(*command) + "..."
+        print(command_msg)
+        # Ignore the logfile of a previous calculation
+        follower = self._logfile_follower(cwd) if follow_logfile else None
+        # Run the calculation for at most timeout minutes
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd,
+            env=env
+        )
+        out, err = self._open_output_sinks(cwd, echo)
+        if follower is not None:
+            progress = asyncio.ensure_future(
+                self._follow_logfile_async(follower, process)
+            )
+        communicate = asyncio.gather(
+            _read_stream(process.stdout, out),
+            _read_stream(process.stderr, err),
+            process.wait(),
+        )
+        if timeout is not None:
+            timeout *= 60
+        try:
+            await asyncio.wait_for(communicate, timeout)
+        except asyncio.TimeoutError:
+            # Same as a killed synchronous calculation: its logfile is
+            # incomplete
+            await self._terminate(process)
+        except asyncio.CancelledError:
+            await self._terminate(process)
+            raise
+        finally:
+            out.close()
+            err.close()
+            if follower is not None:
+                # The end of the logfile is read once the process is over
+                await progress
+        if self.stop_reason is None:
+            Job._check_error_message(err)
+        return out.tail
+
+    def _logfile_follower(self, cwd):
+        r"""
+        Parameters
+        ----------
+        cwd : str or None
+            Directory where the command is run (default to the current
+            working directory), where the logfile is written.
+
+        Returns
+        -------
+        LogfileFollower or None
+            Reader of the logfile written by the calculation (ignoring
+            the logfile of a previous calculation), or `None` if there
+            is neither a :attr:`progress_callback` nor a
+            :attr:`watchdog`.
+        """
+        if self.progress_callback is None and self.watchdog is None:
+            return None
+        if self.watchdog is not None:
+            try:
+                gnrm_cv = self.inputparams["dft"]["gnrm_cv"]
+            except KeyError:
+                gnrm_cv = DEFAULT_GNRM_CV
+            self._monitor = self.watchdog.start(gnrm_cv=gnrm_cv)
+        else:
+            self._monitor = None
+        if cwd is None:
+            cwd = os.getcwd()
+        follower = LogfileFollower(os.path.join(cwd, self.logfile_name))
+        follower.skip()
+        return follower
+
+    def _report_progress(self, event):
+        r"""
+        Give the progress of the running calculation to the
+        :attr:`progress_callback` and the :attr:`watchdog`.
+
+        Parameters
+        ----------
+        event : ProgressEvent
+            Progress of the running calculation.
+
+        Returns
+        -------
+        bool
+            `True` if the calculation must be stopped now (this is only
+            returned once).
+        """
+        if self.progress_callback is not None:
+            self.progress_callback(self, event)
+        if self._monitor is None or self.stop_reason is not None:
+            return False
+        self._stop_reason = self._monitor.update(event)
+        if self.stop_reason is not None:
+            print("Stopping the calculation: {}".format(self._monitor.message))
+        return self.stop_reason is not None
+
+    def _follow_logfile(self, follower, process):
+        r"""
+        Report the progress of the running calculation, and stop it if
+        the :attr:`watchdog` requires it.
+
+        Parameters
+        ----------
+        follower : LogfileFollower
+            Reader of the logfile written by the calculation.
+        process : subprocess.Popen
+            Process running the calculation.
+        """
+
+        def report_progress(event):
+            if self._report_progress(event):
+                process.terminate()
+                timer = Timer(self.TERMINATION_GRACE_PERIOD, process.kill)
+                timer.daemon = True
+                timer.start()
+
+        follower.follow(
+            report_progress,
+            lambda: process.poll() is not None,
+            self.PROGRESS_POLL_INTERVAL,
+        )
+
+    async def _follow_logfile_async(self, follower, process):
+        r"""
+        Coroutine reporting the progress of the running calculation, and
+        stopping it if the :attr:`watchdog` requires it.
+
+        Parameters
+        ----------
+        follower : LogfileFollower
+            Reader of the logfile written by the calculation.
+        process : asyncio.subprocess.Process
+            Process running the calculation.
+        """
+        async for event in follower.follow_async(
+            lambda: process.returncode is not None, self.PROGRESS_POLL_INTERVAL
+        ):
+            if self._report_progress(event):
+                await self._terminate(process)
+
+    def _open_output_sinks(self, cwd, echo):
+        r"""
+        Open the files where the standard output and error of a command
+        are written. Only their last :attr:`OUTPUT_LINES` lines are kept
+        in memory, so that the memory used while the command runs does
+        not depend on the size of its output.
+
+        Parameters
+        ----------
+        cwd : str or None
+            Directory where the command is run (default to the current
+            working directory), where the files are written.
+        echo : bool
+            If `True`, the standard output is also printed while the
+            command runs (unless the job is :attr:`quiet`).
+
+        Returns
+        -------
+        tuple
+            Sinks of the standard output and error of the command.
+        """
+        if cwd is None:
+            cwd = os.getcwd()
+        elif not os.path.exists(cwd):
+            os.makedirs(cwd)
+        echo = sys.stdout if echo and not self.quiet else None
+        out = StreamSink(
+            os.path.join(cwd, self.stdout_name), max_lines=self.OUTPUT_LINES, echo=echo
+        )
+        err = StreamSink(
+            os.path.join(cwd, self.stderr_name), max_lines=self.OUTPUT_LINES
+        )
+        return out, err
+
+    async def _terminate(self, process):
+        r"""
+        Coroutine stopping a running process: a SIGTERM signal is sent
+        first, followed by a SIGKILL signal if the process did not stop
+        after :attr:`TERMINATION_GRACE_PERIOD` seconds.
+
+        Parameters
+        ----------
+        process : asyncio.subprocess.Process
+            Process to stop.
+        """
+        if process.returncode is not None:
+            return
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), self.TERMINATION_GRACE_PERIOD)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+        except ProcessLookupError:  # pragma: no cover
+            # The process ended in the meantime
+            pass
+
+    @staticmethod
+    def _check_error_message(err):
+        r"""
+        Parameters
+        ----------
+        err : StreamSink
+            Standard error of the calculation.
+
+        Raises
+        ------
+        RuntimeError
+            If the calculation ended with an error message.
+        """
+        # Raise an error if the calculation ended badly
+        if err.size > 0:
+            error_msg = err.tail.decode("utf-8", errors="replace")
+            if err.is_truncated:
+                error_msg = "\n[...] (see {})\n{}".format(err.filename, error_msg)
             raise RuntimeError(
                 "The calculation ended with the following error message:{}".format(
                     error_msg
                 )
             )
-        return out
 
-    def _write_bigdft_tool_output(self, output_msg):
+    def _write_bigdft_tool_output(self):
         r"""
-        Write the output of the bigdft-tool command on disk.
+        Write the output of the bigdft-tool command, found in the
+        standard output file, on disk as a logfile.
+        """
+        with open(self._get_path(self.stdout_name), "rb") as stream:
+            log = Logfile.from_stream(stream)
+        log.write(self._get_path(self.logfile_name))
 
-        Parameters
-        ----------
-        output_msg : str
-            Output of the bigdft-tool command as a Logfile.
+    def _writes_orbitals(self):
+        r"""
+        Returns
+        -------
+        bool
+            `True` if the calculation writes its orbitals in the data
+            directory.
         """
-        log = Logfile.from_stream(output_msg)
-        log.write(self.logfile_name)
+        inp = self.inputparams
+        default = DEFAULT_PARAMETERS["output"]["orbitals"]
+        return (
+            "output" in inp
+            and "orbitals" in inp["output"]
+            and inp["output"]["orbitals"] != default
+        )
 
     def _clean_data_dir(self):
         r"""
@@ -766,13 +1685,7 @@ class Job(object):
         # Delete the wavefunction files in the data directory and
         # replace them by empty files if needed.
         inp = self.inputparams
-        default = DEFAULT_PARAMETERS["output"]["orbitals"]
-        write_orbitals = (
-            "output" in inp
-            and "orbitals" in inp["output"]
-            and inp["output"]["orbitals"] != default
-        )
-        if "output" not in inp or not write_orbitals:
+        if not self._writes_orbitals():
             wf_files = [
                 os.path.join(self.data_dir, filename)
                 for filename in os.listdir(self.data_dir)
@@ -846,11 +1759,11 @@ class Job(object):
         # - if present only in the log_inp
         if disablesym_in_log_inp and disablesym_not_in_base_inp:
             del log_inp["dft"]["disablesym"]
-            log_inp._params = clean(log_inp.params)
+            log_inp.params = clean(log_inp.params)
         # - if present only in the base_inp
         if disablesym_not_in_log_inp and disablesym_in_base_inp:
             del base_inp["dft"]["disablesym"]
-            base_inp._params = clean(log_inp.params)
+            base_inp.params = clean(log_inp.params)
         if base_inp != log_inp:
             raise UserWarning(
                 "The input parameters of this job do not correspond to the "
@@ -881,6 +1794,8 @@ class Job(object):
         # Delete the input and output files
         filenames = [
             self.logfile_name,
+            self.stdout_name,
+            self.stderr_name,
             self.input_name,
             self.posinp_name,
             "forces_" + self.posinp_name,
@@ -891,9 +1806,10 @@ class Job(object):
         ]
         for filename in filenames:
             try:
-                os.remove(filename)
+                os.remove(self._get_path(filename))
             except OSError:
                 pass
+        remove_sidecar(self._get_path(self.logfile_name))
         # Delete the required directories
         directories = []
         if data_dir:
@@ -901,4 +1817,25 @@ class Job(object):
         if logfiles_dir:
             directories += ["logfiles"]
         for directory in directories:
-            shutil.rmtree(directory, ignore_errors=True)
+            shutil.rmtree(self._get_path(directory), ignore_errors=True)
+
+
+async def _read_stream(stream, sink, chunk_size=CHUNK_SIZE):
+    r"""
+    Coroutine reading a stream incrementally until its end.
+
+    Parameters
+    ----------
+    stream : asyncio.StreamReader
+        Stream to read.
+    sink : StreamSink
+        Sink where the chunks of data read are written (so that the data
+        read so far is available even if the reading is interrupted).
+    chunk_size : int
+        Maximal size of the chunks (in bytes).
+    """
+    while True:
+        chunk = await stream.read(chunk_size)
+        if not chunk:
+            break
+        sink.write(chunk)
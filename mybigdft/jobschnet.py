@@ -281,12 +281,9 @@ class Jobschnet(object):
                         np.array([0, 0, 1]),
                     ]:
                         all_structs.extend(
-                            [
-                                struct.translate_atom(
-                                    atom_idx, deriv_length * factor * dim
-                                )
-                                for atom_idx in range(len(struct))
-                            ]
+                            struct.displaced(
+                                range(len(struct)), deriv_length * factor * dim
+                            )
                         )
             self.posinp = all_structs
         # Second order forces calculations
@@ -300,12 +297,9 @@ class Jobschnet(object):
                         np.array([0, 0, 1]),
                     ]:
                         all_structs.extend(
-                            [
-                                struct.translate_atom(
-                                    atom_idx, deriv_length * factor * dim
-                                )
-                                for atom_idx in range(len(struct))
-                            ]
+                            struct.displaced(
+                                range(len(struct)), deriv_length * factor * dim
+                            )
                         )
             self.posinp = all_structs
 
@@ -0,0 +1,272 @@
+r"""
+The :class:`WorkflowManifest` class keeps track of the jobs of a
+workflow that were already run, in a file chosen when setting the
+manifest of the workflow (see
+:attr:`~mybigdft.workflows.workflow.AbstractWorkflow.manifest`), such as
+a file named :data:`MANIFEST_NAME` in the directory of a project.
+
+Each job records, once it is over, a digest of its input parameters and
+initial geometry (see :func:`~mybigdft.cache.job_digest`), the status
+and the signature (size and modification time) of its logfile, and the
+parts of its logfile giving the attributes of a
+:class:`~mybigdft.iofiles.logfiles.Logfile`. When the workflow is
+resumed, the logfiles of the recorded jobs are then rebuilt from the
+manifest, without reading them nor checking them again, as long as
+neither the job nor its logfile changed.
+
+The manifest is a JSON Lines file, each line recording a job: a line is
+only appended when a job is over (even by concurrent worker processes),
+so that the manifest stays valid if the workflow is interrupted.
+
+>>> import tempfile
+>>> from mybigdft import Job
+>>> log = Logfile.from_file("tests/log.yaml")
+>>> job = Job(posinp=log.posinp, run_dir="tests")
+>>> job.logfile = log
+>>> manifest = WorkflowManifest(os.path.join(tempfile.mkdtemp(), MANIFEST_NAME))
+>>> manifest.record(job)
+>>> manifest.lookup(job).energy
+-19.884659235401838
+"""
+
+from __future__ import absolute_import
+import os
+import json
+import numpy as np
+from mybigdft.cache import job_digest
+from mybigdft.iofiles import Logfile
+from mybigdft.iofiles.logfiles import ATTRIBUTES, _get_paths
+from mybigdft.iofiles.selectiveloader import prune
+from mybigdft.iofiles.sidecar import FORCES_KEY
+from mybigdft.iofiles.status import logfile_status, COMPLETE, ACCEPTABLE
+
+
+__all__ = ["WorkflowManifest", "MANIFEST_NAME"]
+
+
+#: Usual name of the manifest file of a workflow
+MANIFEST_NAME = ".mybigdft-manifest.jsonl"
+#: Version of the manifest format (records of other versions are ignored)
+MANIFEST_VERSION = 1
+
+
+class WorkflowManifest(object):
+    r"""
+    Record of the jobs of a workflow that are over, allowing to resume
+    the workflow without reading their logfiles again.
+
+    Only the file name is sent to other processes when the manifest is
+    pickled (for instance, along with a job run by a
+    :class:`~mybigdft.executors.ParallelExecutor`): the records are read
+    again from the file when needed.
+    """
+
+    def __init__(self, filename):
+        r"""
+        Parameters
+        ----------
+        filename : str
+            Name of the manifest file (it may not exist yet). The paths
+            of the logfiles are recorded relative to its directory.
+        """
+        self._filename = os.path.abspath(filename)
+        self._records = None
+
+    @property
+    def filename(self):
+        r"""
+        Returns
+        -------
+        str
+            Absolute path to the manifest file.
+        """
+        return self._filename
+
+    @property
+    def root_dir(self):
+        r"""
+        Returns
+        -------
+        str
+            Directory of the manifest file, with respect to which the
+            paths of the logfiles are recorded.
+        """
+        return os.path.dirname(self.filename)
+
+    @property
+    def records(self):
+        r"""
+        Returns
+        -------
+        dict
+            Last record of each job, the keys being the paths of their
+            logfiles.
+        """
+        if self._records is None:
+            self._records = self._read()
+        return self._records
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_records"] = None
+        return state
+
+    def __len__(self):
+        return len(self.records)
+
+    def _read(self):
+        r"""
+        Returns
+        -------
+        dict
+            Last record of each job found in the manifest file. The
+            lines that cannot be read (such as a line whose writing was
+            interrupted) are ignored.
+        """
+        records = {}
+        try:
+            with open(self.filename, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        if record["version"] == MANIFEST_VERSION:
+                            records[record["logfile"]] = record
+                    except (ValueError, TypeError, KeyError):
+                        continue
+        except (IOError, OSError):
+            pass
+        return records
+
+    def _key(self, job):
+        r"""
+        Parameters
+        ----------
+        job : Job
+            BigDFT job.
+
+        Returns
+        -------
+        str
+            Path to the logfile of the job, relative to the directory of
+            the manifest.
+        """
+        logfile_path = os.path.abspath(job._get_path(job.logfile_name))
+        return os.path.relpath(logfile_path, self.root_dir)
+
+    def record(self, job):
+        r"""
+        Record a job whose logfile was read. Nothing is recorded if the
+        job has no complete logfile on disk.
+
+        Parameters
+        ----------
+        job : Job
+            BigDFT job (already run).
+        """
+        signature = job.logfile_signature()
+        if job.logfile is None or signature is None:
+            return
+        status = logfile_status(job._get_path(job.logfile_name))
+        if status not in (COMPLETE, ACCEPTABLE):
+            return
+        record = {
+            "version": MANIFEST_VERSION,
+            "logfile": self._key(job),
+            "digest": job_digest(job),
+            "status": status,
+            "signature": list(signature),
+            "docs": None,
+            "forces": None,
+        }
+        # Only the logfiles made of a single document are stored, the
+        # other ones being read lazily from the disk
+        if type(job.logfile) is Logfile:
+            doc, forces = _extract(job.logfile)
+            if doc is not None:
+                record["docs"], record["forces"] = [doc], forces
+        line = json.dumps(record) + "\n"
+        dirname = os.path.dirname(self.filename)
+        if not os.path.exists(dirname):
+            os.makedirs(dirname)
+        # A single write in append mode, so that the lines written by
+        # concurrent processes are not mixed
+        fd = os.open(self.filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+        if self._records is not None:
+            self._records[record["logfile"]] = record
+
+    def lookup(self, job, signature=None):
+        r"""
+        Parameters
+        ----------
+        job : Job
+            BigDFT job.
+        signature : tuple or None
+            Signature of the logfile of the job (see
+            :meth:`~mybigdft.job.Job.logfile_signature`), if already
+            known.
+
+        Returns
+        -------
+        Logfile or None
+            Logfile of the job, if it was recorded with the same digest
+            and if its logfile did not change since then. Only the parts
+            of the logfile giving its attributes are kept in memory, the
+            logfile itself being read again if needed.
+        """
+        record = self.records.get(self._key(job))
+        if record is None or record["status"] not in (COMPLETE, ACCEPTABLE):
+            return None
+        if signature is None:
+            signature = job.logfile_signature()
+        if signature is None or list(signature) != record["signature"]:
+            return None
+        if record["digest"] != job_digest(job):
+            return None
+        logfile_path = job._get_path(job.logfile_name)
+        if record["docs"] is None:
+            return Logfile.from_file(logfile_path, check_psppar=False)
+        docs = [dict(doc) for doc in record["docs"]]
+        if record["forces"] is not None:
+            docs[0][FORCES_KEY] = np.array(record["forces"], dtype=float)
+        return Logfile._from_docs(docs, logfile_path, partial=True, check_psppar=False)
+
+    def clear(self):
+        r"""
+        Remove the manifest file.
+        """
+        try:
+            os.remove(self.filename)
+        except OSError:
+            pass
+        self._records = None
+
+
+def _extract(logfile):
+    r"""
+    Parameters
+    ----------
+    logfile : Logfile
+        Logfile made of a single document.
+
+    Returns
+    -------
+    tuple
+        Parts of the document giving the attributes of the logfile
+        (`None` if they cannot be stored faithfully in JSON) and the
+        atomic forces, as a list.
+    """
+    doc = dict(prune(logfile._log, _get_paths(list(ATTRIBUTES))))
+    forces = doc.pop(FORCES_KEY, None)
+    if forces is not None:
+        forces = logfile.forces.tolist()
+    try:
+        if json.loads(json.dumps(doc)) != doc:
+            # Some values (such as non-string keys) are not preserved
+            return None, None
+    except (TypeError, ValueError):
+        return None, None
+    return doc, forces
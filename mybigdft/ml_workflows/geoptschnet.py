@@ -6,6 +6,7 @@ a SchnetPack trained model
 import numpy as np
 from copy import deepcopy
 from mybigdft import Posinp, Jobschnet
+from mybigdft.iofiles.trajectory import TrajectoryStore
 
 
 class Geoptschnet:
@@ -47,6 +48,7 @@ class Geoptschnet:
         self.step_size = step_size
         self.max_iter = max_iter
         self.final_posinp = None
+        self.trajectory = None
 
         self._write_to_disk = write_to_disk
         if self.write_to_disk:
@@ -86,6 +88,21 @@ class Geoptschnet:
     def final_posinp(self, final_posinp):
         self._final_posinp = final_posinp
 
+    @property
+    def trajectory(self):
+        r"""
+        Returns
+        -------
+        TrajectoryStore or None
+            Geometries, energies and maximal forces of the steps of the
+            geometry optimization, if they were stored.
+        """
+        return self._trajectory
+
+    @trajectory.setter
+    def trajectory(self, trajectory):
+        self._trajectory = trajectory
+
     @property
     def forcemax(self):
         r"""
@@ -156,7 +173,14 @@ class Geoptschnet:
     def out_name(self, out_name):
         self._out_name = out_name
 
-    def run(self, model_dir=None, device="cpu", batch_size=128, recenter=False):
+    def run(
+        self,
+        model_dir=None,
+        device="cpu",
+        batch_size=128,
+        recenter=False,
+        trajectory_dir=None,
+    ):
         r"""
         Parameters
         ----------
@@ -166,15 +190,29 @@ class Geoptschnet:
             Either 'cpu' or 'cuda' to run on cpu or gpu
         batch_size : int
             Size of the mini-batches used in predictions
+        trajectory_dir : str or None
+            If given, the geometry, energy and maximal force of each
+            step are stored in a
+            :class:`~mybigdft.iofiles.trajectory.TrajectoryStore` in
+            this directory (see :attr:`trajectory`).
         """
 
         temp_posinp = deepcopy(self.posinp)
+        if trajectory_dir is not None:
+            self.trajectory = TrajectoryStore.create(trajectory_dir, temp_posinp)
 
         for i in range(1, self.max_iter + 1):
             job = Jobschnet(posinp=temp_posinp)
             job.run(
                 model_dir=model_dir, forces=True, device=device, batch_size=batch_size
             )
+            if trajectory_dir is not None:
+                energy = job.logfile.energy
+                self.trajectory.append(
+                    temp_posinp,
+                    energy=None if energy is None else np.ravel(energy)[0],
+                    forcemax=np.max(np.abs(job.logfile.forces[0])),
+                )
             for j in range(job.logfile.n_at[0]):
                 temp_posinp = temp_posinp.translate_atom(
                     j, self.step_size * job.logfile.forces[0][j]
@@ -244,45 +244,28 @@ class Phononschnet:
         of displacement in each direction.
         """
         structs = []
+        dims = [np.array([1, 0, 0]), np.array([0, 1, 0]), np.array([0, 0, 1])]
         # First order phonon calculation
         if self.order == 1:
             structs.append(deepcopy(self.ground_state))
-            for i, atom in enumerate(self.ground_state):
-                for j, dim in zip(
-                    range(3),
-                    [np.array([1, 0, 0]), np.array([0, 1, 0]), np.array([0, 0, 1])],
-                ):
-                    structs.append(
-                        self.ground_state.translate_atom(
-                            i, self.translation_amplitudes[j] * dim
-                        )
-                    )
+            factors = [1]
         # Second order phonon calculation
         elif self.order == 2:
-            for i, atom in enumerate(self.ground_state):
-                for j, dim in zip(
-                    [0, 1, 2],
-                    [np.array([1, 0, 0]), np.array([0, 1, 0]), np.array([0, 0, 1])],
-                ):
-                    for factor in [1, -1]:
-                        structs.append(
-                            self.ground_state.translate_atom(
-                                i, self.translation_amplitudes[j] * dim * factor
-                            )
-                        )
+            factors = [1, -1]
         # Third order phonon calculation
         elif self.order == 3:
-            for i in range(len(self.ground_state)):
-                for j, dim in zip(
-                    [0, 1, 2],
-                    [np.array([1, 0, 0]), np.array([0, 1, 0]), np.array([0, 0, 1])],
-                ):
-                    for factor in [2, 1, -1, -2]:
-                        structs.append(
-                            self.ground_state.translate_atom(
-                                i, self.translation_amplitudes[j] * dim * factor
-                            )
-                        )
+            factors = [2, 1, -1, -2]
+        else:
+            return structs
+        # Each atom is displaced along each direction by each factor
+        # (all the displaced structures are created at once)
+        indices, vectors = [], []
+        for i in range(len(self.ground_state)):
+            for j, dim in enumerate(dims):
+                for factor in factors:
+                    indices.append(i)
+                    vectors.append(self.translation_amplitudes[j] * dim * factor)
+        structs.extend(self.ground_state.displaced(indices, vectors))
         return structs
 
     def _post_proc(self, job):
@@ -0,0 +1,256 @@
+r"""
+The :class:`PseudopotentialStore` class gives the pseudopotential files
+stored in $PSEUDODIR to the jobs using them (see the `pseudos` argument
+of :class:`~mybigdft.job.Job`). Each file is stored once in the store,
+under the SHA-256 digest of its content, and the run directories only
+contain symbolic links to the stored files. The jobs of a workflow share
+the same store, so that the pseudopotential of each atom type is found,
+verified and checked against the exchange-correlation functional of the
+input parameters only once.
+
+>>> import tempfile
+>>> source_dir = tempfile.mkdtemp() + os.sep
+>>> with open(source_dir + "psppar.N", "w") as f:
+...     _ = f.write('''Goedecker pseudopotential for N
+...  7 5 010605 zatom,zion,pspdat
+...  10 -101130 2 0 2002 0 pspcod,pspxc,lmax,lloc,mmax,r2well''')
+>>> store = PseudopotentialStore(tempfile.mkdtemp(), source_dir=source_dir)
+>>> store.xc("N")
+-101130
+>>> run_dir = tempfile.mkdtemp()
+>>> store.link(["N"], run_dir)
+>>> os.path.islink(os.path.join(run_dir, "psppar.N"))
+True
+"""
+
+from __future__ import absolute_import
+import os
+import stat
+import shutil
+import hashlib
+import warnings
+from threading import Lock
+from mybigdft.globals import _cache_dir
+
+
+__all__ = ["PseudopotentialStore"]
+
+
+# Stores shared by the jobs, by source directory
+_SHARED_STORES = {}
+_SHARED_STORES_LOCK = Lock()
+
+
+class PseudopotentialStore(object):
+    r"""
+    Content-addressed store of the pseudopotential files used by the
+    jobs, which are linked in their run directories instead of being
+    copied.
+    """
+
+    def __init__(self, directory=None, source_dir=None):
+        r"""
+        Parameters
+        ----------
+        directory : str or None
+            Directory of the store (default to the ``pseudos``
+            subdirectory of the cache directory of MyBigDFT, given by
+            the MYBIGDFT_CACHE_DIR environment variable).
+        source_dir : str or None
+            Prefix of the pseudopotential files (default to the
+            PSEUDODIR environment variable).
+        """
+        if directory is None:
+            directory = os.path.join(_cache_dir(), "pseudos")
+        if source_dir is None:
+            source_dir = os.environ["PSEUDODIR"]
+        self._directory = directory
+        self._source_dir = source_dir
+        self._paths = {}
+        self._checked_xc = set()
+        self._lock = Lock()
+
+    @classmethod
+    def shared(cls):
+        r"""
+        Returns
+        -------
+        PseudopotentialStore
+            Store shared by all the jobs using the pseudopotential files
+            of the current $PSEUDODIR.
+        """
+        source_dir = os.environ["PSEUDODIR"]
+        with _SHARED_STORES_LOCK:
+            if source_dir not in _SHARED_STORES:
+                _SHARED_STORES[source_dir] = cls(source_dir=source_dir)
+            return _SHARED_STORES[source_dir]
+
+    @property
+    def directory(self):
+        r"""
+        Returns
+        -------
+        str
+            Directory of the store.
+        """
+        return self._directory
+
+    @property
+    def source_dir(self):
+        r"""
+        Returns
+        -------
+        str
+            Prefix of the pseudopotential files.
+        """
+        return self._source_dir
+
+    def source(self, element):
+        r"""
+        Parameters
+        ----------
+        element : str
+            Atom type.
+
+        Returns
+        -------
+        str
+            Pseudopotential file of the atom type.
+        """
+        return self.source_dir + "psppar." + element
+
+    def path(self, element):
+        r"""
+        Store the pseudopotential file of an atom type, if needed. It is
+        only read and verified the first time.
+
+        Parameters
+        ----------
+        element : str
+            Atom type.
+
+        Returns
+        -------
+        str
+            Path of the stored pseudopotential file.
+        """
+        with self._lock:
+            if element not in self._paths:
+                self._paths[element] = self._store(element)
+            return self._paths[element]
+
+    def _store(self, element):
+        r"""
+        Parameters
+        ----------
+        element : str
+            Atom type.
+
+        Returns
+        -------
+        str
+            Path of the stored pseudopotential file, whose content is
+            the one of the pseudopotential file of the atom type.
+        """
+        with open(self.source(element), "rb") as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()
+        path = os.path.join(self.directory, "psppar.{}-{}".format(element, digest))
+        try:
+            with open(path, "rb") as f:
+                if hashlib.sha256(f.read()).hexdigest() == digest:
+                    return path
+        except (IOError, OSError):
+            pass
+        # Write a read-only file that replaces a missing or corrupted one
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        os.replace(tmp_path, path)
+        return path
+
+    def link(self, elements, run_dir):
+        r"""
+        Make the pseudopotential files of some atom types available in a
+        run directory, as symbolic links to the stored files (or as
+        copies if links cannot be created there).
+
+        Parameters
+        ----------
+        elements : list
+            Atom types.
+        run_dir : str
+            Run directory of a job.
+        """
+        for element in elements:
+            path = self.path(element)
+            link = os.path.join(run_dir, "psppar." + element)
+            if os.path.islink(link) and os.readlink(link) == path:
+                continue
+            tmp_link = "{}.{}.tmp".format(link, os.getpid())
+            if os.path.lexists(tmp_link):
+                os.remove(tmp_link)
+            try:
+                os.symlink(path, tmp_link)
+            except OSError:  # pragma: no cover
+                shutil.copyfile(path, tmp_link)
+            os.replace(tmp_link, link)
+
+    def xc(self, element):
+        r"""
+        Parameters
+        ----------
+        element : str
+            Atom type.
+
+        Returns
+        -------
+        int or None
+            Exchange-correlation functional of the pseudopotential of
+            the atom type (`None` if it cannot be read).
+        """
+        with open(self.path(element)) as f:
+            lines = f.readlines()
+        try:
+            return int(lines[2].split()[1])
+        except (IndexError, ValueError):
+            return None
+
+    def check_xc(self, elements, ixc):
+        r"""
+        Check that the pseudopotentials of some atom types use the
+        exchange-correlation functional of the input parameters. Each
+        atom type is only checked once per functional.
+
+        Parameters
+        ----------
+        elements : list
+            Atom types.
+        ixc : int
+            Exchange-correlation functional of the input parameters.
+
+        Warns
+        -----
+        UserWarning
+            If the XC of a pseudopotential is different from the XC of
+            the input parameters.
+        """
+        for element in elements:
+            if (element, ixc) in self._checked_xc:
+                continue
+            psp_ixc = self.xc(element)
+            with self._lock:
+                if (element, ixc) in self._checked_xc:
+                    continue
+                self._checked_xc.add((element, ixc))
+            if psp_ixc is not None and psp_ixc != ixc:
+                warnings.warn(
+                    "The XC of pseudo potentials ({}) is different from "
+                    "the input XC ({}) for the '{}' atoms".format(
+                        psp_ixc, ixc, element
+                    ),
+                    UserWarning,
+                )
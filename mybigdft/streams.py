@@ -0,0 +1,149 @@
+r"""
+The :class:`StreamSink` class receives the output of a BigDFT process
+chunk by chunk, while it runs. Each chunk is written to a file and,
+optionally, echoed to the console. Only the last lines of the output are
+kept in memory (for error reporting), so that the memory used while
+running a job does not depend on the amount of output.
+
+>>> import tempfile
+>>> filename = os.path.join(tempfile.mkdtemp(), "bigdft.out")
+>>> with StreamSink(filename, max_lines=2) as sink:
+...     sink.write(b"first line\nsecond ")
+...     sink.write(b"line\nthird line\n")
+>>> sink.tail
+b'second line\nthird line\n'
+>>> sink.size
+34
+"""
+
+from __future__ import absolute_import
+import os
+import codecs
+from collections import deque
+
+
+__all__ = ["StreamSink"]
+
+
+#: Maximal size (in bytes) of the chunks read from a stream
+CHUNK_SIZE = 2**16
+#: Maximal size (in bytes) of an incomplete line kept in memory
+MAX_LINE_LENGTH = 2**12
+
+
+class StreamSink(object):
+    r"""
+    Write the output of a process to a file, keeping its last lines in a
+    bounded ring buffer.
+    """
+
+    def __init__(self, filename, max_lines=100, echo=None):
+        r"""
+        Parameters
+        ----------
+        filename : str
+            File where the output is written.
+        max_lines : int
+            Number of lines at the end of the output kept in memory.
+        echo : file object or None
+            Text stream (such as `sys.stdout`) where the output is also
+            written as it arrives.
+        """
+        self._filename = filename
+        self._file = open(filename, "wb")
+        self._lines = deque(maxlen=max_lines)
+        self._partial_line = b""
+        self._echo = echo
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._size = 0
+
+    @property
+    def filename(self):
+        r"""
+        Returns
+        -------
+        str
+            File where the output is written.
+        """
+        return self._filename
+
+    @property
+    def size(self):
+        r"""
+        Returns
+        -------
+        int
+            Size (in bytes) of the output received so far.
+        """
+        return self._size
+
+    @property
+    def tail(self):
+        r"""
+        Returns
+        -------
+        bytes
+            Last lines of the output received so far.
+        """
+        return b"".join(self._lines) + self._partial_line
+
+    @property
+    def is_truncated(self):
+        r"""
+        Returns
+        -------
+        bool
+            `True` if the output is longer than its tail.
+        """
+        return self._size > len(self.tail)
+
+    def write(self, chunk):
+        r"""
+        Parameters
+        ----------
+        chunk : bytes
+            Next chunk of the output.
+        """
+        self._file.write(chunk)
+        self._size += len(chunk)
+        if self._lines.maxlen:
+            lines = (self._partial_line + chunk).split(b"\n")
+            self._partial_line = lines.pop()[-MAX_LINE_LENGTH:]
+            self._lines.extend(
+                line[-MAX_LINE_LENGTH:] + b"\n" for line in lines[-self._lines.maxlen :]
+            )
+        if self._echo is not None:
+            self._echo.write(self._decoder.decode(chunk))
+            self._echo.flush()
+
+    def pump(self, pipe, chunk_size=CHUNK_SIZE):
+        r"""
+        Write the content of a pipe until its end, chunk by chunk (each
+        chunk being what is available in the pipe, up to `chunk_size`
+        bytes).
+
+        Parameters
+        ----------
+        pipe : file object
+            Pipe to read (such as the standard output of a process).
+        chunk_size : int
+            Maximal size of the chunks (in bytes).
+        """
+        fileno = pipe.fileno()
+        while True:
+            chunk = os.read(fileno, chunk_size)
+            if not chunk:
+                break
+            self.write(chunk)
+
+    def close(self):
+        r"""
+        Close the file where the output is written.
+        """
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,276 @@
+r"""
+The :class:`Watchdog` class defines when a running calculation is
+hopeless and must be stopped early, instead of waiting for its timeout.
+It is fed with the progress of the calculation, read from its logfile
+(see :class:`~mybigdft.iofiles.progress.LogfileFollower`), and stops it
+when:
+
+* the norm of the residue of the wavefunctions (gnrm) did not reach a
+  new minimum for some SCF iterations (:data:`STALLED`),
+* the energy oscillated (going up and down) for some SCF iterations in
+  a row (:data:`OSCILLATING`),
+* the time needed to converge, extrapolated from the decrease of the
+  gnrm so far, exceeds a time budget (:data:`OVER_BUDGET`).
+
+Each criterion applies to the current SCF cycle (a new one starts with
+each subspace optimization and each geometry optimization step). A
+watchdog is given to a job (see
+:attr:`~mybigdft.job.Job.watchdog`), which records the reason why it
+was stopped (see :attr:`~mybigdft.job.Job.stop_reason`).
+
+>>> from mybigdft.iofiles.progress import ProgressEvent, SCF_ITERATION
+>>> def scf(iteration, energy, gnrm):
+...     values = {"energy": energy, "gnrm": gnrm}
+...     return ProgressEvent(SCF_ITERATION, 0, 1, 1, iteration, values)
+>>> monitor = Watchdog(stall_iterations=2).start()
+>>> monitor.update(scf(1, -19.5, 1e-1)) is None
+True
+>>> monitor.update(scf(2, -19.6, 2e-1)) is None
+True
+>>> monitor.update(scf(3, -19.7, 3e-1))
+'stalled'
+>>> monitor.message
+'The gnrm did not decrease for 2 SCF iterations (best: 1.00E-01).'
+"""
+
+from __future__ import absolute_import
+import math
+import time
+from copy import copy
+from mybigdft.iofiles.progress import (
+    SCF_ITERATION,
+    SUBSPACE_STEP,
+    HAMILTONIAN_STEP,
+    GEOPT_STEP,
+)
+
+
+__all__ = ["Watchdog", "STALLED", "OSCILLATING", "OVER_BUDGET"]
+
+
+#: Reason to stop a calculation whose gnrm stopped decreasing
+STALLED = "stalled"
+#: Reason to stop a calculation whose energy oscillates
+OSCILLATING = "oscillating"
+#: Reason to stop a calculation that would not converge within its budget
+OVER_BUDGET = "over_budget"
+#: Default convergence criterion on the gnrm of BigDFT
+DEFAULT_GNRM_CV = 1e-4
+
+
+class Watchdog(object):
+    r"""
+    Policy stopping hopeless calculations. A watchdog only holds the
+    criteria: each calculation is followed by its own copy, given by
+    :meth:`start`, so that a watchdog can be shared by many jobs.
+    """
+
+    def __init__(
+        self,
+        stall_iterations=None,
+        oscillations=None,
+        time_budget=None,
+        energy_tolerance=1e-8,
+    ):
+        r"""
+        Parameters
+        ----------
+        stall_iterations : int or None
+            Number of SCF iterations without a new minimum of the gnrm
+            after which the calculation is stopped.
+        oscillations : int or None
+            Number of changes of direction of the energy in a row (from
+            one SCF iteration to the next) after which the calculation
+            is stopped.
+        time_budget : float or None
+            Number of seconds the calculation may last. It is stopped as
+            soon as its extrapolated duration exceeds it.
+        energy_tolerance : float
+            Energy differences (in Hartree) below which the energy is
+            considered constant when looking for oscillations.
+        """
+        self.stall_iterations = stall_iterations
+        self.oscillations = oscillations
+        self.time_budget = time_budget
+        self.energy_tolerance = energy_tolerance
+        self._start_time = None
+        self._gnrm_cv = DEFAULT_GNRM_CV
+        self._reason = None
+        self._message = None
+        self._new_cycle()
+
+    @property
+    def reason(self):
+        r"""
+        Returns
+        -------
+        str or None
+            Reason why the calculation must be stopped (`None` if it
+            must not).
+        """
+        return self._reason
+
+    @property
+    def message(self):
+        r"""
+        Returns
+        -------
+        str or None
+            Explanation of the reason why the calculation must be
+            stopped.
+        """
+        return self._message
+
+    def start(self, gnrm_cv=None, now=None):
+        r"""
+        Parameters
+        ----------
+        gnrm_cv : float or None
+            Convergence criterion on the gnrm of the calculation
+            (default to the one of BigDFT).
+        now : float or None
+            Time at which the calculation starts (in seconds, as given
+            by :func:`time.monotonic`, default to the current time).
+
+        Returns
+        -------
+        Watchdog
+            Copy of the watchdog following a new calculation.
+        """
+        monitor = copy(self)
+        monitor._start_time = time.monotonic() if now is None else now
+        monitor._gnrm_cv = DEFAULT_GNRM_CV if gnrm_cv is None else gnrm_cv
+        monitor._reason = None
+        monitor._message = None
+        monitor._new_cycle()
+        return monitor
+
+    def _new_cycle(self):
+        r"""
+        Forget the history of the previous SCF cycle.
+        """
+        self._best_gnrm = None
+        self._iterations_since_best = 0
+        self._last_energy = None
+        self._last_direction = 0
+        self._direction_changes = 0
+        self._first_iteration = None
+
+    def update(self, event, now=None):
+        r"""
+        Parameters
+        ----------
+        event : ProgressEvent
+            Progress of the calculation.
+        now : float or None
+            Time of the event (in seconds, as given by
+            :func:`time.monotonic`, default to the current time).
+
+        Returns
+        -------
+        str or None
+            Reason why the calculation must be stopped (`None` if it
+            must not).
+        """
+        if self.reason is not None:
+            return self.reason
+        if event.kind in (SUBSPACE_STEP, HAMILTONIAN_STEP, GEOPT_STEP):
+            self._new_cycle()
+        elif event.kind == SCF_ITERATION:
+            if self._start_time is None:
+                self._start_time = time.monotonic() if now is None else now
+            now = time.monotonic() if now is None else now
+            energy, gnrm = event.values["energy"], event.values["gnrm"]
+            self._check_stall(gnrm)
+            self._check_oscillations(energy)
+            self._check_budget(gnrm, now - self._start_time)
+        return self.reason
+
+    def _stop(self, reason, message):
+        r"""
+        Parameters
+        ----------
+        reason : str
+            Reason why the calculation must be stopped.
+        message : str
+            Explanation of the reason.
+        """
+        if self._reason is None:
+            self._reason, self._message = reason, message
+
+    def _check_stall(self, gnrm):
+        r"""
+        Parameters
+        ----------
+        gnrm : float
+            Norm of the residue of the wavefunctions at the current SCF
+            iteration.
+        """
+        if self._best_gnrm is None or gnrm < self._best_gnrm:
+            self._best_gnrm = gnrm
+            self._iterations_since_best = 0
+            return
+        self._iterations_since_best += 1
+        if (
+            self.stall_iterations is not None
+            and self._iterations_since_best >= self.stall_iterations
+        ):
+            self._stop(
+                STALLED,
+                "The gnrm did not decrease for {} SCF iterations "
+                "(best: {:.2E}).".format(self._iterations_since_best, self._best_gnrm),
+            )
+
+    def _check_oscillations(self, energy):
+        r"""
+        Parameters
+        ----------
+        energy : float
+            Energy at the current SCF iteration.
+        """
+        last_energy, self._last_energy = self._last_energy, energy
+        if last_energy is None or abs(energy - last_energy) <= self.energy_tolerance:
+            return
+        direction = 1 if energy > last_energy else -1
+        if direction == -self._last_direction:
+            self._direction_changes += 1
+        else:
+            self._direction_changes = 0
+        self._last_direction = direction
+        if (
+            self.oscillations is not None
+            and self._direction_changes >= self.oscillations
+        ):
+            self._stop(
+                OSCILLATING,
+                "The energy oscillated for {} SCF iterations.".format(
+                    self._direction_changes
+                ),
+            )
+
+    def _check_budget(self, gnrm, elapsed):
+        r"""
+        Parameters
+        ----------
+        gnrm : float
+            Norm of the residue of the wavefunctions at the current SCF
+            iteration.
+        elapsed : float
+            Number of seconds since the calculation started.
+        """
+        if self.time_budget is None or gnrm <= self._gnrm_cv:
+            return
+        if self._first_iteration is None:
+            self._first_iteration = (elapsed, gnrm)
+        projected = elapsed
+        # The gnrm is assumed to decrease exponentially with time
+        first_elapsed, first_gnrm = self._first_iteration
+        if elapsed > first_elapsed and gnrm < first_gnrm:
+            rate = math.log(first_gnrm / gnrm) / (elapsed - first_elapsed)
+            projected += math.log(gnrm / self._gnrm_cv) / rate
+        if projected > self.time_budget:
+            self._stop(
+                OVER_BUDGET,
+                "The calculation would last {:.0f} s, more than its budget "
+                "({:.0f} s).".format(projected, self.time_budget),
+            )
@@ -14,7 +14,6 @@ import os
 import sys
 import warnings
 import abc
-from copy import deepcopy
 import numpy as np
 from mybigdft import Job
 from mybigdft.globals import EV_TO_HA
@@ -275,7 +274,17 @@ class AbstractConvergence(AbstractWorkflow, ABC):
         """
         raise NotImplementedError
 
-    def _run(self, nmpi, nomp, force_run, dry_run, restart_if_incomplete, timeout):
+    def _run(
+        self,
+        nmpi,
+        nomp,
+        force_run,
+        dry_run,
+        restart_if_incomplete,
+        timeout,
+        executor,
+        cache,
+    ):
         r"""
         This method runs the jobs until the hgrids are too high to
         stop giving results in the desired precision range.
@@ -297,6 +306,12 @@ class AbstractConvergence(AbstractWorkflow, ABC):
             incomplete.
         timeout : float or int or None
             Number of minutes after which each job must be stopped.
+        executor : SerialExecutor or ParallelExecutor
+            Object running the jobs of the workflow (not used here,
+            since running a job depends on the result of the previous
+            one: the jobs are always run sequentially).
+        cache : ResultCache or None
+            Cache of the results of the calculations.
 
         Warns
         ------
@@ -313,20 +328,18 @@ class AbstractConvergence(AbstractWorkflow, ABC):
                 dry_run=dry_run,
                 timeout=timeout,
                 restart_if_incomplete=restart_if_incomplete,
+                cache=cache,
             )
-        ref_job.is_converged = True
-        ref_job.precision_per_atom = 0.0
-        self._converged = True
-        min_en = ref_job.logfile.energy
-        n_at = len(ref_job.posinp)
+        if ref_job.stop_reason is not None:
+            # No job can be compared to a stopped reference job
+            return
+        min_en, n_at = self._set_reference_job(ref_job)
         # Run the jobs until the energy of a given run is above the
         # requested precision
         for i, job in enumerate(self.queue[1:]):
-            if not self.queue[i].is_converged:
-                # If the previous job is not converged, then neither is
-                # this one.
-                job.is_converged = False
-            else:
+            # If the previous job is not converged, then neither is
+            # this one, hence no need to run it.
+            if self.queue[i].is_converged:
                 with job as j:
                     j.run(
                         nmpi=nmpi,
@@ -335,23 +348,124 @@ class AbstractConvergence(AbstractWorkflow, ABC):
                         dry_run=dry_run,
                         timeout=timeout,
                         restart_if_incomplete=restart_if_incomplete,
+                        cache=cache,
                     )
-                # Warn a UserWarning if the current job gives a lower
-                # energy than the reference one
-                en = job.logfile.energy
-                if en <= min_en:
-                    warnings.warn(self._too_low_energy_msg, UserWarning)
-                # Assess if the job is converged or not
-                job.precision_per_atom = (en - min_en) / n_at
-                job.is_converged = job.precision_per_atom <= self.precision_per_atom
-                if job.is_converged:
-                    self._converged = job
+            if job.stop_reason is not None:
+                # The convergence of the job cannot be assessed
+                return
+            self._set_convergence(job, self.queue[i], min_en, n_at)
+        if not dry_run:
+            self.post_proc()
+            assert self.is_completed, (
+                "You must define all post-processing " "attributes in post_proc."
+            )
+
+    async def _run_async(
+        self,
+        nmpi,
+        nomp,
+        force_run,
+        dry_run,
+        restart_if_incomplete,
+        timeout,
+        executor,
+        cache,
+    ):
+        r"""
+        Coroutine version of :meth:`_run`: the jobs are still run one
+        after the other. The parameters are the same as for
+        :meth:`_run`.
+        """
+        ref_job = self.queue[0]
+        await ref_job.run_async(
+            nmpi=nmpi,
+            nomp=nomp,
+            force_run=force_run,
+            dry_run=dry_run,
+            timeout=timeout,
+            restart_if_incomplete=restart_if_incomplete,
+            cache=cache,
+        )
+        if ref_job.stop_reason is not None:
+            # No job can be compared to a stopped reference job
+            return
+        min_en, n_at = self._set_reference_job(ref_job)
+        for i, job in enumerate(self.queue[1:]):
+            if self.queue[i].is_converged:
+                await job.run_async(
+                    nmpi=nmpi,
+                    nomp=nomp,
+                    force_run=force_run,
+                    dry_run=dry_run,
+                    timeout=timeout,
+                    restart_if_incomplete=restart_if_incomplete,
+                    cache=cache,
+                )
+            if job.stop_reason is not None:
+                return
+            self._set_convergence(job, self.queue[i], min_en, n_at)
         if not dry_run:
             self.post_proc()
             assert self.is_completed, (
                 "You must define all post-processing " "attributes in post_proc."
             )
 
+    def _set_reference_job(self, ref_job):
+        r"""
+        Set the reference job (the first one of the queue), which is
+        converged by definition.
+
+        Parameters
+        ----------
+        ref_job : Job
+            Reference job, already run.
+
+        Returns
+        -------
+        tuple
+            Reference energy and number of atoms of the system.
+        """
+        ref_job.is_converged = True
+        ref_job.precision_per_atom = 0.0
+        self._converged = True
+        return ref_job.logfile.energy, len(ref_job.posinp)
+
+    def _set_convergence(self, job, previous_job, min_en, n_at):
+        r"""
+        Assess if a job is converged or not.
+
+        Parameters
+        ----------
+        job : Job
+            Job whose convergence is assessed.
+        previous_job : Job
+            Job preceding it in the queue.
+        min_en : float
+            Reference energy.
+        n_at : int
+            Number of atoms of the system.
+
+        Warns
+        ------
+        UserWarning
+            If the job gives a lower energy than the reference job.
+        """
+        if not previous_job.is_converged:
+            # If the previous job is not converged, then neither is
+            # this one.
+            job.is_converged = False
+        else:
+            # Warn a UserWarning if the current job gives a lower
+            # energy than the reference one
+            en = job.logfile.energy
+            if en <= min_en:
+                warnings.warn(self._too_low_energy_msg, UserWarning)
+            # Assess if the job is converged or not
+            job.precision_per_atom = (en - min_en) / n_at
+            job.is_converged = job.precision_per_atom <= self.precision_per_atom
+            if job.is_converged:
+                self._converged = job
+
     @property
     @abc.abstractmethod
     def _too_low_energy_msg(self):
@@ -492,12 +606,7 @@ class HgridsConvergence(AbstractConvergence):
         InputParams
             Value of the new input parameters.
         """
-        new_inp = deepcopy(self.base_job.inputparams)
-        if "dft" not in new_inp:
-            new_inp["dft"] = {"hgrids": param}
-        else:
-            new_inp["dft"]["hgrids"] = param
-        return new_inp
+        return self.base_job.inputparams.derive({"dft": {"hgrids": param}})
 
     def _new_run_dir(self, param):
         r"""
@@ -645,12 +754,7 @@ class RmultConvergence(AbstractConvergence):
         InputParams
             Value of the new input parameters.
         """
-        new_inp = deepcopy(self.base_job.inputparams)
-        if "dft" not in new_inp:
-            new_inp["dft"] = {"rmult": param}
-        else:
-            new_inp["dft"]["rmult"] = param
-        return new_inp
+        return self.base_job.inputparams.derive({"dft": {"rmult": param}})
 
     def _new_run_dir(self, param):
         r"""
@@ -128,7 +128,7 @@ class Dissociation(AbstractWorkflow):
             # fragment is translated along the y direction
             new_frag2 = self.fragment2.translate([0, y_0, 0])
             pos = deepcopy(self.fragment1)
-            pos._atoms += new_frag2.atoms
+            pos.atoms = pos.atoms + new_frag2.atoms
             # Add a new job to the queue
             job = Job(
                 name=self.name,
@@ -101,7 +101,27 @@ class InfraredSpectrum(AbstractWorkflow):
         """
         return self._Zbvs
 
-    def _run(self, nmpi, nomp, force_run, dry_run, restart_if_incomplete, timeout):
+    @property
+    def subworkflows(self):
+        r"""
+        Returns
+        -------
+        list
+            Phonons workflow.
+        """
+        return [self.phonons]
+
+    def _run(
+        self,
+        nmpi,
+        nomp,
+        force_run,
+        dry_run,
+        restart_if_incomplete,
+        timeout,
+        executor,
+        cache,
+    ):
         r"""
         Run the calculations allowing to compute the phonon energies and
         the related infrared intensities in order to be able to plot the
@@ -124,6 +144,10 @@ class InfraredSpectrum(AbstractWorkflow):
             incomplete.
         timeout : float or int or None
             Number of minutes after which each job must be stopped.
+        executor : SerialExecutor or ParallelExecutor
+            Object running the jobs of the workflow.
+        cache : ResultCache or None
+            Cache of the results of the calculations.
         """
         self.phonons.run(
             nmpi=nmpi,
@@ -132,9 +156,55 @@ class InfraredSpectrum(AbstractWorkflow):
             dry_run=dry_run,
             restart_if_incomplete=restart_if_incomplete,
             timeout=timeout,
+            executor=executor,
+            cache=cache,
         )
         super(InfraredSpectrum, self)._run(
-            nmpi, nomp, force_run, dry_run, restart_if_incomplete, timeout
+            nmpi,
+            nomp,
+            force_run,
+            dry_run,
+            restart_if_incomplete,
+            timeout,
+            executor,
+            cache,
+        )
+
+    async def _run_async(
+        self,
+        nmpi,
+        nomp,
+        force_run,
+        dry_run,
+        restart_if_incomplete,
+        timeout,
+        executor,
+        cache,
+    ):
+        r"""
+        Coroutine version of :meth:`_run`: the phonons are computed
+        before the infrared intensities. The parameters are the same as
+        for :meth:`_run`.
+        """
+        await self.phonons.run_async(
+            nmpi=nmpi,
+            nomp=nomp,
+            force_run=force_run,
+            dry_run=dry_run,
+            restart_if_incomplete=restart_if_incomplete,
+            timeout=timeout,
+            executor=executor,
+            cache=cache,
+        )
+        await super(InfraredSpectrum, self)._run_async(
+            nmpi,
+            nomp,
+            force_run,
+            dry_run,
+            restart_if_incomplete,
+            timeout,
+            executor,
+            cache,
         )
 
     def post_proc(self):
@@ -203,12 +203,18 @@ class Phonons(AbstractWorkflow):
         if self.order == 1:
             queue.append(gs)
         # Add the jobs where each atom is displaced along each space
-        # coordinate
-        for i_at in range(len(gs.posinp)):
+        # coordinate (all the displaced geometries are created at once)
+        n_at = len(gs.posinp)
+        n_disp = len(self.displacements)
+        vectors = [disp.vector for disp in self.displacements.values()]
+        new_posinps = iter(
+            gs.posinp.displaced(np.repeat(np.arange(n_at), n_disp), vectors * n_at)
+        )
+        for i_at in range(n_at):
             for key, disp in self.displacements.items():
                 # Prepare the new job by translating an atom
                 run_dir = os.path.join(gs.run_dir, "atom{:04d}".format(i_at), key)
-                new_posinp = gs.posinp.translate_atom(i_at, disp.vector)
+                new_posinp = next(new_posinps)
                 # Set the correct reference data directory
                 default = DEFAULT_PARAMETERS["output"]["orbitals"]
                 write_orbitals = (
@@ -225,6 +231,7 @@ class Phonons(AbstractWorkflow):
                     run_dir=run_dir,
                     skip=gs.skip,
                     ref_data_dir=ref_data_dir,
+                    data_dir_strategy=gs.data_dir_strategy,
                     pseudos=gs.pseudos,
                 )
                 # Add attributes to the job to facilitate post-processing
@@ -4,7 +4,6 @@ This module defines the :class:`PolTensor` workflow.
 from __future__ import print_function
 import warnings
 import os
-from copy import deepcopy
 from collections import Sequence, namedtuple, OrderedDict
 import numpy as np
 from mybigdft import Job
@@ -172,11 +171,7 @@ class PolTensor(AbstractWorkflow):
         # Add a job for each electric field calculation (one along each
         # space coordinate)
         for key, efield in self.efields.items():
-            inp = deepcopy(gs.inputparams)
-            if "dft" in inp:
-                inp["dft"]["elecfield"] = efield.vector
-            else:
-                inp["dft"] = {"elecfield": efield.vector}
+            inp = gs.inputparams.derive({"dft": {"elecfield": efield.vector}})
             # Set the correct reference data directory
             default = DEFAULT_PARAMETERS["output"]["orbitals"]
             write_orbitals = (
@@ -194,6 +189,7 @@ class PolTensor(AbstractWorkflow):
                 run_dir=run_dir,
                 skip=gs.skip,
                 ref_data_dir=ref_data_dir,
+                data_dir_strategy=gs.data_dir_strategy,
             )
             job.efield = efield
             queue.append(job)
@@ -124,7 +124,27 @@ class RamanSpectrum(AbstractWorkflow):
         """
         return self._poltensor_workflows
 
-    def _run(self, nmpi, nomp, force_run, dry_run, restart_if_incomplete, timeout):
+    @property
+    def subworkflows(self):
+        r"""
+        Returns
+        -------
+        list
+            Phonons and polarizability tensor workflows.
+        """
+        return [self.phonons] + self.poltensor_workflows
+
+    def _run(
+        self,
+        nmpi,
+        nomp,
+        force_run,
+        dry_run,
+        restart_if_incomplete,
+        timeout,
+        executor,
+        cache,
+    ):
         r"""
         Run the calculations allowing to compute the phonon energies and
         the related Raman intensities in order to be able to plot the
@@ -147,6 +167,10 @@ class RamanSpectrum(AbstractWorkflow):
             incomplete.
         timeout : float or int or None
             Number of minutes after which each job must be stopped.
+        executor : SerialExecutor or ParallelExecutor
+            Object running the jobs of the workflow.
+        cache : ResultCache or None
+            Cache of the results of the calculations.
         """
         self.phonons.run(
             nmpi=nmpi,
@@ -155,6 +179,8 @@ class RamanSpectrum(AbstractWorkflow):
             dry_run=dry_run,
             restart_if_incomplete=restart_if_incomplete,
             timeout=timeout,
+            executor=executor,
+            cache=cache,
         )
         for pt in self.poltensor_workflows:
             pt.run(
@@ -164,9 +190,67 @@ class RamanSpectrum(AbstractWorkflow):
                 dry_run=dry_run,
                 timeout=timeout,
                 restart_if_incomplete=restart_if_incomplete,
+                executor=executor,
+                cache=cache,
             )
         super(RamanSpectrum, self)._run(
-            nmpi, nomp, force_run, dry_run, restart_if_incomplete, timeout
+            nmpi,
+            nomp,
+            force_run,
+            dry_run,
+            restart_if_incomplete,
+            timeout,
+            executor,
+            cache,
+        )
+
+    async def _run_async(
+        self,
+        nmpi,
+        nomp,
+        force_run,
+        dry_run,
+        restart_if_incomplete,
+        timeout,
+        executor,
+        cache,
+    ):
+        r"""
+        Coroutine version of :meth:`_run`: the phonons are computed
+        before the polarizability tensors, one workflow after the other
+        (the jobs of each workflow being run by the executor). The
+        parameters are the same as for :meth:`_run`.
+        """
+        await self.phonons.run_async(
+            nmpi=nmpi,
+            nomp=nomp,
+            force_run=force_run,
+            dry_run=dry_run,
+            restart_if_incomplete=restart_if_incomplete,
+            timeout=timeout,
+            executor=executor,
+            cache=cache,
+        )
+        for pt in self.poltensor_workflows:
+            await pt.run_async(
+                nmpi=nmpi,
+                nomp=nomp,
+                force_run=force_run,
+                dry_run=dry_run,
+                timeout=timeout,
+                restart_if_incomplete=restart_if_incomplete,
+                executor=executor,
+                cache=cache,
+            )
+        await super(RamanSpectrum, self)._run_async(
+            nmpi,
+            nomp,
+            force_run,
+            dry_run,
+            restart_if_incomplete,
+            timeout,
+            executor,
+            cache,
         )
 
     def post_proc(self):
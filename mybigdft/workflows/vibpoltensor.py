@@ -108,7 +108,27 @@ class VibPolTensor(AbstractWorkflow):
         """
         return self._mean_polarizability
 
-    def _run(self, nmpi, nomp, force_run, dry_run, restart_if_incomplete, timeout):
+    @property
+    def subworkflows(self):
+        r"""
+        Returns
+        -------
+        list
+            Infrared spectrum workflow.
+        """
+        return [self.infrared]
+
+    def _run(
+        self,
+        nmpi,
+        nomp,
+        force_run,
+        dry_run,
+        restart_if_incomplete,
+        timeout,
+        executor,
+        cache,
+    ):
         r"""
         Run the calculations allowing to compute the phonon energies and
         the related infrared intensities in order to be able to compute
@@ -132,6 +152,10 @@ class VibPolTensor(AbstractWorkflow):
             incomplete.
         timeout : float or int or None
             Number of minutes after which each job must be stopped.
+        executor : SerialExecutor or ParallelExecutor
+            Object running the jobs of the workflow.
+        cache : ResultCache or None
+            Cache of the results of the calculations.
         """
         self.infrared.run(
             nmpi=nmpi,
@@ -140,9 +164,55 @@ class VibPolTensor(AbstractWorkflow):
             dry_run=dry_run,
             restart_if_incomplete=restart_if_incomplete,
             timeout=timeout,
+            executor=executor,
+            cache=cache,
         )
         super(VibPolTensor, self)._run(
-            nmpi, nomp, force_run, dry_run, restart_if_incomplete, timeout
+            nmpi,
+            nomp,
+            force_run,
+            dry_run,
+            restart_if_incomplete,
+            timeout,
+            executor,
+            cache,
+        )
+
+    async def _run_async(
+        self,
+        nmpi,
+        nomp,
+        force_run,
+        dry_run,
+        restart_if_incomplete,
+        timeout,
+        executor,
+        cache,
+    ):
+        r"""
+        Coroutine version of :meth:`_run`: the infrared spectrum is
+        computed before the vibrational polarizability tensor. The
+        parameters are the same as for :meth:`_run`.
+        """
+        await self.infrared.run_async(
+            nmpi=nmpi,
+            nomp=nomp,
+            force_run=force_run,
+            dry_run=dry_run,
+            restart_if_incomplete=restart_if_incomplete,
+            timeout=timeout,
+            executor=executor,
+            cache=cache,
+        )
+        await super(VibPolTensor, self)._run_async(
+            nmpi,
+            nomp,
+            force_run,
+            dry_run,
+            restart_if_incomplete,
+            timeout,
+            executor,
+            cache,
         )
 
     def post_proc(self):
@@ -15,6 +15,9 @@ from __future__ import print_function, unicode_literals
 import sys
 import warnings
 import abc
+from mybigdft.iofiles import Logfile
+from mybigdft.iofiles.status import INCOMPLETE
+from mybigdft.executors import SerialExecutor
 
 if sys.version_info >= (3, 4):  # pragma: no cover
     ABC = abc.ABC
@@ -26,8 +29,15 @@ class AbstractWorkflow(ABC):
     r"""
     This abstract class is the base class of all the workflows of this
     module. It defines the queue of jobs as a list of
-    :class:`~mybigdft.job.Job` instances, that are run sequentially when
-    the :meth:`run` method is used.
+    :class:`~mybigdft.job.Job` instances, that are run when the
+    :meth:`run` method is used (sequentially, unless another executor
+    is given, see :mod:`mybigdft.executors`). They can also be run by an
+    :mod:`asyncio` event loop, via the :meth:`run_async` coroutine.
+
+    Before running the jobs, the jobs recorded in the :attr:`manifest`
+    of the workflow (if any) get their logfile from it, and the
+    logfiles of the other jobs that were already run can be read in
+    parallel (see :meth:`resume`).
     """
 
     POST_PROCESSING_ATTRIBUTES = []
@@ -41,6 +51,11 @@ class AbstractWorkflow(ABC):
         """
         self._initialize_post_processing_attributes()
         self._queue = queue
+        self._slim = False
+        self._quiet = False
+        self._progress_callback = None
+        self._watchdog = None
+        self._manifest = None
 
     def _initialize_post_processing_attributes(self):
         r"""
@@ -70,6 +85,214 @@ class AbstractWorkflow(ABC):
         """
         return {job.name: job.logfile for job in self.queue}
 
+    @property
+    def subworkflows(self):
+        r"""
+        Returns
+        -------
+        list
+            Workflows run by this workflow to perform its own
+            calculations.
+        """
+        return []
+
+    @property
+    def slim(self):
+        r"""
+        If `True`, the logfiles of the jobs of the workflow (and of its
+        subworkflows) only keep in memory the parts of their log giving
+        their attributes, which are the only ones used by the
+        post-processing (see
+        :attr:`~mybigdft.iofiles.logfiles.Logfile.slim`). This allows to
+        run workflows made of many jobs, such as a
+        :class:`~mybigdft.workflows.ramanspectrum.RamanSpectrum`,
+        with a small memory footprint.
+
+        Returns
+        -------
+        bool
+            `True` if the logfiles of the jobs are slim.
+        """
+        return self._slim
+
+    @slim.setter
+    def slim(self, slim):
+        self._slim = bool(slim)
+        for workflow in self.subworkflows:
+            workflow.slim = slim
+        for job in self.queue:
+            job.slim_logfile = slim
+
+    @property
+    def quiet(self):
+        r"""
+        If `True`, the output of the jobs of the workflow (and of its
+        subworkflows) is not printed on the console while they run: it
+        is only written in their run directory (see
+        :attr:`~mybigdft.job.Job.quiet`).
+
+        Returns
+        -------
+        bool
+            `True` if the jobs are quiet.
+        """
+        return self._quiet
+
+    @quiet.setter
+    def quiet(self, quiet):
+        self._quiet = bool(quiet)
+        for workflow in self.subworkflows:
+            workflow.quiet = quiet
+        for job in self.queue:
+            job.quiet = quiet
+
+    @property
+    def progress_callback(self):
+        r"""
+        Returns
+        -------
+        function or None
+            Function called with each running job of the workflow (and
+            of its subworkflows) and each of its progress events (see
+            :attr:`~mybigdft.job.Job.progress_callback`).
+        """
+        return self._progress_callback
+
+    @progress_callback.setter
+    def progress_callback(self, progress_callback):
+        self._progress_callback = progress_callback
+        for workflow in self.subworkflows:
+            workflow.progress_callback = progress_callback
+        for job in self.queue:
+            job.progress_callback = progress_callback
+
+    @property
+    def watchdog(self):
+        r"""
+        Returns
+        -------
+        Watchdog or None
+            Policy stopping the hopeless calculations of the jobs of the
+            workflow (and of its subworkflows) early (see
+            :attr:`~mybigdft.job.Job.watchdog`).
+        """
+        return self._watchdog
+
+    @watchdog.setter
+    def watchdog(self, watchdog):
+        self._watchdog = watchdog
+        for workflow in self.subworkflows:
+            workflow.watchdog = watchdog
+        for job in self.queue:
+            job.watchdog = watchdog
+
+    @property
+    def manifest(self):
+        r"""
+        Returns
+        -------
+        WorkflowManifest or None
+            Manifest where the jobs of the workflow (and of its
+            subworkflows) are recorded once they are over (see
+            :class:`~mybigdft.manifest.WorkflowManifest`). There is no
+            manifest by default: it must be set to record the jobs
+            (for instance, in the directory of a project).
+        """
+        return self._manifest
+
+    @manifest.setter
+    def manifest(self, manifest):
+        self._manifest = manifest
+        for workflow in self.subworkflows:
+            workflow.manifest = manifest
+        for job in self.queue:
+            job.manifest = manifest
+
+    def resume(self, workers=None):
+        r"""
+        Read the logfiles of the jobs of the workflow (and of its
+        subworkflows) that were already run, in a pool of worker
+        processes (see
+        :meth:`~mybigdft.iofiles.logfiles.Logfile.load_many`). The jobs
+        then use these logfiles instead of reading them again when they
+        are run, so that only the jobs whose logfile is missing (or
+        incomplete) still have to be run. The incomplete logfiles are
+        found by looking at their end only (see
+        :meth:`~mybigdft.iofiles.logfiles.Logfile.status`).
+
+        The jobs recorded in the :attr:`manifest` whose logfile did not
+        change get their logfile from the manifest instead, without
+        reading it nor checking it again.
+
+        Parameters
+        ----------
+        workers : int or None
+            Number of worker processes (default to the number of cores
+            of the machine).
+        """
+        # Incomplete logfiles are found without parsing them
+        jobs = [
+            (job, signature)
+            for job, signature in self._preload_from_manifest()
+            if Logfile.status(job._get_path(job.logfile_name)) != INCOMPLETE
+        ]
+        if not jobs:
+            return
+        logfiles = Logfile.load_many(
+            [job._get_path(job.logfile_name) for job, _ in jobs],
+            workers=workers,
+            sidecar=True,
+        )
+        for (job, signature), logfile in zip(jobs, logfiles):
+            job.preload_logfile(logfile, signature)
+
+    def _preload_from_manifest(self):
+        r"""
+        Give their logfile to the jobs recorded in the :attr:`manifest`
+        whose logfile did not change.
+
+        Returns
+        -------
+        list
+            Other jobs with a logfile, along with the signature of their
+            logfile.
+        """
+        jobs = []
+        for job in self._all_jobs():
+            if job.has_preloaded_logfile:
+                continue
+            signature = job.logfile_signature()
+            if signature is None:
+                continue
+            if self.manifest is not None:
+                logfile = self.manifest.lookup(job, signature)
+                if logfile is not None:
+                    job.preload_logfile(logfile, signature, verified=True)
+                    continue
+            jobs.append((job, signature))
+        return jobs
+
+    def _all_jobs(self):
+        r"""
+        Returns
+        -------
+        list
+            Jobs of the workflow and of its subworkflows (each job being
+            given only once).
+        """
+        jobs = []
+        seen = set()
+        for workflow in [self] + self.subworkflows:
+            if workflow is self:
+                queue = self.queue
+            else:
+                queue = workflow._all_jobs()
+            for job in queue:
+                if id(job) not in seen:
+                    seen.add(id(job))
+                    jobs.append(job)
+        return jobs
+
     def run(
         self,
         nmpi=1,
@@ -78,6 +301,9 @@ class AbstractWorkflow(ABC):
         dry_run=False,
         restart_if_incomplete=False,
         timeout=None,
+        executor=None,
+        cache=None,
+        resume=False,
     ):
         r"""
         Run all the calculations if the post-processing was not already
@@ -108,6 +334,135 @@ class AbstractWorkflow(ABC):
             incomplete.
         timeout : float or int or None
             Number of minutes after which each job must be stopped.
+        executor : SerialExecutor or ParallelExecutor or None
+            Object running the jobs of the workflow (default to a
+            :class:`~mybigdft.executors.SerialExecutor`, running the
+            jobs one after the other).
+        cache : ResultCache or None
+            Cache of the results of the calculations (see
+            :class:`~mybigdft.cache.ResultCache`).
+        resume : bool
+            If `True`, the logfiles of the jobs that were already run
+            are first read in a pool of worker processes (see
+            :meth:`resume`), which is worth it for workflows made of
+            many jobs. Otherwise, each job reads its own logfile when it
+            is run (unless it is found in the :attr:`manifest`).
+
+        Warns
+        -----
+        UserWarning
+            If the post-processing was already completed.
+        """
+        if executor is None:
+            executor = SerialExecutor()
+        if self._must_run(force_run, dry_run):
+            if not (force_run or dry_run):
+                if resume:
+                    self.resume()
+                elif self.manifest is not None:
+                    self._preload_from_manifest()
+            self._run(
+                nmpi,
+                nomp,
+                force_run,
+                dry_run,
+                restart_if_incomplete,
+                timeout,
+                executor,
+                cache,
+            )
+        self._check_jobs_completion()
+
+    async def run_async(
+        self,
+        nmpi=1,
+        nomp=1,
+        force_run=False,
+        dry_run=False,
+        restart_if_incomplete=False,
+        timeout=None,
+        executor=None,
+        cache=None,
+        resume=False,
+    ):
+        r"""
+        Coroutine running all the calculations if the post-processing
+        was not already performed. It behaves as :meth:`run`, but the
+        jobs are run by the event loop (see
+        :meth:`~mybigdft.job.Job.run_async`): cancelling the task
+        running this coroutine stops all the running calculations.
+
+        Parameters
+        ----------
+        nmpi : int
+            Number of MPI tasks.
+        nomp : int
+            Number of OpenMP tasks.
+        force_run : bool
+            If `True`, the calculations are run even though a logfile
+            already exists.
+        dry_run : bool
+            If `True`, the input files are written on disk, but the
+            bigdft-tool command is run instead of the bigdft one.
+        restart_if_incomplete : bool
+            If `True`, the job is restarted if the existing logfile is
+            incomplete.
+        timeout : float or int or None
+            Number of minutes after which each job must be stopped.
+        executor : SerialExecutor or ParallelExecutor or None
+            Object running the jobs of the workflow (default to a
+            :class:`~mybigdft.executors.SerialExecutor`, running the
+            jobs one after the other).
+        cache : ResultCache or None
+            Cache of the results of the calculations (see
+            :class:`~mybigdft.cache.ResultCache`).
+        resume : bool
+            If `True`, the logfiles of the jobs that were already run
+            are first read in a pool of worker processes (see
+            :meth:`resume`), which is worth it for workflows made of
+            many jobs. Otherwise, each job reads its own logfile when it
+            is run (unless it is found in the :attr:`manifest`).
+
+        Warns
+        -----
+        UserWarning
+            If the post-processing was already completed.
+        """
+        if executor is None:
+            executor = SerialExecutor()
+        if self._must_run(force_run, dry_run):
+            if not (force_run or dry_run):
+                if resume:
+                    self.resume()
+                elif self.manifest is not None:
+                    self._preload_from_manifest()
+            await self._run_async(
+                nmpi,
+                nomp,
+                force_run,
+                dry_run,
+                restart_if_incomplete,
+                timeout,
+                executor,
+                cache,
+            )
+        self._check_jobs_completion()
+
+    def _must_run(self, force_run, dry_run):
+        r"""
+        Parameters
+        ----------
+        force_run : bool
+            If `True`, the calculations are run even though a logfile
+            already exists.
+        dry_run : bool
+            If `True`, the input files are written on disk, but the
+            bigdft-tool command is run instead of the bigdft one.
+
+        Returns
+        -------
+        bool
+            `True` if the calculations must be run.
 
         Warns
         -----
@@ -116,15 +471,47 @@ class AbstractWorkflow(ABC):
         """
         if force_run or dry_run:
             self._initialize_post_processing_attributes()
-        if not self.is_completed:
-            self._run(nmpi, nomp, force_run, dry_run, restart_if_incomplete, timeout)
-        else:
+        if self.is_completed:
             warning_msg = (
                 "Calculations already performed; set the argument "
                 "'force_run' to True to re-run them."
             )
             warnings.warn(warning_msg, UserWarning)
-        if any([not job.is_completed for job in self.queue]):
+        return not self.is_completed
+
+    @property
+    def stopped_jobs(self):
+        r"""
+        Returns
+        -------
+        list
+            Jobs of the workflow (and of its subworkflows) whose last
+            calculation was stopped by the :attr:`watchdog`. The
+            post-processing is not performed as long as there are such
+            jobs.
+        """
+        return [job for job in self._all_jobs() if job.stop_reason is not None]
+
+    def _check_jobs_completion(self):
+        r"""
+        Warns
+        -----
+        UserWarning
+            If some jobs of the workflow were not run, or were stopped
+            by the watchdog.
+        """
+        stopped_jobs = self.stopped_jobs
+        if stopped_jobs:
+            warnings.warn(
+                "Some jobs of the workflow were stopped by the watchdog: {}".format(
+                    ", ".join(
+                        "{} ({})".format(job.run_dir, job.stop_reason)
+                        for job in stopped_jobs
+                    )
+                ),
+                UserWarning,
+            )
+        elif any([not job.is_completed for job in self.queue]):
             warnings.warn("Some jobs of the workflow were not run.", UserWarning)
 
     @property
@@ -143,10 +530,21 @@ class AbstractWorkflow(ABC):
             ]
         )
 
-    def _run(self, nmpi, nomp, force_run, dry_run, restart_if_incomplete, timeout):
+    def _run(
+        self,
+        nmpi,
+        nomp,
+        force_run,
+        dry_run,
+        restart_if_incomplete,
+        timeout,
+        executor,
+        cache,
+    ):
         r"""
-        This method runs all the jobs in the queue sequentially before
-        running the post_proc method if not in `dry_run` mode.
+        This method runs all the jobs in the queue with the executor
+        before running the post_proc method if not in `dry_run` mode
+        (and if no job was stopped by its watchdog).
 
         Parameters
         ----------
@@ -165,18 +563,76 @@ class AbstractWorkflow(ABC):
             incomplete.
         timeout : float or int or None
             Number of minutes after which each job must be stopped.
+        executor : SerialExecutor or ParallelExecutor
+            Object running the jobs of the workflow.
+        cache : ResultCache or None
+            Cache of the results of the calculations.
         """
-        for job in self.queue:
-            with job as j:
-                j.run(
-                    nmpi=nmpi,
-                    nomp=nomp,
-                    force_run=force_run,
-                    dry_run=dry_run,
-                    timeout=timeout,
-                    restart_if_incomplete=restart_if_incomplete,
-                )
-        if not dry_run:
+        executor.run(
+            self.queue,
+            nmpi=nmpi,
+            nomp=nomp,
+            force_run=force_run,
+            dry_run=dry_run,
+            timeout=timeout,
+            restart_if_incomplete=restart_if_incomplete,
+            cache=cache,
+        )
+        if not (dry_run or self.stopped_jobs):
+            self.post_proc()
+            assert self.is_completed, (
+                "You must define all post-processing " "attributes in post_proc."
+            )
+
+    async def _run_async(
+        self,
+        nmpi,
+        nomp,
+        force_run,
+        dry_run,
+        restart_if_incomplete,
+        timeout,
+        executor,
+        cache,
+    ):
+        r"""
+        This coroutine runs all the jobs in the queue with the executor
+        before running the post_proc method if not in `dry_run` mode
+        (and if no job was stopped by its watchdog).
+
+        Parameters
+        ----------
+        nmpi : int
+            Number of MPI tasks.
+        nomp : int
+            Number of OpenMP tasks.
+        force_run : bool
+            If `True`, the calculations are run even though a logfile
+            already exists.
+        dry_run : bool
+            If `True`, the input files are written on disk, but the
+            bigdft-tool command is run instead of the bigdft one.
+        restart_if_incomplete : bool
+            If `True`, the job is restarted if the existing logfile is
+            incomplete.
+        timeout : float or int or None
+            Number of minutes after which each job must be stopped.
+        executor : SerialExecutor or ParallelExecutor
+            Object running the jobs of the workflow.
+        cache : ResultCache or None
+            Cache of the results of the calculations.
+        """
+        await executor.run_async(
+            self.queue,
+            nmpi=nmpi,
+            nomp=nomp,
+            force_run=force_run,
+            dry_run=dry_run,
+            timeout=timeout,
+            restart_if_incomplete=restart_if_incomplete,
+            cache=cache,
+        )
+        if not (dry_run or self.stopped_jobs):
             self.post_proc()
             assert self.is_completed, (
                 "You must define all post-processing " "attributes in post_proc."
@@ -0,0 +1,46 @@
+from __future__ import absolute_import
+import os
+import shutil
+import pytest
+from mybigdft import Job, Logfile
+
+
+@pytest.fixture(scope="session")
+def reference_logfile():
+    # Logfile of a completed calculation, used to fake calculations
+    return os.path.abspath(os.path.join("tests", "log.yaml"))
+
+
+@pytest.fixture(scope="session")
+def reference_log(reference_logfile):
+    return Logfile.from_file(reference_logfile)
+
+
+@pytest.fixture
+def fake_job(tmpdir, reference_log, reference_logfile):
+    # Create jobs whose BigDFT executable is replaced by a copy of the
+    # reference logfile
+    def make_job(name="job", **kwargs):
+        kwargs.setdefault("posinp", reference_log.posinp)
+        job = Job(run_dir=str(tmpdir.join(name)), **kwargs)
+        job.bigdft_cmd = ["sh", "-c", "cat {} > {}".format(
+            reference_logfile, job.logfile_name)]
+        job.quiet = True
+        return job
+    return make_job
+
+
+@pytest.fixture
+def completed_job(tmpdir, reference_log, reference_logfile):
+    # Create jobs whose calculation was already run (the reference
+    # logfile is copied in their run directory, if not already there)
+    def make_job(name="job", **kwargs):
+        kwargs.setdefault("posinp", reference_log.posinp)
+        job = Job(run_dir=str(tmpdir.join(name)), **kwargs)
+        if not os.path.exists(job.run_dir):
+            os.makedirs(job.run_dir)
+        logfile_path = os.path.join(job.run_dir, job.logfile_name)
+        if not os.path.exists(logfile_path):
+            shutil.copyfile(reference_logfile, logfile_path)
+        return job
+    return make_job
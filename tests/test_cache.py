@@ -0,0 +1,75 @@
+from __future__ import absolute_import
+import os
+import shutil
+import pytest
+from mybigdft import Job, Logfile, Posinp, Atom
+from mybigdft.cache import ResultCache
+
+
+pos = Posinp([Atom('N', [0, 0, 0]), Atom('N', [0, 0, 1.1])],
+             'angstroem', 'free')
+
+
+def store(job, cache, slim=False):
+    # Store a job whose calculation was already run
+    job.logfile = Logfile.from_file(job._get_path(job.logfile_name))
+    job.logfile.slim = slim
+    cache.store(job)
+
+
+class TestResultCache:
+
+    @pytest.fixture
+    def cache(self, tmpdir):
+        return ResultCache(str(tmpdir.join("cache")), code_version="test")
+
+    def test_key(self, cache):
+        job = Job(posinp=pos)
+        assert cache.key(job) == cache.key(Job(posinp=pos, name="other"))
+        other_job = Job(posinp=pos.translate([0, 0, 1]))
+        assert cache.key(job) != cache.key(other_job)
+        other_cache = ResultCache(cache.directory, code_version="other")
+        assert cache.key(job) != other_cache.key(job)
+
+    def test_init_raises_ValueError(self, tmpdir):
+        with pytest.raises(ValueError):
+            ResultCache(str(tmpdir), tolerance=0)
+
+    def test_store_and_load(self, cache, completed_job, tmpdir):
+        job = completed_job(posinp=pos)
+        assert cache.load(job) is None
+        store(job, cache)
+        assert job in cache
+        new_job = Job(posinp=pos, run_dir=str(tmpdir.join("new_job")),
+                      name="new")
+        os.makedirs(new_job.run_dir)
+        logfile = cache.load(new_job)
+        assert logfile.energy == job.logfile.energy
+        assert os.path.exists(
+            os.path.join(new_job.run_dir, new_job.logfile_name))
+
+    def test_load_slim_logfile_after_clean(self, cache, completed_job,
+                                           tmpdir):
+        job = completed_job(posinp=pos)
+        store(job, cache, slim=True)
+        shutil.rmtree(job.run_dir)
+        new_job = Job(posinp=pos, run_dir=str(tmpdir.join("new_job")))
+        os.makedirs(new_job.run_dir)
+        logfile = cache.load(new_job)
+        assert logfile.slim
+        # The whole log is read from the copy of the logfile
+        log_path = os.path.join(new_job.run_dir, new_job.logfile_name)
+        assert logfile._source[0] == log_path
+        assert "Timings for root process" in logfile.log
+
+    def test_evict(self, cache, completed_job):
+        cache.max_entries = 2
+        jobs = [completed_job("job{}".format(i),
+                              posinp=pos.translate([0, 0, i]))
+                for i in range(3)]
+        for job in jobs:
+            store(job, cache)
+        assert len(cache.entries()) == 2
+        assert jobs[0] not in cache
+        cache.clear()
+        assert cache.entries() == []
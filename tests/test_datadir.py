@@ -0,0 +1,58 @@
+from __future__ import absolute_import
+import os
+import pytest
+from mybigdft import Job, Posinp, Atom
+from mybigdft.datadir import (
+    propagate_data_dir, COPY, REFLINK, HARDLINK, SYMLINK)
+
+
+def make_data_dir(tmpdir):
+    source = tmpdir.mkdir("data-ref")
+    source.join("wavefunction-k001-NR.b000001").write("psi_1")
+    source.mkdir("sub").join("wavefunction-k001-NR.b000002").write("psi_2")
+    return str(source)
+
+
+class TestPropagateDataDir:
+
+    @pytest.mark.parametrize("strategy", [COPY, REFLINK, HARDLINK, SYMLINK])
+    def test_strategies(self, tmpdir, strategy):
+        source = make_data_dir(tmpdir)
+        destination = str(tmpdir.join("data"))
+        used = propagate_data_dir(source, destination, strategy)
+        assert used in (strategy, COPY)
+        for name in ["wavefunction-k001-NR.b000001",
+                     os.path.join("sub", "wavefunction-k001-NR.b000002")]:
+            src = os.path.join(source, name)
+            dst = os.path.join(destination, name)
+            with open(dst) as f, open(src) as g:
+                assert f.read() == g.read()
+            assert os.path.islink(dst) == (strategy == SYMLINK)
+            linked = strategy in (HARDLINK, SYMLINK) and used == strategy
+            assert os.path.samefile(src, dst) == linked
+
+    def test_update_in_place(self, tmpdir):
+        source = make_data_dir(tmpdir)
+        destination = tmpdir.join("data")
+        propagate_data_dir(source, str(destination), HARDLINK)
+        kept = destination.join("wavefunction-k001-NR.b000001")
+        inode = kept.stat().ino
+        destination.join("posout_0001.xyz").write("")
+        destination.mkdir("old")
+        tmpdir.join("data-ref", "sub", "wavefunction-k001-NR.b000002").remove()
+        propagate_data_dir(source, str(destination), HARDLINK)
+        assert kept.stat().ino == inode
+        assert sorted(os.listdir(str(destination))) == [
+            "sub", "wavefunction-k001-NR.b000001"]
+        assert os.listdir(str(destination.join("sub"))) == []
+        # The files are replaced by independent copies
+        propagate_data_dir(source, str(destination), COPY)
+        assert kept.stat().ino != inode
+        assert kept.read() == "psi_1"
+
+    def test_unknown_strategy_raises_ValueError(self, tmpdir):
+        with pytest.raises(ValueError):
+            propagate_data_dir(make_data_dir(tmpdir), str(tmpdir), "move")
+        pos = Posinp([Atom("N", [0, 0, 0])], "angstroem", "free")
+        with pytest.raises(ValueError):
+            Job(posinp=pos, data_dir_strategy="move")
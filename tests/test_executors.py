@@ -0,0 +1,105 @@
+from __future__ import absolute_import
+import asyncio
+import pytest
+from mybigdft.executors import SerialExecutor, ParallelExecutor
+
+
+class DummyJob(object):
+
+    def __init__(self):
+        self.kwargs = None
+
+    def run(self, **kwargs):
+        self.kwargs = kwargs
+
+
+class AsyncDummyJob(object):
+
+    running = 0
+    max_running = 0
+
+    async def run_async(self, **kwargs):
+        cls = AsyncDummyJob
+        cls.running += 1
+        cls.max_running = max(cls.max_running, cls.running)
+        await asyncio.sleep(0.01)
+        cls.running -= 1
+
+
+class TestSerialExecutor:
+
+    def test_run_without_jobs(self):
+        SerialExecutor().run([], nmpi=1, nomp=1)
+
+    def test_run_async(self):
+        AsyncDummyJob.max_running = 0
+        jobs = [AsyncDummyJob() for _ in range(3)]
+        asyncio.run(SerialExecutor().run_async(jobs, nmpi=1, nomp=1))
+        assert AsyncDummyJob.max_running == 1
+
+
+class TestParallelExecutor:
+
+    def test_init_default_max_cores(self):
+        assert ParallelExecutor().max_cores >= 1
+
+    @pytest.mark.parametrize("max_cores", [0, -2])
+    def test_init_raises_ValueError(self, max_cores):
+        with pytest.raises(ValueError):
+            ParallelExecutor(max_cores=max_cores)
+
+    @pytest.mark.parametrize("nmpi, nomp, expected", [
+        (1, 1, 12), (2, 1, 6), (2, 3, 2), (5, 1, 2), (12, 1, 1),
+    ])
+    def test_n_workers(self, nmpi, nomp, expected):
+        executor = ParallelExecutor(max_cores=12)
+        assert executor.n_workers(nmpi=nmpi, nomp=nomp) == expected
+
+    def test_n_workers_raises_ValueError(self):
+        executor = ParallelExecutor(max_cores=4)
+        with pytest.raises(ValueError):
+            executor.n_workers(nmpi=3, nomp=2)
+
+    def test_run_without_jobs(self):
+        ParallelExecutor(max_cores=2).run([], nmpi=1, nomp=1)
+
+    def test_run_with_threads(self):
+        jobs = [DummyJob() for _ in range(5)]
+        executor = ParallelExecutor(max_cores=4, use_threads=True)
+        executor.run(jobs, nmpi=2, nomp=1, dry_run=True)
+        for job in jobs:
+            assert job.kwargs == {"nmpi": 2, "nomp": 1, "dry_run": True}
+
+    def test_run_async_respects_core_budget(self):
+        AsyncDummyJob.max_running = 0
+        jobs = [AsyncDummyJob() for _ in range(10)]
+        executor = ParallelExecutor(max_cores=8)
+        asyncio.run(executor.run_async(jobs, nmpi=2, nomp=1))
+        assert AsyncDummyJob.max_running == 4
+
+    @pytest.mark.parametrize("use_threads", [False, True])
+    def test_run_real_jobs(self, fake_job, reference_log, tmpdir,
+                           monkeypatch, use_threads):
+        monkeypatch.chdir(tmpdir)
+        jobs = [fake_job("job{}".format(i)) for i in range(3)]
+        for job in jobs:
+            job.inputparams = reference_log.inputparams.derive({})
+        base = jobs[0].inputparams._base
+        executor = ParallelExecutor(max_cores=2, use_threads=use_threads)
+        executor.run(jobs)
+        for job in jobs:
+            assert job.is_completed
+            assert job.logfile.energy == reference_log.energy
+            # The frozen base of the input parameters is still shared
+            assert job.inputparams._base is base
+
+    def test_run_jobs_with_callbacks_in_threads(self, fake_job, tmpdir,
+                                                monkeypatch):
+        monkeypatch.chdir(tmpdir)
+        jobs = [fake_job("job{}".format(i)) for i in range(2)]
+        # A lambda cannot be sent to a worker process
+        jobs[0].progress_callback = lambda progress: None
+        executor = ParallelExecutor(max_cores=2)
+        assert executor._must_use_threads(jobs)
+        executor.run(jobs)
+        assert all(job.is_completed for job in jobs)
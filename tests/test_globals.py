@@ -0,0 +1,77 @@
+from __future__ import absolute_import
+import os
+import sys
+import json
+import subprocess
+from mybigdft.globals import _LazyDict
+
+
+tests_fol = os.path.dirname(os.path.abspath(__file__))
+
+INPUT_VARIABLES = """\
+dft:
+  DESCRIPTION: Density Functional Theory parameters
+  hgrids:
+    default: [0.45, 0.45, 0.45]
+  ixc:
+    default: 1
+---
+fast:
+  dft:
+    hgrids: 0.55
+"""
+
+CHESS_VARIABLES = """\
+lapack:
+  blocksize_pdsyev:
+    default: -8
+"""
+
+SCRIPT = """\
+import json, warnings
+warnings.simplefilter("ignore")
+from mybigdft.globals import DEFAULT_PARAMETERS, PROFILES
+print(json.dumps([DEFAULT_PARAMETERS["dft"], DEFAULT_PARAMETERS["chess"],
+                  dict(PROFILES)]))
+"""
+
+
+class TestDefinitions:
+
+    def test_lazy_dict(self):
+        calls = []
+        lazy = _LazyDict(lambda: calls.append(1) or {"a": 1})
+        assert calls == []
+        assert lazy["a"] == 1 and "a" in lazy and len(lazy) == 1
+        lazy["b"] = 2
+        assert dict(lazy) == {"a": 1, "b": 2}
+        assert calls == [1]
+
+    def test_definitions_are_cached(self, tmpdir):
+        sources = tmpdir.mkdir("bigdft")
+        sources.mkdir("src").join("input_variables_definition.yaml").write(
+            INPUT_VARIABLES)
+        tmpdir.mkdir("chess").mkdir("src").join(
+            "chess_input_variables_definition.yaml").write(CHESS_VARIABLES)
+        cache_dir = tmpdir.join("cache")
+        env = dict(os.environ, BIGDFT_SOURCES=str(sources),
+                   BIGDFT_ROOT=str(tmpdir), MYBIGDFT_CACHE_DIR=str(cache_dir))
+        expected = [
+            {"hgrids": [0.45, 0.45, 0.45], "ixc": 1},
+            {"lapack": {"blocksize_pdsyev": -8}},
+            {"fast": {"dft": {"hgrids": 0.55}}},
+        ]
+        for _ in range(2):
+            output = subprocess.check_output(
+                [sys.executable, "-c", SCRIPT], env=env,
+                cwd=os.path.dirname(tests_fol))
+            assert json.loads(output.decode()) == expected
+            assert len(cache_dir.listdir()) == 1
+        # The cache is not used anymore if the sources change
+        sources.join("src", "input_variables_definition.yaml").write(
+            INPUT_VARIABLES.replace("default: 1", "default: 11"))
+        output = subprocess.check_output(
+            [sys.executable, "-c", SCRIPT], env=env,
+            cwd=os.path.dirname(tests_fol))
+        assert json.loads(output.decode())[0]["ixc"] == 11
+        assert len(cache_dir.listdir()) == 2
@@ -0,0 +1,68 @@
+from __future__ import absolute_import
+import os
+import shutil
+import pytest
+import numpy as np
+from mybigdft.index import ResultsIndex
+
+
+class TestResultsIndex:
+
+    @pytest.fixture
+    def root(self, tmpdir, reference_logfile):
+        # Mimic the run tree of a phonons workflow
+        for atom in ("atom0000", "atom0001"):
+            for move in ("x+", "x-"):
+                run_dir = tmpdir.join(atom, move)
+                run_dir.ensure(dir=True)
+                shutil.copyfile(reference_logfile,
+                                str(run_dir.join("log-N2.yaml")))
+        return str(tmpdir)
+
+    @pytest.fixture
+    def index(self, tmpdir):
+        with ResultsIndex(str(tmpdir.join("index.db"))) as index:
+            yield index
+
+    def test_scan_and_query(self, index, root, reference_log):
+        assert index.scan([root], workers=2) == 4
+        assert len(index) == 4
+        records = index.query(directory=os.path.join(root, "atom0001"))
+        assert len(records) == 2
+        record = records[0]
+        assert record.energy == reference_log.energy
+        assert record.n_at == reference_log.n_at
+        np.testing.assert_array_equal(record.forces, reference_log.forces)
+        assert len(set(r.posinp_digest for r in index.query())) == 1
+        assert record.load().energy == reference_log.energy
+
+    def test_rescan_is_incremental(self, index, root):
+        index.scan([root], workers=1)
+        assert index.scan([root], workers=1) == 0
+        changed = os.path.join(root, "atom0000", "x+", "log-N2.yaml")
+        with open(changed, "a") as f:
+            f.write("\n")
+        os.remove(os.path.join(root, "atom0001", "x-", "log-N2.yaml"))
+        assert index.scan([root], workers=1) == 1
+        assert len(index) == 3
+
+    def test_index_is_persistent(self, index, root):
+        index.scan([root], workers=1)
+        with ResultsIndex(index.database) as other:
+            assert len(other) == 4
+            assert other.scan([root], workers=1) == 0
+
+    def test_query_order_and_criteria(self, index, root):
+        index.scan([root], workers=1)
+        records = index.query(order_by="-path", status="complete")
+        paths = [record.path for record in records]
+        assert paths == sorted(paths, reverse=True)
+        assert index.query(input_digest="unknown") == []
+
+    @pytest.mark.parametrize("kwargs", [
+        {"order_by": "unknown"},
+        {"unknown": 1},
+    ])
+    def test_query_raises_ValueError(self, index, kwargs):
+        with pytest.raises(ValueError):
+            index.query(**kwargs)
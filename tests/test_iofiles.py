@@ -1,10 +1,17 @@
 from __future__ import absolute_import
 import os
 import sys
+import shutil
 import pytest
 import numpy as np
-from mybigdft import InputParams, Posinp, Logfile, Atom
+from mybigdft import InputParams, Posinp, Logfile, Atom, Job
 from mybigdft.iofiles.logfiles import GeoptLogfile
+from mybigdft.iofiles.selectiveloader import selective_load_all
+from mybigdft.iofiles.sidecar import sidecar_name
+from mybigdft.iofiles.status import (
+    logfile_status, TAIL_SIZE, COMPLETE, ACCEPTABLE, INCOMPLETE, MISSING)
+from mybigdft.iofiles.trajectory import (
+    document_offsets, read_document, Trajectory, TrajectoryStore)
 
 tests_fol = "tests"
 # Result of an N2 calculation of very bad quality
@@ -43,6 +50,39 @@ class TestInputParams:
         with pytest.raises(ValueError):
             print(eval(to_evaluate))
 
+    def test_init_twice_gives_independent_params(self):
+        params = {"dft": {"hgrids": [0.35]*3, "rmult": [5.0, 8.0]}}
+        inp1 = InputParams(params=params)
+        inp2 = InputParams(params=params)
+        assert inp1 == inp2 == {"dft": {"hgrids": [0.35]*3}}
+        inp1["dft"]["hgrids"][0] = 0.3
+        assert inp2["dft"]["hgrids"][0] == 0.35
+        assert params["dft"]["hgrids"][0] == 0.35
+        with pytest.raises(ValueError):
+            InputParams({'dft': {'hgrids': 10}})
+        with pytest.raises(ValueError):
+            InputParams({'dft': {'hgrids': 10}})
+
+    def test_derive(self):
+        base = InputParams({"dft": {"hgrids": 0.35, "ixc": 11}})
+        inp = base.derive({"dft": {"rmult": [6, 9]}})
+        assert inp == {"dft": {"hgrids": 0.35, "ixc": 11, "rmult": [6, 9]}}
+        assert base == {"dft": {"hgrids": 0.35, "ixc": 11}}
+        # Default values are cleaned
+        inp2 = base.derive({"dft": {"hgrids": [0.45]*3, "ixc": 1}})
+        assert inp2 == {} and "dft" not in inp2
+        # The base input parameters are shared and never modified
+        inp3 = base.derive({"geopt": {"method": "SDCG"}})
+        inp3["dft"]["ixc"] = 1
+        assert inp3._base is inp._base
+        assert base.derive({}) == base
+        # The derived input parameters are shared by their copies
+        job = Job(inputparams=inp, posinp=Posinp(
+            [Atom('N', [0, 0, 0])], units="angstroem",
+            boundary_conditions="free"))
+        assert job.inputparams._base is inp._base
+        assert job.inputparams == inp
+
     def test_set(self):
         inp = InputParams()
         inp["dft"] = {"hgrids": 0.45}
@@ -176,6 +216,112 @@ class TestLogfile:
         with pytest.raises(ValueError):
             Logfile.from_file(incomplete_log)
 
+    @pytest.mark.filterwarnings("ignore::UserWarning")
+    def test_from_file_with_fields(self):
+        light_log = Logfile.from_file(
+            logname, fields=["dipole"], sidecar=False)
+        assert light_log.dipole == self.log.dipole
+        assert light_log.energy == self.log.energy
+        assert light_log.n_at is None
+        assert light_log.log == self.log.log
+
+    def test_from_file_uses_sidecar(self, tmpdir):
+        fname = str(tmpdir.join("log.yaml"))
+        shutil.copyfile(logname, fname)
+        Logfile.from_file(fname, sidecar=True)
+        assert os.path.exists(sidecar_name(fname))
+        log = Logfile.from_file(fname, sidecar=True)
+        assert log._source == (fname, 0)
+        assert log.energy == self.log.energy
+        assert np.array_equal(log.forces, self.log.forces)
+        assert str(log.posinp) == str(self.log.posinp)
+        assert log.log == self.log.log
+        assert log._source is None
+
+    def test_from_file_ignores_outdated_sidecar(self, tmpdir):
+        fname = str(tmpdir.join("log.yaml"))
+        shutil.copyfile(logname, fname)
+        Logfile.from_file(fname, sidecar=True)
+        with open(fname, "a") as f:
+            f.write("# The logfile changed\n")
+        log = Logfile.from_file(fname, sidecar=True)
+        assert log._source is None
+        assert log.log == self.log.log
+
+    def test_from_file_without_sidecar(self, tmpdir):
+        fname = str(tmpdir.join("log.yaml"))
+        shutil.copyfile(logname, fname)
+        log = Logfile.from_file(fname, sidecar=False)
+        assert not os.path.exists(sidecar_name(fname))
+        assert log.energy == self.log.energy
+        # No sidecar is written by default
+        Logfile.from_file(fname)
+        assert not os.path.exists(sidecar_name(fname))
+
+    @pytest.mark.parametrize("sidecar", [True, False])
+    def test_slim(self, tmpdir, sidecar):
+        fname = str(tmpdir.join("log.yaml"))
+        shutil.copyfile(logname, fname)
+        log = Logfile.from_file(fname, sidecar=sidecar, slim=True)
+        assert log.slim
+        assert "Timings for root process" not in log._log
+        assert log.energy == self.log.energy
+        assert log.inputparams == self.log.inputparams
+        assert str(log.posinp) == str(self.log.posinp)
+        # The whole document is read again, but not kept
+        assert log.log == self.log.log
+        assert log["Walltime since initialization"] == log.walltime
+        assert "Timings for root process" not in log._log
+        log.slim = False
+        assert log.log == self.log.log
+        assert "Timings for root process" in log._log
+        # A Logfile that was not read from a file keeps its whole log
+        other = Logfile(dict(self.log.log))
+        other.slim = True
+        assert not other.slim and other.log == self.log.log
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_load_many(self, workers):
+        logs = Logfile.load_many(
+            [logname, "missing.yaml", logname], workers=workers)
+        assert logs[1] is None
+        assert logs[0].energy == logs[2].energy == self.log.energy
+        assert np.array_equal(logs[0].forces, self.log.forces)
+        assert logs[0].log == self.log.log
+
+    def test_from_file_with_fields_raises_ValueError(self):
+        with pytest.raises(ValueError):
+            Logfile.from_file(logname, fields=["unknown"])
+        incomplete_log = os.path.join(tests_fol, "log-incomplete.yaml.ref")
+        with pytest.raises(ValueError):
+            Logfile.from_file(incomplete_log, fields=["energy"])
+
+    def test_numerical_data_as_arrays(self):
+        assert self.log.forces.shape == (2, 3)
+        assert self.log.eigenvalues.shape == self.log.occupations.shape
+        assert np.array_equal(
+            self.log.eigenvalues[0], [orb["e"] for orb in self.log.evals])
+        assert self.log.kpoints is None and self.log.multipoles is None
+        log = Logfile({"K points": [{"Rc": [0, 0, 0], "Wgt": 0.5},
+                                    {"Rc": [0, 0, 0.5], "Wgt": 0.5}],
+                       "Complete list of energy eigenvalues": [
+                           {"e": -1.0, "f": 2.0, "k": 1},
+                           {"e": -0.5, "f": 2.0, "k": 2},
+                           {"e": -0.2, "f": 0.0, "k": 2}],
+                       "Multipole coefficients": {"values": [
+                           {"sym": "N", "r": [0, 0, 0], "q0": [-0.1]},
+                           {"sym": "N", "r": [0, 0, 2], "q1": [0, 0, 0.1]}]},
+                       "Walltime since initialization": 1.0})
+        assert np.array_equal(log.kpoints, [[0, 0, 0], [0, 0, 0.5]])
+        assert np.array_equal(log.kpoint_weights, [0.5, 0.5])
+        assert np.array_equal(
+            log.eigenvalues, [[-1.0, np.nan], [-0.5, -0.2]], equal_nan=True)
+        assert np.array_equal(
+            log.occupations, [[2.0, np.nan], [2.0, 0.0]], equal_nan=True)
+        assert log.multipoles["sym"] == ["N", "N"]
+        assert np.array_equal(
+            log.multipoles["q1"], [[np.nan]*3, [0, 0, 0.1]], equal_nan=True)
+
     def test_cannot_set_values_of_log_attr(self):
         with pytest.raises(TypeError):
             self.log['Walltime since initialization'] = 0
@@ -238,6 +384,20 @@ class TestLogfile:
         assert len(log_HCN) == 9
         assert all([pos != log_HCN[0].posinp for pos in log_HCN.posinps[1:]])
         assert all([log_HCN.inputparams == doc.inputparams for doc in log_HCN])
+        assert np.array_equal(log_HCN.trajectory.energies,
+                              [doc.energy for doc in log_HCN])
+        assert log_HCN[-1].posinp == log_HCN.posinps[-1]
+
+    def test_GeoptLogfile_incomplete_raises_ValueError(self, tmpdir):
+        # Geometry optimization killed during its last step
+        with open(os.path.join(tests_fol, "log-HCN.yaml")) as f:
+            content = f.read()
+        fname = str(tmpdir.join("log-HCN.yaml"))
+        with open(fname, "w") as f:
+            f.write(content[:int(0.9 * len(content))])
+        with pytest.raises(ValueError, match="incomplete"):
+            Logfile.from_file(fname)
+        assert Logfile.load_many([fname], workers=1) == [None]
 
     @pytest.mark.filterwarnings("ignore::UserWarning")
     def test_test_GeoptLogfile_acceptable_though_incomplete(self):
@@ -247,6 +407,128 @@ class TestLogfile:
         assert isinstance(log_H3CCN, GeoptLogfile)
         assert len(log_H3CCN) == 15
 
+    @pytest.mark.parametrize("tail_size", [TAIL_SIZE, 64])
+    def test_status(self, tmpdir, tail_size):
+        def truncated(fname, n_lines):
+            with open(os.path.join(tests_fol, fname)) as f:
+                lines = f.readlines()[:n_lines]
+            new_fname = tmpdir.join("{}-{}".format(n_lines, fname))
+            new_fname.write("".join(lines))
+            return str(new_fname)
+
+        geopt = "log-geopt-acceptable-though-incomplete.yaml"
+        statuses = [
+            (os.path.join(tests_fol, "log.yaml"), COMPLETE),
+            (os.path.join(tests_fol, geopt), COMPLETE),
+            (os.path.join(tests_fol, "missing.yaml"), MISSING),
+            (truncated("log.yaml", 0), INCOMPLETE),
+            (truncated("log.yaml", 700), INCOMPLETE),
+            (truncated("log.yaml", 720), COMPLETE),
+            (truncated(geopt, 4150), ACCEPTABLE),
+            (truncated(geopt, 4000), INCOMPLETE),
+            (truncated("log-warnings.yaml", 670), INCOMPLETE),
+        ]
+        for fname, status in statuses:
+            assert logfile_status(fname, tail_size=tail_size) == status
+        assert Logfile.status(statuses[-3][0]) == ACCEPTABLE
+
+
+class TestSelectiveLoadAll:
+
+    @pytest.mark.parametrize("filename", [
+        "log.yaml", "log-warnings.yaml", "log-HCN.yaml",
+    ])
+    def test_whole_documents(self, filename):
+        import yaml
+        with open(os.path.join(tests_fol, filename)) as stream:
+            expected = list(yaml.safe_load_all(stream))
+        with open(os.path.join(tests_fol, filename)) as stream:
+            docs = list(selective_load_all(stream, [[]]))
+        assert docs == expected
+
+    @pytest.mark.parametrize("paths, expected", [
+        ([["a", "b"]], {"a": {"b": 1}}),
+        ([["c", 0]], {"c": [1]}),
+        ([["c", -1]], {"c": [None, None, 3]}),
+        ([["c", 0], ["c", -1]], {"c": [1, None, 3]}),
+        ([["d", "*", "f"]], {"d": {"e1": {"f": 2}, "e2": {}}}),
+        ([["alias"]], {"alias": {"x": 1}}),
+    ])
+    def test_selected_paths(self, paths, expected):
+        stream = (
+            "a: {b: 1, z: 2}\n"
+            "c: [1, 2, 3]\n"
+            "d: {e1: {f: 2, g: 3}, e2: {g: 4}}\n"
+            "h: [&anchor {x: 1}]\n"
+            "alias: *anchor\n"
+        )
+        assert next(selective_load_all(stream, paths)) == expected
+
+
+class TestTrajectory:
+
+    filename = os.path.join(tests_fol, "log-HCN.yaml")
+
+    def test_document_offsets(self, tmpdir):
+        import yaml
+        offsets = document_offsets(self.filename)
+        with open(self.filename) as stream:
+            docs = list(yaml.safe_load_all(stream))
+        assert len(offsets) == len(docs)
+        assert read_document(self.filename, 4, offsets) == docs[4]
+        assert read_document(self.filename, -1) == docs[-1]
+        fname = tmpdir.join("docs.yaml")
+        fname.write("# comment\na: 1\n--- \nb: 2\n")
+        assert read_document(str(fname), 1) == {"b": 2}
+        assert document_offsets(str(fname)) == [0, 15]
+
+    def test_trajectory(self):
+        traj = Trajectory.from_file(self.filename)
+        assert len(traj) == 9
+        assert traj[1] != traj[2]
+        assert traj[-1] == traj[8]
+        assert len(traj[::2]) == 5
+        assert np.isclose(traj.energies[1], -16.1897915546748123)
+        assert np.isclose(traj.forcemax[2], 2.02773e-03)
+        with pytest.raises(IndexError):
+            traj[9]
+
+
+class TestTrajectoryStore:
+
+    pos = Posinp.from_file(os.path.join(tests_fol, "free.xyz"))
+
+    def test_append(self, tmpdir):
+        store = TrajectoryStore.create(str(tmpdir), self.pos)
+        assert len(store) == 0
+        assert store.positions.shape == (0, len(self.pos), 3)
+        store.append(self.pos, energy=-1.0, forcemax=0.1)
+        store.extend([self.pos.positions + 1, self.pos.positions + 2])
+        assert np.array_equal(store.positions[1:], np.array(
+            [self.pos.positions + 1, self.pos.positions + 2]))
+        assert np.array_equal(store.energies, [-1.0, np.nan, np.nan],
+                              equal_nan=True)
+        assert store[0] == self.pos
+        assert store[1:][0] == self.pos.translate([1]*3)
+        with pytest.raises(ValueError):
+            store.append(self.pos.positions[1:])
+        # A partially written frame is ignored and then overwritten
+        with open(os.path.join(str(tmpdir), store.POSITIONS_NAME), "ab") as f:
+            f.write(b"\0" * 10)
+        other = TrajectoryStore(str(tmpdir))
+        assert len(other) == 3
+        other.append(self.pos, energy=-2.0)
+        assert len(store) == 4 and store[3] == self.pos
+        assert store.energies[-1] == -2.0
+
+    def test_from_trajectory(self, tmpdir):
+        traj = Trajectory.from_file(os.path.join(tests_fol, "log-HCN.yaml"))
+        store = traj.store(str(tmpdir))
+        assert len(store) == len(traj)
+        assert np.array_equal(store.energies, traj.energies)
+        assert np.array_equal(store.forcemax, traj.forcemax)
+        assert all(pos == traj_pos for pos, traj_pos in zip(store, traj))
+
 
 class TestMultipleLogfile:
 
@@ -387,6 +669,60 @@ C    7.327412521    0.000000000   3.461304757"""
         assert np.allclose(pos1.positions, expected)
         assert np.allclose(pos2.positions, [0, 0, 0])
 
+    def test_positions_are_read_only(self):
+        with pytest.raises(ValueError):
+            self.free_pos.positions[0, 0] = 1.0
+        with pytest.raises(ValueError):
+            self.free_pos.masses[0] = 1.0
+
+    def test_atoms_are_views(self):
+        pos = Posinp([Atom('C', [0, 0, 0]), Atom('N', [0, 0, 1])],
+                     units="angstroem", boundary_conditions="free")
+        pos[1].position = [0, 0, 2]
+        assert np.allclose(pos.positions, [[0, 0, 0], [0, 0, 2]])
+        pos[-1].type = 'O'
+        assert pos.types == ['C', 'O']
+        assert pos.masses[1] == Atom('O', [0, 0, 0]).mass
+        # Copies of atoms are independent from the system
+        atom = pos[0].translate([1, 0, 0])
+        assert atom == Atom('C', [1, 0, 0])
+        assert pos[0] == Atom('C', [0, 0, 0])
+
+    def test_atoms_cannot_be_modified_in_place(self):
+        atoms = [Atom('C', [0, 0, 0]), Atom('N', [0, 0, 1])]
+        pos = Posinp(atoms, units="angstroem", boundary_conditions="free")
+        with pytest.raises(AttributeError):
+            pos.atoms.append(Atom('O', [0, 0, 2]))
+        with pytest.raises(TypeError):
+            pos.atoms[0] = Atom('O', [0, 0, 2])
+        # The atoms given to the posinp are copied
+        atoms[0].position = [1, 0, 0]
+        assert pos[0] == Atom('C', [0, 0, 0])
+        pos.atoms = pos.atoms + (Atom('O', [0, 0, 2]),)
+        assert pos.types == ['C', 'N', 'O']
+
+    def test_from_arrays(self):
+        pos = Posinp.from_arrays(
+            self.free_pos.types, self.free_pos.positions,
+            units=self.free_pos.units, boundary_conditions="free")
+        assert str(pos) == str(self.free_pos)
+        with pytest.raises(ValueError):
+            Posinp.from_arrays(['C'], [[0, 0, 0], [0, 0, 1]], "angstroem",
+                               "free")
+
+    def test_displaced(self):
+        vectors = [[0.1, 0, 0], [0, 0.2, 0], [0, 0, 0.3]]
+        new_pos = self.free_pos.displaced([0, 3, 0], vectors)
+        assert len(new_pos) == 3
+        for i_at, vector, pos in zip([0, 3, 0], vectors, new_pos):
+            assert pos == self.free_pos.translate_atom(i_at, vector)
+        # The new posinps are independent
+        new_pos[0][1].type = 'N'
+        new_pos[0][2].position = [0, 0, 0]
+        assert new_pos[1].types == self.free_pos.types
+        assert new_pos[1] == self.free_pos.translate_atom(3, vectors[1])
+        assert self.free_pos == Posinp.from_file(self.free_filename)
+
     def test___eq__(self):
         atom1 = Atom('N', [0.0, 0.0, 0.0])
         atom2 = Atom('N', [0.0, 0.0, 1.1])
@@ -395,6 +731,26 @@ C    7.327412521    0.000000000   3.461304757"""
         assert pos1 == pos2  # The order of the atoms in the list do not count
         assert pos1 != 1  # No error if other object is not a posinp
 
+    def test_find_permutation(self):
+        types = ['C', 'H', 'H', 'N'] * 50
+        positions = np.random.RandomState(0).uniform(0, 10, (200, 3))
+        pos1 = Posinp.from_arrays(types, positions, 'angstroem', 'free')
+        perm = np.random.RandomState(1).permutation(200)
+        pos2 = Posinp.from_arrays(
+            [types[i] for i in perm], positions[perm] + 1e-9, 'angstroem',
+            'free')
+        assert np.array_equal(perm[pos1.find_permutation(pos2)],
+                              np.arange(200))
+        assert pos1 == pos2
+        # Each atom is matched only once
+        pos3 = Posinp.from_arrays(['C', 'C'], [[0, 0, 0], [0, 0, 0]],
+                                  'angstroem', 'free')
+        pos4 = Posinp.from_arrays(['C', 'C'], [[0, 0, 0], [0, 0, 1]],
+                                  'angstroem', 'free')
+        assert pos3.find_permutation(pos4) is None
+        assert pos4.find_permutation(pos3) is None
+        assert pos1.translate([0, 0, 1e-3]) != pos2
+
     def test_with_surface_boundary_conditions(self):
         # Two Posinp instances with surface BC are the same even if they
         # have a different cell size along y-axis
@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 import os
+import asyncio
 from copy import deepcopy
 import shutil
 import pytest
@@ -21,6 +22,7 @@ class TestJob:
         ("inputparams", inp), ("posinp", pos), ("is_completed", False),
         ("input_name", "input.yaml"), ("posinp_name", "posinp.xyz"),
         ("logfile", {}), ("logfile_name", "log.yaml"),
+        ("stdout_name", "bigdft.out"), ("stderr_name", "bigdft.err"),
         ("data_dir", "data"), ("ref_data_dir", None), ("run_dir", "MyBigDFT")
     ])
     def test_init(self, attr, expected):
@@ -35,6 +37,7 @@ class TestJob:
         ("inputparams", inp), ("posinp", pos), ("is_completed", False),
         ("input_name", "test.yaml"), ("posinp_name", "test.xyz"),
         ("logfile", {}), ("logfile_name", "log-test.yaml"),
+        ("stdout_name", "test.out"), ("stderr_name", "test.err"),
         ("data_dir", "data-test"), ("ref_data_dir", None),
         ("run_dir", "MyBigDFT"),
     ])
@@ -211,6 +214,23 @@ class TestJob:
             bigdft_tool_log = Logfile.from_file(job.logfile_name)
             assert bigdft_tool_log.energy is None
 
+    @pytest.mark.filterwarnings("ignore::UserWarning")
+    def test_run_without_context_manager(self):
+        init_dir = os.getcwd()
+        omp_num_threads = os.environ.get("OMP_NUM_THREADS")
+        job = Job(inputparams=self.inp, name="dry_run", run_dir="tests")
+        job.clean()
+        job.run(dry_run=True, nmpi=2, nomp=4)
+        assert job.is_completed
+        # Neither the working directory nor the environment changed
+        assert os.getcwd() == init_dir
+        assert os.environ.get("OMP_NUM_THREADS") == omp_num_threads
+        # The files were written in the run directory
+        for filename in [job.input_name, job.logfile_name]:
+            assert os.path.exists(os.path.join("tests", filename))
+        job.clean()
+        assert not os.path.exists(os.path.join("tests", job.input_name))
+
     def test__check_logfile_posinp(self):
         pos_name = os.path.join("tests", "surface.xyz")
         pos = Posinp.from_file(pos_name)
@@ -272,3 +292,56 @@ class TestJob:
         with pytest.raises(RuntimeError):
             with Job(inputparams=new_inp, run_dir="tests/dummy") as job:
                 job.run(dry_run=True)
+
+    def test__launch_calculation_async(self, tmpdir):
+        out = asyncio.run(self.job._launch_calculation_async(
+            ["sh", "-c", "echo $OMP_NUM_THREADS"], None, cwd=str(tmpdir),
+            env=Job._get_environment(3)))
+        assert out == b"3\n"
+
+    def test__launch_calculation_async_raises_RuntimeError(self, tmpdir):
+        with pytest.raises(RuntimeError):
+            asyncio.run(self.job._launch_calculation_async(
+                ["sh", "-c", "echo error >&2"], None, cwd=str(tmpdir)))
+
+    def test__launch_calculation_async_with_timeout(self, tmpdir):
+        # The process is stopped before it ends
+        out = asyncio.run(self.job._launch_calculation_async(
+            ["sh", "-c", "echo start; exec sleep 10"], 0.5/60,
+            cwd=str(tmpdir)))
+        assert out == b"start\n"
+
+    def test__launch_calculation_streams_output_to_files(self, tmpdir):
+        job = Job(posinp=self.pos, name="stream", run_dir=str(tmpdir))
+        job.quiet = True
+        out = job._launch_calculation(
+            ["sh", "-c", "seq 1 1000"], None, cwd=str(tmpdir))
+        assert out.splitlines()[0] == str(1001 - Job.OUTPUT_LINES).encode()
+        assert len(tmpdir.join("stream.out").readlines()) == 1000
+        assert tmpdir.join("stream.err").read() == ""
+
+    def test__launch_calculation_raises_RuntimeError(self, tmpdir):
+        with pytest.raises(RuntimeError, match="error"):
+            self.job._launch_calculation(
+                ["sh", "-c", "echo error >&2"], None, cwd=str(tmpdir))
+        assert tmpdir.join("bigdft.err").read() == "error\n"
+
+    def test__launch_calculation_prints_unless_quiet(self, tmpdir, capsys):
+        job = Job(posinp=self.pos, run_dir=str(tmpdir))
+        for quiet in [False, True]:
+            job.quiet = quiet
+            job._launch_calculation(["echo", "SCF"], None, cwd=str(tmpdir))
+            # The command itself is always printed
+            printed = capsys.readouterr().out
+            assert printed.count("SCF") == (1 if quiet else 2)
+
+    def test__launch_calculation_async_cancelled(self, tmpdir):
+        async def cancel_job():
+            task = asyncio.ensure_future(self.job._launch_calculation_async(
+                ["sleep", "10"], None, cwd=str(tmpdir)))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel_job())
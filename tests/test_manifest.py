@@ -0,0 +1,110 @@
+from __future__ import absolute_import
+import os
+import pickle
+import pytest
+import numpy as np
+from mybigdft import Job, Logfile
+from mybigdft.manifest import WorkflowManifest, MANIFEST_NAME
+from mybigdft.workflows.workflow import Workflow
+
+
+class TestWorkflowManifest:
+
+    @pytest.fixture
+    def manifest(self, tmpdir):
+        return WorkflowManifest(str(tmpdir.join(MANIFEST_NAME)))
+
+    def test_record_and_lookup(self, completed_job, reference_log, manifest):
+        job = completed_job()
+        assert manifest.lookup(job) is None
+        job.run()
+        manifest.record(job)
+        logfile = WorkflowManifest(manifest.filename).lookup(job)
+        assert logfile.energy == reference_log.energy
+        np.testing.assert_array_equal(logfile.forces, reference_log.forces)
+        assert logfile.posinp == reference_log.posinp
+        # The whole log is read again from the logfile if needed
+        assert logfile._source is not None
+        assert "Timings for root process" in logfile
+
+    def test_lookup_changed_job_or_logfile(self, completed_job,
+                                           reference_log, manifest):
+        job = completed_job()
+        job.run()
+        manifest.record(job)
+        posinp = reference_log.posinp.translate([0, 0, 1])
+        other = Job(posinp=posinp, run_dir=job.run_dir)
+        assert manifest.lookup(other) is None
+        with open(job._get_path(job.logfile_name), "a") as f:
+            f.write("\n")
+        assert manifest.lookup(job) is None
+
+    def test_interrupted_record_is_ignored(self, completed_job, manifest):
+        job = completed_job()
+        job.run()
+        manifest.record(job)
+        with open(manifest.filename, "a") as f:
+            f.write('{"version": 1, "logfile": "job/lo')
+        assert len(WorkflowManifest(manifest.filename)) == 1
+
+    def test_pickle_does_not_keep_records(self, completed_job, manifest):
+        job = completed_job()
+        job.run()
+        manifest.record(job)
+        assert len(manifest.records) == 1
+        copy = pickle.loads(pickle.dumps(manifest))
+        assert copy._records is None
+        assert len(copy) == 1
+
+
+class TestWorkflowWithManifest:
+
+    @pytest.fixture(autouse=True)
+    def run_in_tmpdir(self, tmpdir, monkeypatch):
+        # The jobs go back to the common prefix of their directories
+        monkeypatch.chdir(tmpdir)
+
+    @pytest.fixture
+    def manifest(self, tmpdir):
+        return WorkflowManifest(str(tmpdir.join(MANIFEST_NAME)))
+
+    def test_no_manifest_by_default(self, completed_job, tmpdir):
+        jobs = [completed_job(name) for name in ("job1", "job2")]
+        wf = Workflow(queue=jobs)
+        wf.run()
+        assert wf.manifest is None
+        assert not tmpdir.join(MANIFEST_NAME).exists()
+
+    def test_run_records_jobs(self, completed_job, manifest):
+        jobs = [completed_job(name) for name in ("job1", "job2")]
+        wf = Workflow(queue=jobs)
+        wf.manifest = manifest
+        wf.run()
+        manifest = WorkflowManifest(manifest.filename)
+        assert sorted(manifest.records) == [
+            os.path.join("job1", "log.yaml"),
+            os.path.join("job2", "log.yaml"),
+        ]
+
+    def test_run_uses_manifest(self, completed_job, reference_log, manifest,
+                               monkeypatch):
+        wf = Workflow(queue=[completed_job()])
+        wf.manifest = manifest
+        wf.run()
+        job = completed_job()
+        wf = Workflow(queue=[job])
+        wf.manifest = WorkflowManifest(manifest.filename)
+        # The logfile is neither read nor checked again
+        monkeypatch.setattr(Logfile, "load_many", None)
+        monkeypatch.setattr(job, "_check_logfile_posinp", None)
+        wf.resume()
+        assert job.has_preloaded_logfile
+        wf.run()
+        assert job.logfile.energy == reference_log.energy
+        # Even without resuming the workflow
+        job = completed_job()
+        wf = Workflow(queue=[job])
+        wf.manifest = WorkflowManifest(manifest.filename)
+        monkeypatch.setattr(job, "_check_logfile_posinp", None)
+        wf.run()
+        assert job.logfile.energy == reference_log.energy
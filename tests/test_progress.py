@@ -0,0 +1,107 @@
+from __future__ import absolute_import
+import os
+import asyncio
+import pytest
+from mybigdft import Job, Posinp, Atom
+from mybigdft.iofiles.trajectory import document_offsets
+from mybigdft.iofiles.progress import (
+    LogfileFollower, GEOPT_STEP, SCF_ITERATION, ATTRIBUTE, MAX_LINE_LENGTH)
+
+HCN = os.path.join("tests", "log-HCN.yaml")
+
+
+def read_events(follower):
+    events = []
+    follower.follow(events.append, lambda: True)
+    return events
+
+
+class TestLogfileFollower:
+
+    def test_geopt(self):
+        events = read_events(LogfileFollower(HCN))
+        n_steps = len(document_offsets(HCN))
+        steps = [e for e in events if e.kind == GEOPT_STEP]
+        assert [e.geopt_step for e in steps] == list(range(1, n_steps))
+        energies = [e.values["energy"] for e in events
+                    if e.kind == ATTRIBUTE and "energy" in e.values]
+        assert len(energies) == n_steps
+        assert energies[0] == pytest.approx(-16.18979153703095)
+        last = [e for e in events if e.kind == SCF_ITERATION][-1]
+        assert (last.geopt_step, last.iteration) == (n_steps - 1, 2)
+
+    def test_growing_logfile(self, tmpdir):
+        with open(HCN, "rb") as f:
+            content = f.read()
+        filename = str(tmpdir.join("log.yaml"))
+        follower = LogfileFollower(filename)
+        assert follower.read() == []
+        events = []
+        with open(filename, "wb") as f:
+            for i in range(0, len(content), 777):
+                f.write(content[i:i+777])
+                f.flush()
+                events += follower.read()
+        assert events == read_events(LogfileFollower(HCN))
+
+    def test_long_line_over_many_reads(self, tmpdir):
+        logfile = tmpdir.join("log.yaml")
+        follower = LogfileFollower(str(logfile))
+        logfile.write("x" * (MAX_LINE_LENGTH + 10))
+        assert follower.read() == []
+        # The end of the long line is not joined to its beginning
+        logfile.write(" iter: 1, EKS: -1.0E+01, gnrm: 1.0E-01\n", mode="a")
+        assert follower.read() == []
+        logfile.write("Energy (Hartree): -1.0\n", mode="a")
+        assert [e.values for e in follower.read()] == [{"energy": -1.0}]
+
+    def test_replaced_logfile_is_read_again(self, tmpdir):
+        logfile = tmpdir.join("log.yaml")
+        logfile.write("Energy (Hartree): -1.0\nWalltime: 1\n")
+        follower = LogfileFollower(str(logfile))
+        follower.read()
+        # Truncated logfile
+        logfile.write("Energy (Hartree): -2.0\n")
+        assert [e.values for e in follower.read()] == [{"energy": -2.0}]
+        # New logfile
+        tmpdir.join("new.yaml").write("Energy (Hartree): -3.0\n")
+        os.replace(str(tmpdir.join("new.yaml")), str(logfile))
+        assert [e.values for e in follower.read()] == [{"energy": -3.0}]
+        follower.skip()
+        assert follower.read() == []
+
+    def test_unknown_field_raises_ValueError(self):
+        with pytest.raises(ValueError):
+            LogfileFollower(HCN, fields=["unknown"])
+
+
+class TestJobProgress:
+
+    # As BigDFT, move the logfile of a previous run before writing a new one
+    command = ["sh", "-c",
+               "mkdir -p logfiles; if [ -f log.yaml ]; then "
+               "mv log.yaml logfiles/log-old.yaml; fi; "
+               "cat {} > log.yaml".format(os.path.abspath(HCN))]
+
+    def run_job(self, tmpdir, use_async):
+        pos = Posinp([Atom("N", [0, 0, 0])], "angstroem", "free")
+        job = Job(posinp=pos, run_dir=str(tmpdir))
+        job.quiet = True
+        job.PROGRESS_POLL_INTERVAL = 0.01
+        events = []
+        job.progress_callback = lambda j, event: events.append(event)
+        if use_async:
+            asyncio.run(job._launch_calculation_async(
+                self.command, None, cwd=str(tmpdir), follow_logfile=True))
+        else:
+            job._launch_calculation(
+                self.command, None, cwd=str(tmpdir), follow_logfile=True)
+        return events
+
+    @pytest.mark.parametrize("use_async", [False, True])
+    def test_progress_callback(self, tmpdir, use_async):
+        events = self.run_job(tmpdir, use_async)
+        assert events == read_events(LogfileFollower(HCN))
+        # The logfile of the previous run is ignored
+        events = self.run_job(tmpdir, use_async)
+        assert events == read_events(LogfileFollower(HCN))
@@ -0,0 +1,60 @@
+from __future__ import absolute_import
+import os
+import warnings
+import pytest
+from mybigdft import Logfile
+from mybigdft.pseudos import PseudopotentialStore
+
+PSPPAR = """\
+Goedecker pseudopotential for {}
+ 7 5 010605 zatom,zion,pspdat
+ 10 {} 2 0 2002 0 pspcod,pspxc,lmax,lloc,mmax,r2well
+"""
+
+
+class TestPseudopotentialStore:
+
+    @pytest.fixture
+    def store(self, tmpdir):
+        source_dir = tmpdir.mkdir("pseudos")
+        source_dir.join("psppar.N").write(PSPPAR.format("N", -101130))
+        source_dir.join("psppar.C").write(PSPPAR.format("C", 1))
+        return PseudopotentialStore(
+            str(tmpdir.join("store")), source_dir=str(source_dir) + os.sep)
+
+    def test_link(self, store, tmpdir):
+        run_dirs = [tmpdir.mkdir("run{}".format(i)) for i in range(2)]
+        for run_dir in run_dirs:
+            store.link(["C", "N"], str(run_dir))
+        targets = [os.readlink(str(run_dir.join("psppar.N")))
+                   for run_dir in run_dirs]
+        assert targets[0] == targets[1] == store.path("N")
+        assert run_dirs[0].join("psppar.C").read() == PSPPAR.format("C", 1)
+        assert len(os.listdir(store.directory)) == 2
+        assert not os.access(store.path("N"), os.W_OK) or os.getuid() == 0
+
+    def test_corrupted_file_is_replaced(self, store):
+        path = store.path("N")
+        os.chmod(path, 0o644)
+        with open(path, "w") as f:
+            f.write("corrupted")
+        new_store = PseudopotentialStore(
+            store.directory, source_dir=store.source_dir)
+        assert new_store.path("N") == path
+        assert new_store.xc("N") == -101130
+
+    def test_check_xc_warns_once(self, store):
+        with pytest.warns(UserWarning, match="'C' atoms"):
+            store.check_xc(["C", "N"], -101130)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            store.check_xc(["C", "N"], -101130)
+
+    def test_logfile_without_psppar_check(self):
+        log = Logfile.from_file(os.path.join("tests", "log.yaml"))
+        log["dft"]["ixc"] = -101130
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            log._check_warnings(check_psppar=False)
+        with pytest.warns(UserWarning):
+            log._check_psppar()
@@ -0,0 +1,54 @@
+from __future__ import absolute_import
+import io
+import os
+import subprocess
+import pytest
+from mybigdft.streams import StreamSink
+
+
+class TestStreamSink:
+
+    @pytest.fixture
+    def filename(self, tmpdir):
+        return str(tmpdir.join("bigdft.out"))
+
+    def test_only_last_lines_are_kept(self, filename):
+        lines = ["line {}\n".format(i).encode() for i in range(1000)]
+        with StreamSink(filename, max_lines=3) as sink:
+            for i in range(0, 1000, 7):
+                sink.write(b"".join(lines[i:i+7]))
+        assert sink.tail == b"".join(lines[-3:])
+        assert sink.is_truncated
+        with open(filename, "rb") as f:
+            assert f.read() == b"".join(lines)
+
+    def test_long_incomplete_line_is_bounded(self, filename):
+        with StreamSink(filename, max_lines=3) as sink:
+            for _ in range(100):
+                sink.write(b"x" * 1000)
+        assert len(sink.tail) < 10000
+        assert sink.size == os.path.getsize(filename) == 100000
+
+    def test_without_lines(self, filename):
+        with StreamSink(filename, max_lines=0) as sink:
+            sink.write(b"error\n")
+        assert sink.tail == b""
+        assert sink.size == 6
+
+    def test_echo_decodes_split_characters(self, filename):
+        echo = io.StringIO()
+        data = u"Énergie: −1.0 Ha\n".encode("utf-8")
+        with StreamSink(filename, echo=echo) as sink:
+            for i in range(len(data)):
+                sink.write(data[i:i+1])
+        assert echo.getvalue() == u"Énergie: −1.0 Ha\n"
+
+    def test_pump(self, filename):
+        process = subprocess.Popen(
+            ["sh", "-c", "seq 1 100000"], stdout=subprocess.PIPE)
+        with StreamSink(filename, max_lines=2) as sink:
+            sink.pump(process.stdout, chunk_size=1000)
+        process.wait()
+        assert sink.tail == b"99999\n100000\n"
+        with open(filename) as f:
+            assert len(f.readlines()) == 100000
@@ -0,0 +1,101 @@
+from __future__ import absolute_import
+import time
+import asyncio
+import pytest
+from mybigdft import Job, Posinp, Atom
+from mybigdft.iofiles.progress import (
+    ProgressEvent, SCF_ITERATION, SUBSPACE_STEP)
+from mybigdft.watchdog import Watchdog, STALLED, OSCILLATING, OVER_BUDGET
+from mybigdft.workflows.workflow import Workflow
+
+
+def scf(iteration, energy, gnrm):
+    values = {"energy": energy, "gnrm": gnrm}
+    return ProgressEvent(SCF_ITERATION, 0, 1, 1, iteration, values)
+
+
+class TestWatchdog:
+
+    def test_converging_scf_is_not_stopped(self):
+        monitor = Watchdog(stall_iterations=3, oscillations=3,
+                           time_budget=100).start(now=0)
+        for i in range(1, 20):
+            assert monitor.update(scf(i, -10 - 1 / i, 10**-i), now=i) is None
+
+    def test_stall(self):
+        monitor = Watchdog(stall_iterations=3).start()
+        for i, gnrm in enumerate([1e-1, 1e-2, 2e-2, 1.5e-2]):
+            assert monitor.update(scf(i, -10, gnrm)) is None
+        # A new SCF cycle starts from scratch
+        monitor.update(ProgressEvent(SUBSPACE_STEP, 0, 1, 2, 0, {}))
+        for i, gnrm in enumerate([1e-1, 1e-2, 2e-2, 1.5e-2]):
+            assert monitor.update(scf(i, -10, gnrm)) is None
+        assert monitor.update(scf(5, -10, 1e-2)) == STALLED
+        assert monitor.update(scf(6, -10, 1e-5)) == STALLED
+
+    def test_oscillations(self):
+        monitor = Watchdog(oscillations=3).start()
+        for i, energy in enumerate([-10, -11, -10.5, -10.6]):
+            assert monitor.update(scf(i, energy, 1)) is None
+        assert monitor.update(scf(4, -10.55, 1)) == OSCILLATING
+
+    def test_time_budget(self):
+        monitor = Watchdog(time_budget=100).start(gnrm_cv=1e-5, now=0)
+        assert monitor.update(scf(1, -10, 1e-1), now=10) is None
+        # The gnrm decreases tenfold in 30 s: 3 more decades take 90 s
+        assert monitor.update(scf(2, -10, 1e-2), now=40) == OVER_BUDGET
+        assert "130 s" in monitor.message
+
+    def test_start_gives_independent_monitors(self):
+        watchdog = Watchdog(stall_iterations=1)
+        monitor = watchdog.start()
+        monitor.update(scf(1, -10, 1))
+        assert monitor.update(scf(2, -10, 1)) == STALLED
+        assert watchdog.start().update(scf(1, -10, 1)) is None
+        assert watchdog.reason is None
+
+
+class TestJobWatchdog:
+
+    # Stalled SCF, written in the logfile while the calculation runs
+    command = ["sh", "-c",
+               "for i in 1 2 3 4 5 6 7 8; do "
+               "echo \" iter: $i, EKS: -1.0E+01, gnrm: 1.0E-01\" >> log.yaml; "
+               "sleep 0.05; done; exec sleep 10"]
+
+    @pytest.mark.parametrize("use_async", [False, True])
+    def test_hopeless_job_is_stopped(self, tmpdir, use_async):
+        pos = Posinp([Atom("N", [0, 0, 0])], "angstroem", "free")
+        job = Job(posinp=pos, run_dir=str(tmpdir))
+        job.quiet = True
+        job.PROGRESS_POLL_INTERVAL = 0.01
+        job.watchdog = Watchdog(stall_iterations=3)
+        start = time.time()
+        if use_async:
+            asyncio.run(job._launch_calculation_async(
+                self.command, None, cwd=str(tmpdir), follow_logfile=True))
+        else:
+            job._launch_calculation(
+                self.command, None, cwd=str(tmpdir), follow_logfile=True)
+        assert time.time() - start < 5
+        assert job.stop_reason == STALLED
+        # The incomplete logfile is not read
+        job._read_calculation_output(False, None)
+        assert job.logfile == {}
+
+    def test_stopped_job_does_not_stop_workflow(self, fake_job, tmpdir,
+                                                monkeypatch):
+        monkeypatch.chdir(tmpdir)
+        stalled = fake_job("stalled")
+        stalled.bigdft_cmd = self.command
+        stalled.PROGRESS_POLL_INTERVAL = 0.01
+        stalled.watchdog = Watchdog(stall_iterations=3)
+        other = fake_job("other")
+        wf = Workflow(queue=[stalled, other])
+        with pytest.warns(UserWarning, match="watchdog"):
+            wf.run()
+        assert wf.stopped_jobs == [stalled]
+        assert not stalled.is_completed
+        assert other.is_completed
+        # The post-processing was not performed
+        assert not wf.is_completed
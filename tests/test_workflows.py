@@ -1,8 +1,9 @@
 from __future__ import absolute_import
 import os
+import asyncio
 import pytest
 import numpy as np
-from mybigdft import Atom, Posinp, Job, InputParams
+from mybigdft import Atom, Posinp, Job, InputParams, Logfile
 from mybigdft.workflows import (
     PolTensor, Phonons, RamanSpectrum, Geopt, Dissociation, InfraredSpectrum,
     VibPolTensor,
@@ -25,6 +26,51 @@ class TestWorkflow:
         assert wf.completed
         assert wf.is_completed
 
+    def test_run_async(self):
+        wf = Workflow()
+        asyncio.run(wf.run_async())
+        assert wf.completed
+        assert wf.is_completed
+
+    @pytest.mark.filterwarnings("ignore::UserWarning")
+    def test_run_resumes_existing_logfiles(self):
+        log = Logfile.from_file(os.path.join("tests", "log-warnings.yaml"))
+        job = Job(inputparams=log.inputparams, posinp=log.posinp,
+                  run_dir="tests", name="warnings")
+        wf = Workflow(queue=[job])
+        wf.resume(workers=2)
+        assert job.has_preloaded_logfile
+        wf.run()
+        assert not job.has_preloaded_logfile
+        assert job.logfile.energy == log.energy
+        # Only the attributes were read from the logfile
+        assert job.logfile._source is not None
+
+    def test_run_resumes_only_if_asked(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(Workflow, "resume", lambda wf: calls.append(wf))
+        log = Logfile.from_file(os.path.join("tests", "log-warnings.yaml"))
+        job = Job(inputparams=log.inputparams, posinp=log.posinp,
+                  run_dir="tests", name="warnings")
+        Workflow(queue=[job]).run()
+        assert calls == []
+        wf = Workflow(queue=[job])
+        wf.run(resume=True)
+        assert calls == [wf]
+
+    @pytest.mark.filterwarnings("ignore::UserWarning")
+    def test_slim(self):
+        log = Logfile.from_file(os.path.join("tests", "log-warnings.yaml"))
+        job = Job(inputparams=log.inputparams, posinp=log.posinp,
+                  run_dir="tests", name="warnings")
+        wf = Workflow(queue=[job])
+        wf.slim = True
+        assert job.slim_logfile
+        wf.run()
+        assert job.logfile.slim
+        assert job.logfile.energy == log.energy
+        assert "Timings for root process" not in job.logfile._log
+
 
 class TestPolTensor:
 